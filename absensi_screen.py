@@ -1,5 +1,244 @@
-from PyQt5.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QFrame, QHBoxLayout
-from PyQt5.QtCore import Qt, pyqtSignal
+import threading
+import time
+
+from PyQt5.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QFrame, QHBoxLayout, QApplication
+from PyQt5.QtCore import Qt, pyqtSignal, QThread, QTimer, QRect
+from PyQt5.QtGui import QImage, QPainter, QColor
+
+from db_manager import DatabaseManager, AttendanceQueue, connection_provider
+from face_pipeline import RecognitionPipeline, FrameRingBuffer, open_frame_source, parse_camera_sources, DEFAULT_CAMERA_SOURCE
+from embedding_store import EmbeddingStore
+from ann_index import load_index
+
+
+class RecognitionWorker(QThread):
+    """
+    Worker untuk menjalankan pipeline pengenalan wajah satu kamera di luar
+    thread GUI. Setiap kamera memiliki worker (capture/detect/embed) sendiri,
+    sedangkan galeri embedding dan antrian absensi dipakai bersama.
+    Hanya frame preview yang sudah diberi anotasi yang diserahkan ke widget,
+    lewat ring buffer tanpa salinan.
+    """
+    # Signal hasil pencatatan absensi: mahasiswa_id, skor, status, pesan
+    attendance_recorded = pyqtSignal(int, float, bool, str)
+    # Signal statistik akhir pipeline (fps dan durasi per tahap)
+    stats_updated = pyqtSignal(dict)
+    # Signal ketika pipeline berhenti karena error
+    pipeline_error = pyqtSignal(str)
+    
+    def __init__(self, candidates, source_spec, parent=None):
+        """
+        Args:
+            candidates (dict): Hasil ClassPreloadWorker (matcher dan antrian absensi bersama)
+            source_spec (str): Sumber kamera untuk open_frame_source
+        """
+        super().__init__(parent)
+        self.source_spec = source_spec
+        self.matcher = candidates["matcher"]
+        # Absensi ditulis di belakang layar oleh antrian milik AbsensiScreen;
+        # mahasiswa yang sudah hadir dicek di memori, juga antar kamera
+        self.attendance_queue = candidates["attendance_queue"]
+        self.pipeline = None
+        # Frame preview ditulis pipeline ke buffer yang sudah dialokasikan dan dibaca CameraPreview
+        self.preview_buffer = FrameRingBuffer()
+        self._lock = threading.Lock()
+        # Diset oleh stop(), juga jika stop() dipanggil sebelum pipeline sempat dibuat
+        self._stop_requested = threading.Event()
+    
+    def stop(self):
+        """Meminta pipeline berhenti setelah frame yang sedang diproses"""
+        with self._lock:
+            self._stop_requested.set()
+            if self.pipeline:
+                self.pipeline.stop()
+    
+    def run(self):
+        """Menjalankan pipeline kamera ini sampai dihentikan"""
+        try:
+            with self._lock:
+                if self._stop_requested.is_set():
+                    return
+                self.pipeline = RecognitionPipeline(
+                    open_frame_source(self.source_spec),
+                    self.matcher,
+                    on_recognized=self._record_attendance,
+                    preview_buffer=self.preview_buffer
+                )
+            stats = self.pipeline.run()
+            self.stats_updated.emit(stats)
+        except Exception as e:
+            self.pipeline_error.emit(f"Kamera {self.source_spec}: {e}")
+    
+    def current_stats(self):
+        """
+        Statistik pipeline dan preview saat ini, dibaca dari thread GUI.
+        
+        Returns:
+            dict: Statistik RecognitionPipeline.stats() ditambah statistik ring buffer, atau None
+        """
+        with self._lock:
+            if self.pipeline is None:
+                return None
+            stats = self.pipeline.stats()
+        stats["preview"] = self.preview_buffer.stats()
+        return stats
+    
+    def _record_attendance(self, mahasiswa_id, score):
+        """
+        Memasukkan absensi mahasiswa yang dikenali ke antrian write-behind.
+        Konfirmasi di layar dikirim langsung tanpa menunggu penulisan ke disk.
+        
+        Args:
+            mahasiswa_id (int): ID mahasiswa hasil pencocokan
+            score (float): Skor kemiripan
+        """
+        status, result = self.attendance_queue.submit(mahasiswa_id)
+        message = f"Hadir pukul {result['jam_absen']}" if status else result.get("message", "")
+        self.attendance_recorded.emit(mahasiswa_id, score, status, message)
+
+
+class ClassPreloadWorker(QThread):
+    """
+    Worker untuk menyiapkan satu sesi kelas di latar belakang: pencocok wajah
+    seluruh mahasiswa kampus (indeks IVF atau galeri penuh, belum dibatasi
+    pada peserta kelas karena tabel peserta belum ada), mahasiswa yang sudah
+    hadir di pertemuan ini dan antrian absensi yang dipakai bersama oleh semua kamera.
+    Bisa dibatalkan dengan requestInterruption(); worker yang dibatalkan
+    berhenti tanpa mengirim hasil.
+    """
+    # Signal ketika preload selesai, berisi dictionary hasil preload
+    preloaded = pyqtSignal(object)
+    # Signal ketika preload gagal
+    preload_error = pyqtSignal(str)
+    
+    def __init__(self, kelas_info, parent=None):
+        super().__init__(parent)
+        self.kelas_info = kelas_info
+    
+    def run(self):
+        """Memuat data sesi dengan koneksi database milik thread ini"""
+        started = time.perf_counter()
+        db_manager = DatabaseManager()
+        try:
+            db_manager.connect()
+            kode_kelas = self.kelas_info['kode_kelas']
+            
+            # Store dibuka dengan memory-mapping, lalu dicocokkan dengan tabel mahasiswa
+            store = EmbeddingStore()
+            if store.exists():
+                store.sync_with_roster(db_manager.get_mahasiswa_ids())
+            gallery = store.to_gallery()
+            
+            # Belum ada tabel peserta kelas: riwayat absensi tidak boleh dipakai
+            # sebagai daftar peserta karena mahasiswa yang belum pernah hadir
+            # tidak akan dikenali. Cari se-kampus lewat indeks IVF jika tersedia
+            matcher = (load_index(store) if store.exists() else None) or gallery
+            if self.isInterruptionRequested():
+                return
+            
+            hadir = db_manager.get_mahasiswa_hadir(kode_kelas, self.kelas_info['nomor_pertemuan'])
+            attendance_queue = AttendanceQueue(kode_kelas, self.kelas_info['nomor_pertemuan'])
+            attendance_queue.load(db_manager, hadir)
+            
+            candidates = {
+                "matcher": matcher,
+                "attendance_queue": attendance_queue,
+                "hadir": hadir,
+                "wajah_terdaftar": len(matcher),
+                "elapsed_ms": 0.0,
+            }
+        except Exception as e:
+            self.preload_error.emit(str(e))
+            return
+        finally:
+            db_manager.close()
+            # Koneksi milik thread worker ini tidak dipakai lagi
+            connection_provider.close_thread_connections()
+        
+        candidates["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.preloaded.emit(candidates)
+
+
+class CameraPreview(QWidget):
+    """
+    Widget preview kamera yang membaca frame terbaru dari FrameRingBuffer.
+    Frame dibungkus QImage tanpa salinan dan digambar langsung saat paint,
+    dengan polling sesuai refresh rate layar sehingga frame yang lebih cepat
+    dari layar dibuang, bukan diantrikan.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(640, 360)
+        self.buffer = None
+        self.painted = 0
+        self._seq = 0
+        self._frame = None
+        self._image = None
+        self._message = "Kamera belum aktif"
+        
+        screen = QApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen and screen.refreshRate() > 0 else 60.0
+        self.timer = QTimer(self)
+        self.timer.setInterval(max(1, int(1000 / refresh_rate)))
+        self.timer.timeout.connect(self._poll)
+    
+    def set_buffer(self, buffer):
+        """
+        Mulai menampilkan frame dari ring buffer
+        
+        Args:
+            buffer (FrameRingBuffer): Buffer milik RecognitionWorker
+        """
+        self.buffer = buffer
+        self._seq = 0
+        self.timer.start()
+    
+    def set_message(self, message):
+        """
+        Berhenti menampilkan frame dan menampilkan pesan
+        
+        Args:
+            message (str): Pesan yang ditampilkan
+        """
+        self.timer.stop()
+        if self.buffer is not None:
+            self.buffer.release_read()
+        self.buffer = None
+        self._frame = None
+        self._image = None
+        self._message = message
+        self.update()
+    
+    def _poll(self):
+        """Mengambil frame terbaru dari buffer jika ada frame baru"""
+        if self.buffer is None:
+            return
+        seq, frame = self.buffer.acquire_read(self._seq)
+        if frame is None:
+            return
+        self._seq = seq
+        # Slot tetap dikunci dari writer selama frame ini ditampilkan
+        self._frame = frame
+        height, width = frame.shape[:2]
+        self._image = QImage(frame.data, width, height, frame.strides[0], QImage.Format_RGB888)
+        self.update()
+    
+    def paintEvent(self, event):
+        """Menggambar frame terbaru (dipertahankan rasio) atau pesan"""
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#2c3e50"))
+        if self._image is not None:
+            size = self._image.size().scaled(self.size(), Qt.KeepAspectRatio)
+            target = QRect((self.width() - size.width()) // 2, (self.height() - size.height()) // 2,
+                           size.width(), size.height())
+            painter.drawImage(target, self._image)
+            self.painted += 1
+        else:
+            painter.setPen(QColor("#ecf0f1"))
+            painter.drawText(self.rect(), Qt.AlignCenter, self._message)
+        painter.end()
+
 
 class AbsensiScreen(QWidget):
     """
@@ -8,11 +247,27 @@ class AbsensiScreen(QWidget):
     # Signal untuk navigasi
     navigate_to_dashboard = pyqtSignal()
     
-    def __init__(self):
+    def __init__(self, camera_spec=DEFAULT_CAMERA_SOURCE):
+        """
+        Args:
+            camera_spec (str): Satu atau beberapa sumber kamera dipisah koma
+        """
         super().__init__()
         # Tambahkan atribut untuk menyimpan data kelas
         self.kelas_info = None
+        # Sumber kamera; ruang kuliah besar memakai beberapa kamera sekaligus
+        self.camera_sources = parse_camera_sources(camera_spec)
+        # Worker pipeline pengenalan wajah per kamera, dibuat saat absensi dimulai
+        self.recognition_workers = []
+        # Antrian absensi bersama semua kamera
+        self.attendance_queue = None
+        # Worker preload galeri wajah dan absensi untuk sesi kelas yang dipilih
+        self.preload_worker = None
         self._init_ui()
+        # Statistik pipeline dibaca berkala selama kamera berjalan
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(1000)
+        self.stats_timer.timeout.connect(self._refresh_stats)
         self._setup_connections()
     
     def _init_ui(self):
@@ -48,9 +303,30 @@ class AbsensiScreen(QWidget):
         self.lbl_info.setStyleSheet("font-size: 16px;")
         self.lbl_info.setAlignment(Qt.AlignCenter)
         
+        # Preview kamera hasil anotasi pipeline, satu per kamera
+        self.camera_previews = []
+        preview_layout = QHBoxLayout()
+        for _ in self.camera_sources:
+            preview = CameraPreview()
+            if len(self.camera_sources) > 1:
+                preview.setMinimumSize(320, 180)
+            self.camera_previews.append(preview)
+            preview_layout.addWidget(preview)
+        
+        # Status pengenalan terakhir dan statistik pipeline
+        self.lbl_status = QLabel("")
+        self.lbl_status.setStyleSheet("font-size: 14px; color: #2c3e50;")
+        self.lbl_status.setAlignment(Qt.AlignCenter)
+        
+        self.lbl_stats = QLabel("")
+        self.lbl_stats.setStyleSheet("font-size: 11px; color: #7f8c8d;")
+        self.lbl_stats.setAlignment(Qt.AlignCenter)
+        
         content_layout.addWidget(self.lbl_info)
         content_layout.addWidget(self.lbl_screen_type)
-        content_layout.addStretch()
+        content_layout.addLayout(preview_layout, 1)
+        content_layout.addWidget(self.lbl_status)
+        content_layout.addWidget(self.lbl_stats)
         
         # Button untuk kembali
         self.btn_back = QPushButton("Kembali ke Dashboard")
@@ -83,6 +359,7 @@ class AbsensiScreen(QWidget):
     
     def _navigate_to_dashboard(self):
         """Handler untuk navigasi kembali ke dashboard"""
+        self.stop_recognition()
         self.navigate_to_dashboard.emit()
         
      # Tambahkan metode baru ini
@@ -96,6 +373,8 @@ class AbsensiScreen(QWidget):
         self.kelas_info = kelas_info
         # Update UI dengan informasi kelas
         self._update_ui_with_kelas_info()
+        # Muat galeri wajah dan absensi sesi ini, pipeline dimulai setelah preload selesai
+        self.start_preload()
         
     # Tambahkan metode baru ini
     def _update_ui_with_kelas_info(self):
@@ -113,4 +392,169 @@ class AbsensiScreen(QWidget):
         self.lbl_info.setText(info_text)
         
         # Tampilkan jenis screen
-        self.lbl_screen_type.setText("ABSENSI SEDANG BERJALAN")
\ No newline at end of file
+        self.lbl_screen_type.setText("ABSENSI SEDANG BERJALAN")
+    
+    def start_preload(self):
+        """Memuat galeri wajah dan absensi sesi kelas yang dipilih di latar belakang"""
+        self.stop_recognition()
+        
+        self._set_preview_message("Memuat data kelas...")
+        self.lbl_status.setText("")
+        
+        self.preload_worker = ClassPreloadWorker(self.kelas_info, self)
+        self.preload_worker.preloaded.connect(self._on_preloaded)
+        self.preload_worker.preload_error.connect(self._on_pipeline_error)
+        self.preload_worker.start()
+    
+    def _on_preloaded(self, candidates):
+        """
+        Menjalankan pipeline setelah data sesi kelas selesai dimuat
+        
+        Args:
+            candidates (dict): Matcher, mahasiswa yang sudah hadir dan durasi preload
+        """
+        if self.sender() is not self.preload_worker:
+            # Hasil preload sesi sebelumnya, sudah tidak dipakai
+            return
+        self.preload_worker = None
+        self.start_recognition(candidates)
+    
+    def start_recognition(self, candidates):
+        """
+        Menjalankan satu worker pengenalan wajah per kamera untuk kelas yang dipilih
+        
+        Args:
+            candidates (dict): Hasil ClassPreloadWorker
+        """
+        self.stop_recognition()
+        
+        self._set_preview_message("Membuka kamera...")
+        
+        self.attendance_queue = candidates["attendance_queue"]
+        self.attendance_queue.start()
+        for source_spec, preview in zip(self.camera_sources, self.camera_previews):
+            worker = RecognitionWorker(candidates, source_spec, parent=self)
+            worker.attendance_recorded.connect(self._on_attendance_recorded)
+            worker.stats_updated.connect(self._on_camera_stopped)
+            worker.pipeline_error.connect(self._on_pipeline_error)
+            worker.start()
+            preview.set_buffer(worker.preview_buffer)
+            self.recognition_workers.append(worker)
+        self.stats_timer.start()
+    
+    def stop_recognition(self):
+        """Menghentikan worker preload dan pengenalan wajah, lalu menunggu thread kamera selesai"""
+        if self.preload_worker is not None:
+            # Preload dibatalkan tanpa menunggu di thread GUI; hasil dan error-nya
+            # diabaikan, thread dihapus setelah selesai sendiri
+            worker = self.preload_worker
+            self.preload_worker = None
+            worker.preloaded.disconnect()
+            worker.preload_error.disconnect()
+            if worker.isFinished():
+                # Sinyal finished sudah lewat, jadi deleteLater tidak akan terpicu
+                worker.deleteLater()
+            else:
+                worker.finished.connect(worker.deleteLater)
+                worker.requestInterruption()
+        if not self.recognition_workers:
+            return
+        self.stats_timer.stop()
+        for worker in self.recognition_workers:
+            worker.stop()
+        for worker in self.recognition_workers:
+            worker.wait()
+        self.recognition_workers = []
+        # Sisa antrian ditulis setelah semua kamera berhenti
+        unflushed = self.attendance_queue.stop()
+        self.attendance_queue = None
+        if unflushed:
+            ids = ", ".join(str(mahasiswa_id) for mahasiswa_id, _ in unflushed)
+            print(f"Absensi belum tersimpan untuk mahasiswa: {ids}")
+            self._set_preview_message(f"Kamera belum aktif\n{len(unflushed)} absensi gagal disimpan")
+        else:
+            self._set_preview_message("Kamera belum aktif")
+    
+    def _set_preview_message(self, message):
+        """
+        Menampilkan pesan di semua preview kamera
+        
+        Args:
+            message (str): Pesan yang ditampilkan
+        """
+        for preview in self.camera_previews:
+            preview.set_message(message)
+    
+    def _refresh_stats(self):
+        """Membaca statistik semua kamera yang sedang berjalan secara berkala"""
+        per_camera = []
+        for worker, preview in zip(self.recognition_workers, self.camera_previews):
+            stats = worker.current_stats()
+            if stats:
+                stats["painted"] = preview.painted
+                per_camera.append(stats)
+        if per_camera:
+            self._on_stats_updated(per_camera)
+    
+    def _on_attendance_recorded(self, mahasiswa_id, score, status, message):
+        """
+        Menampilkan hasil pencatatan absensi
+        
+        Args:
+            mahasiswa_id (int): ID mahasiswa yang dikenali
+            score (float): Skor kemiripan
+            status (bool): True jika absensi berhasil dicatat
+            message (str): Keterangan hasil
+        """
+        color = "#27ae60" if status else "#e67e22"
+        self.lbl_status.setStyleSheet(f"font-size: 14px; color: {color};")
+        self.lbl_status.setText(f"Mahasiswa {mahasiswa_id} (skor {score:.2f}): {message}")
+    
+    def _on_stats_updated(self, per_camera):
+        """
+        Menampilkan fps, latensi dan durasi rata-rata setiap tahap per kamera
+        
+        Args:
+            per_camera (list): Statistik RecognitionPipeline.stats() setiap kamera
+        """
+        lines = []
+        for stats in per_camera:
+            stages = " | ".join(
+                f"{stage} {values['avg_ms']:.1f} ms" for stage, values in stats["stages"].items()
+            )
+            # Frame yang dibuang karena lebih cepat dari layar, konversi = tahap annotate
+            lines.append(f"{stats['source']} - {stats.get('fps', 0)} fps, latensi {stats.get('latency_ms', 0)} ms - "
+                         f"deteksi {stats.get('detect_per_second', stats['detect_calls'])}/s, "
+                         f"embedding {stats.get('embed_per_second', stats['embed_calls'])}/s - {stages} - "
+                         f"preview dibuang {stats['preview']['dropped']}, digambar {stats['painted']}")
+        if self.attendance_queue is not None:
+            queue_stats = self.attendance_queue.stats
+            lines.append(f"Absensi: {queue_stats['queued']} hadir, {queue_stats['written']} tersimpan, "
+                         f"{queue_stats['duplicates']} duplikat")
+        self.lbl_stats.setText("\n".join(lines))
+    
+    def _on_camera_stopped(self, stats):
+        """
+        Mencatat statistik akhir kamera yang berhenti
+        
+        Args:
+            stats (dict): Statistik akhir RecognitionPipeline.run()
+        """
+        print(f"Kamera {stats['source']} berhenti: {stats['frames']} frame, {stats.get('fps', 0)} fps, "
+              f"latensi {stats.get('latency_ms', 0)} ms")
+    
+    def _on_pipeline_error(self, message):
+        """
+        Menampilkan error dari worker preload atau pipeline kamera
+        
+        Args:
+            message (str): Pesan error
+        """
+        print(f"Pipeline pengenalan wajah berhenti: {message}")
+        worker = self.sender()
+        if worker in self.recognition_workers:
+            # Hanya kamera yang gagal; kamera lain tetap berjalan
+            preview = self.camera_previews[self.recognition_workers.index(worker)]
+            preview.set_message(f"Kamera berhenti\n{message}")
+        else:
+            self._set_preview_message(f"Absensi tidak dapat dimulai\n{message}")
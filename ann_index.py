@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Indeks approximate nearest-neighbour (IVF) untuk pencarian wajah se-kampus.
+Embedding dikelompokkan dengan k-means (coarse quantizer); saat pencarian
+hanya nprobe kelompok terdekat yang dibandingkan, bukan seluruh galeri.
+Indeks dibangun offline dari store embedding dan disimpan di folder store.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from face_gallery import normalize_rows, random_gallery
+from face_pipeline import DEFAULT_MATCH_THRESHOLD
+from embedding_store import EmbeddingStore, DEFAULT_STORE_DIR
+
+
+logger = logging.getLogger('ann-index')
+
+INDEX_FILE = "ivf.npz"
+
+# Jumlah kelompok yang diperiksa per pencarian
+DEFAULT_NPROBE = 16
+
+# Iterasi k-means dan jumlah sampel pelatihan per kelompok
+KMEANS_ITERATIONS = 10
+TRAIN_SAMPLES_PER_LIST = 64
+
+# Ukuran potongan baris saat menghitung kelompok terdekat, membatasi memori
+ASSIGN_CHUNK_ROWS = 8192
+
+
+def default_nlist(size: int) -> int:
+    """Jumlah kelompok bawaan: sekitar akar jumlah embedding."""
+    return max(1, int(np.sqrt(size)))
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Mencari kelompok terdekat untuk setiap baris, per potongan baris."""
+    labels = np.empty(len(matrix), dtype=np.int64)
+    for start in range(0, len(matrix), ASSIGN_CHUNK_ROWS):
+        chunk = matrix[start:start + ASSIGN_CHUNK_ROWS]
+        labels[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(matrix: np.ndarray, nlist: int, iterations: int = KMEANS_ITERATIONS,
+                    seed: int = 0) -> np.ndarray:
+    """
+    Melatih centroid dengan spherical k-means pada sampel embedding.
+
+    Args:
+        matrix: Embedding yang sudah dinormalisasi L2 (n x dim)
+        nlist: Jumlah kelompok
+        iterations: Jumlah iterasi k-means
+        seed: Seed generator acak
+
+    Returns:
+        Matriks centroid (nlist x dim) yang sudah dinormalisasi L2
+    """
+    rng = np.random.default_rng(seed)
+    nlist = min(nlist, len(matrix))
+    sample_size = min(len(matrix), nlist * TRAIN_SAMPLES_PER_LIST)
+    sample = np.asarray(matrix[np.sort(rng.choice(len(matrix), sample_size, replace=False))])
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+
+        # Kelompok kosong diisi ulang dengan titik acak dari sampel
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+
+    return centroids
+
+
+class IVFIndex:
+    """
+    Indeks IVF (inverted file). Baris embedding disusun ulang per kelompok
+    sehingga setiap kelompok adalah potongan matriks kontigu.
+    """
+
+    def __init__(self, centroids: np.ndarray, ids: np.ndarray, matrix: np.ndarray, offsets: np.ndarray,
+                 nprobe: int = DEFAULT_NPROBE, threshold: float = DEFAULT_MATCH_THRESHOLD,
+                 source: Optional[Dict[str, Any]] = None, backend: Optional[str] = None):
+        """
+        Args:
+            centroids: Centroid kelompok (nlist x dim)
+            ids: ID mahasiswa, terurut per kelompok
+            matrix: Embedding, terurut per kelompok
+            offsets: Awal setiap kelompok di matrix (nlist + 1)
+            nprobe: Jumlah kelompok yang diperiksa per pencarian
+            threshold: Skor kemiripan minimal agar wajah dianggap dikenali
+            source: Keterangan store asal (rows, tombstones, roster_version)
+            backend: Backend embedding (FaceEmbedder.backend) asal indeks, None jika tidak diketahui
+        """
+        self.centroids = centroids
+        self.ids = ids
+        self.matrix = matrix
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self.threshold = threshold
+        self.source = source or {}
+        self.backend = backend
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, ids: np.ndarray, matrix: np.ndarray, nlist: Optional[int] = None, **kwargs) -> "IVFIndex":
+        """
+        Membangun indeks dari embedding yang sudah dinormalisasi L2.
+
+        Args:
+            ids: ID mahasiswa untuk setiap baris
+            matrix: Embedding (n x dim)
+            nlist: Jumlah kelompok (default sekitar akar n)
+            **kwargs: Diteruskan ke konstruktor (nprobe, threshold, source)
+
+        Returns:
+            IVFIndex baru
+        """
+        centroids = train_centroids(matrix, nlist or default_nlist(len(matrix)))
+        labels = _assign(matrix, centroids)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=len(centroids)))])
+        return cls(centroids, np.asarray(ids)[order], np.ascontiguousarray(matrix[order]), offsets, **kwargs)
+
+    def search(self, probes: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mencari k embedding terdekat untuk setiap probe dari nprobe kelompok terdekat.
+
+        Args:
+            probes: Matriks embedding probe (m x dim), sudah dinormalisasi L2
+            k: Jumlah kandidat per probe
+
+        Returns:
+            Tuple (ids, scores) berukuran (m x k); slot kosong berisi id -1 dan skor -inf
+
+        Raises:
+            ValueError: Jika dimensi probe berbeda dengan dimensi indeks
+        """
+        probes = np.atleast_2d(np.ascontiguousarray(probes, dtype=np.float32))
+        if probes.shape[-1] != self.matrix.shape[1]:
+            raise ValueError(f"Dimensi embedding probe {probes.shape[-1]} tidak sama dengan indeks "
+                             f"({self.matrix.shape[1]}), periksa backend embedding")
+        nprobe = min(self.nprobe, self.nlist)
+        coarse = np.argpartition(-(probes @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+
+        result_ids = np.full((len(probes), k), -1, dtype=np.int64)
+        result_scores = np.full((len(probes), k), -np.inf, dtype=np.float32)
+        for i, lists in enumerate(coarse):
+            rows = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+            if len(rows) == 0:
+                continue
+            scores = self.matrix[rows] @ probes[i]
+            top = min(k, len(rows))
+            best = np.argpartition(-scores, top - 1)[:top] if top < len(rows) else np.arange(len(rows))
+            best = best[np.argsort(-scores[best])]
+            result_ids[i, :top] = self.ids[rows[best]]
+            result_scores[i, :top] = scores[best]
+        return result_ids, result_scores
+
+    def identify(self, embeddings: np.ndarray) -> List[Tuple[Optional[int], float]]:
+        """
+        Antarmuka yang sama dengan FaceGallery.identify untuk RecognitionPipeline.
+
+        Args:
+            embeddings: Matriks embedding probe (m x dim)
+
+        Returns:
+            List (mahasiswa_id atau None jika di bawah threshold, skor kemiripan)
+        """
+        if len(self) == 0:
+            return [(None, 0.0) for _ in range(len(embeddings))]
+        ids, scores = self.search(embeddings, k=1)
+        return [(int(i) if i >= 0 and s >= self.threshold else None, float(s))
+                for i, s in zip(ids[:, 0], scores[:, 0])]
+
+    def save(self, path: str) -> None:
+        """
+        Menyimpan indeks ke file .npz secara atomik.
+
+        Args:
+            path: Path file indeks
+        """
+        temp_path = path + ".tmp.npz"
+        np.savez(temp_path, centroids=self.centroids, ids=self.ids, matrix=self.matrix,
+                 offsets=self.offsets, source_rows=self.source.get("rows", 0),
+                 source_tombstones=self.source.get("tombstones", 0),
+                 roster_version=str(self.source.get("roster_version")))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "IVFIndex":
+        """
+        Memuat indeks dari file .npz.
+
+        Args:
+            path: Path file indeks
+            **kwargs: Diteruskan ke konstruktor (nprobe, threshold)
+
+        Returns:
+            IVFIndex
+        """
+        with np.load(path) as data:
+            source = {
+                "rows": int(data["source_rows"]),
+                "tombstones": int(data["source_tombstones"]),
+                "roster_version": str(data["roster_version"]),
+            }
+            return cls(data["centroids"], data["ids"], data["matrix"], data["offsets"],
+                       source=source, **kwargs)
+
+    def matches_store(self, store: EmbeddingStore) -> bool:
+        """True jika indeks dibangun dari isi store saat ini."""
+        stats = store.stats()
+        return (self.source.get("rows") == stats["rows"]
+                and self.source.get("tombstones") == stats["tombstones"]
+                and self.source.get("roster_version") == str(stats["roster_version"]))
+
+
+def build_index(store_path: str = DEFAULT_STORE_DIR, nlist: Optional[int] = None) -> IVFIndex:
+    """
+    Membangun indeks IVF dari store embedding dan menyimpannya di folder store.
+
+    Args:
+        store_path: Folder store embedding
+        nlist: Jumlah kelompok (default sekitar akar jumlah embedding)
+
+    Returns:
+        IVFIndex yang sudah disimpan
+    """
+    store = EmbeddingStore(store_path)
+    ids, matrix = store.load()
+    if len(ids) == 0:
+        raise ValueError(f"Store embedding {store_path} kosong")
+
+    started = time.perf_counter()
+    index = IVFIndex.build(ids, matrix, nlist, source=store.stats(), backend=store.backend)
+    index.save(os.path.join(store_path, INDEX_FILE))
+    logger.info(f"Indeks IVF {index.nlist} kelompok untuk {len(index)} embedding dibangun "
+                f"dalam {time.perf_counter() - started:.1f} detik")
+    return index
+
+
+def load_index(store: EmbeddingStore, **kwargs) -> Optional[IVFIndex]:
+    """
+    Memuat indeks IVF milik store jika ada dan masih sesuai isi store.
+
+    Args:
+        store: Store embedding yang sudah dibuka
+        **kwargs: Diteruskan ke IVFIndex.load (nprobe, threshold)
+
+    Returns:
+        IVFIndex, atau None jika belum dibangun atau sudah usang
+    """
+    path = os.path.join(store.path, INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    # Indeks dibangun dari store, jadi backend-nya sama dengan backend store
+    index = IVFIndex.load(path, backend=store.backend, **kwargs)
+    if not index.matches_store(store):
+        logger.warning(f"Indeks IVF {path} usang, jalankan ulang: python ann_index.py build")
+        return None
+    return index
+
+
+def benchmark_ann(size: int = 100000, dim: int = 128, queries: int = 200,
+                  nprobes: Iterable[int] = (1, 4, 8, 16, 32), nlist: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Membandingkan recall@1 dan latensi indeks IVF dengan pencarian brute-force.
+
+    Args:
+        size: Jumlah identitas di galeri
+        dim: Dimensi embedding
+        queries: Jumlah wajah probe
+        nprobes: Nilai nprobe yang diuji
+        nlist: Jumlah kelompok (default sekitar akar size)
+
+    Returns:
+        Dictionary berisi waktu build, latensi brute-force dan hasil per nprobe
+    """
+    rng = np.random.default_rng(2)
+    gallery = random_gallery(size, dim)
+    truth = rng.integers(0, size, queries)
+    probes = normalize_rows(gallery.matrix[truth] + 0.05 * rng.standard_normal((queries, dim), dtype=np.float32))
+
+    started = time.perf_counter()
+    index = IVFIndex.build(gallery.ids, gallery.matrix, nlist)
+    build_seconds = time.perf_counter() - started
+
+    # Jawaban brute-force dipakai sebagai acuan recall
+    started = time.perf_counter()
+    exact = np.concatenate([gallery.search(probe, k=1)[0][:, 0] for probe in probes])
+    brute_ms = (time.perf_counter() - started) / queries * 1000
+
+    runs = []
+    for nprobe in nprobes:
+        index.nprobe = nprobe
+        started = time.perf_counter()
+        found = np.concatenate([index.search(probe, k=1)[0][:, 0] for probe in probes])
+        latency_ms = (time.perf_counter() - started) / queries * 1000
+        runs.append({
+            "nprobe": nprobe,
+            "recall_at_1": round(float(np.mean(found == exact)), 4),
+            "latency_ms": round(latency_ms, 3),
+            "speedup": round(brute_ms / latency_ms, 1),
+        })
+
+    return {
+        "size": size,
+        "nlist": index.nlist,
+        "build_seconds": round(build_seconds, 2),
+        "brute_ms": round(brute_ms, 3),
+        "runs": runs,
+    }
+
+
+def main():
+    """Membangun indeks atau menjalankan benchmark dari command line."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Indeks IVF untuk pencarian wajah se-kampus")
+    parser.add_argument("command", choices=["build", "benchmark"],
+                        help="build: bangun indeks dari store, benchmark: recall dan latensi vs brute-force")
+    parser.add_argument("--path", default=DEFAULT_STORE_DIR, help="Folder store embedding")
+    parser.add_argument("--nlist", type=int, default=None, help="Jumlah kelompok k-means")
+    parser.add_argument("--size", type=int, default=100000, help="Jumlah identitas untuk benchmark")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        try:
+            index = build_index(args.path, args.nlist)
+        except ValueError as e:
+            print(f"Gagal membangun indeks: {e}")
+            sys.exit(1)
+        print(f"Indeks tersimpan: {os.path.join(args.path, INDEX_FILE)} "
+              f"({len(index)} embedding, {index.nlist} kelompok)")
+        return
+
+    result = benchmark_ann(args.size, nlist=args.nlist)
+    print(f"\n=== Benchmark IVF: {result['size']} identitas, {result['nlist']} kelompok, "
+          f"build {result['build_seconds']} detik ===")
+    print(f"Brute-force: {result['brute_ms']:.3f} ms per wajah")
+    print(f"{'nprobe':>6} | {'Recall@1':>8} | {'Latensi':>10} | {'Speedup':>7}")
+    print("-" * 42)
+    for run in result["runs"]:
+        print(f"{run['nprobe']:>6} | {run['recall_at_1']:>8.4f} | {run['latency_ms']:>7.3f} ms | {run['speedup']:>6}x")
+
+
+if __name__ == "__main__":
+    main()
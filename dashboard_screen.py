@@ -1,10 +1,22 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QDialog, QLineEdit, QMessageBox, QFrame, QComboBox, QFormLayout
-from PyQt5.QtCore import Qt, pyqtSignal, QSize
+from PyQt5.QtCore import Qt, pyqtSignal, QSize, QThread, QTimer
 from PyQt5.QtGui import QPixmap, QPalette, QBrush, QFont, QIcon
 import os
+import threading
+import time
+from collections import OrderedDict
 
 # Import db_manager untuk fungsi login
-from db_manager import DatabaseManager
+from db_manager import DatabaseManager, connection_provider
+
+# Gambar latar belakang dashboard
+BACKGROUND_IMAGE_PATH = "assets/background.png"
+
+# Jumlah ukuran background hasil scaling yang disimpan (LRU)
+BACKGROUND_CACHE_SIZE = 4
+
+# Scaling halus background ditunda sampai resize berhenti selama sekian ms
+BACKGROUND_RESIZE_DEBOUNCE_MS = 150
 
 class DashboardScreen(QWidget):
     """
@@ -18,6 +30,17 @@ class DashboardScreen(QWidget):
     
     def __init__(self):
         super().__init__()
+        # Worker sinkronisasi yang sedang berjalan
+        self.sync_worker = None
+        # Worker enrollment wajah (Train) yang sedang berjalan
+        self.train_worker = None
+        # Gambar background didekode sekali, hasil scaling di-cache per ukuran
+        self._background_source = None
+        self._background_cache = OrderedDict()
+        self._background_timer = QTimer(self)
+        self._background_timer.setSingleShot(True)
+        self._background_timer.setInterval(BACKGROUND_RESIZE_DEBOUNCE_MS)
+        self._background_timer.timeout.connect(self._apply_background)
         self._init_ui()
         self._setup_connections()
     
@@ -30,11 +53,10 @@ class DashboardScreen(QWidget):
         self.setStyleSheet("background-color: #f5f6fa;")
         
         # Coba set background image jika ada
-        bg_path = "assets/background.png"
-        if os.path.exists(bg_path):
-            self._set_background_image(bg_path)
+        if os.path.exists(BACKGROUND_IMAGE_PATH):
+            self._set_background_image(BACKGROUND_IMAGE_PATH)
         else:
-            print(f"Warning: Background image not found at {bg_path}")
+            print(f"Warning: Background image not found at {BACKGROUND_IMAGE_PATH}")
         
         # Membuat navbar
         self._create_navbar()
@@ -50,34 +72,61 @@ class DashboardScreen(QWidget):
     
     def _set_background_image(self, image_path):
         """
-        Mengatur gambar latar belakang yang menyesuaikan ukuran layar tanpa stretch.
+        Memuat gambar latar belakang sekali, lalu menerapkannya sesuai ukuran layar.
         
         Args:
             image_path (str): Path ke file gambar latar belakang.
         """
         try:
-            # Mengambil ukuran layar
-            screen_size = self.size()
-            
-            # Memuat gambar
             pixmap = QPixmap(image_path)
-            
-            # Mengubah ukuran gambar agar sesuai dengan layar tanpa stretch (mempertahankan aspect ratio)
-            scaled_pixmap = pixmap.scaled(screen_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            
-            # Membuat palette untuk background
-            palette = QPalette()
-            
-            # Mengatur gambar sebagai background
-            brush = QBrush(scaled_pixmap)
-            palette.setBrush(QPalette.Background, brush)
-            
-            # Menerapkan palette ke window
-            self.setAutoFillBackground(True)
-            self.setPalette(palette)
+            if pixmap.isNull():
+                print(f"Error saat memuat gambar latar belakang: {image_path} tidak dapat dibaca")
+                return
+            self._background_source = pixmap
+            self._background_cache.clear()
+            self._apply_background()
         except Exception as e:
             print(f"Error saat memuat gambar latar belakang: {e}")
     
+    def _apply_background(self, smooth=True):
+        """
+        Mengatur gambar latar belakang yang menyesuaikan ukuran layar tanpa stretch.
+        
+        Args:
+            smooth (bool): True untuk scaling halus (di-cache per ukuran),
+                False untuk scaling cepat selama window masih di-resize.
+        """
+        if self._background_source is None:
+            return
+        
+        # Mengambil ukuran layar
+        screen_size = self.size()
+        key = (screen_size.width(), screen_size.height())
+        
+        if smooth:
+            scaled_pixmap = self._background_cache.get(key)
+            if scaled_pixmap is None:
+                # Mengubah ukuran gambar agar sesuai dengan layar tanpa stretch (mempertahankan aspect ratio)
+                scaled_pixmap = self._background_source.scaled(screen_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                self._background_cache[key] = scaled_pixmap
+                if len(self._background_cache) > BACKGROUND_CACHE_SIZE:
+                    self._background_cache.popitem(last=False)
+            else:
+                self._background_cache.move_to_end(key)
+        else:
+            scaled_pixmap = self._background_source.scaled(screen_size, Qt.KeepAspectRatio, Qt.FastTransformation)
+        
+        # Membuat palette untuk background
+        palette = QPalette()
+        
+        # Mengatur gambar sebagai background
+        brush = QBrush(scaled_pixmap)
+        palette.setBrush(QPalette.Background, brush)
+        
+        # Menerapkan palette ke window
+        self.setAutoFillBackground(True)
+        self.setPalette(palette)
+    
     def _create_navbar(self):
         """
         Membuat navbar menu dengan logo dan grup tombol secara individual.
@@ -224,10 +273,12 @@ class DashboardScreen(QWidget):
                 int(self.height() * 0.5)    # Height (50% dari tinggi)
             )
         
-        # Perbarui background image jika ada
-        bg_path = "assets/background.png"
-        if os.path.exists(bg_path):
-            self._set_background_image(bg_path)
+        # Selama resize berlangsung pakai scaling cepat (atau ukuran yang sudah
+        # di-cache), scaling halus dijalankan setelah resize berhenti
+        if self._background_source is not None:
+            key = (self.width(), self.height())
+            self._apply_background(smooth=key in self._background_cache)
+            self._background_timer.start()
         
         # Panggil method parent class
         super().resizeEvent(event)
@@ -340,9 +391,26 @@ class DashboardScreen(QWidget):
     def _on_sync_clicked(self):
         """
         Menangani event saat tombol Sync diklik.
+        Sinkronisasi dijalankan di SyncWorker agar UI tidak membeku.
+        Jika sinkronisasi sedang berjalan, klik tombol akan menawarkan pembatalan.
         """
         print("Tombol 'Sync' diklik")
         
+        # Sinkronisasi sedang berjalan, tawarkan pembatalan
+        if self.sync_worker is not None and self.sync_worker.isRunning():
+            confirmation = QMessageBox.question(
+                self,
+                "Batalkan Sinkronisasi",
+                "Sinkronisasi sedang berjalan. Batalkan sinkronisasi?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if confirmation == QMessageBox.Yes:
+                self.sync_worker.cancel()
+                self.btn_kelas.setText("Membatalkan...")
+                self.btn_kelas.setEnabled(False)
+            return
+        
         # Tampilkan dialog konfirmasi
         confirmation = QMessageBox.question(
             self,
@@ -353,61 +421,174 @@ class DashboardScreen(QWidget):
         )
         
         if confirmation == QMessageBox.Yes:
-            # Inisialisasi database manager
-            db_manager = DatabaseManager()
-            db_manager.connect()
+            # Jalankan sinkronisasi di thread terpisah
+            self.sync_worker = SyncWorker(self)
+            self.sync_worker.progress.connect(self._on_sync_progress)
+            self.sync_worker.sync_finished.connect(self._on_sync_finished)
+            self.btn_kelas.setText("Sync...")
+            self.btn_kelas.setToolTip("Klik untuk membatalkan sinkronisasi")
+            self.sync_worker.start()
+    
+    def _on_sync_progress(self, done, failed, total, eta):
+        """
+        Update tombol Sync dengan progress sinkronisasi.
+        
+        Args:
+            done (int): Jumlah data yang berhasil dikirim
+            failed (int): Jumlah data yang gagal dikirim
+            total (int): Jumlah seluruh data pending
+            eta (float): Perkiraan sisa waktu dalam detik
+        """
+        processed = done + failed
+        if self.btn_kelas.isEnabled():
+            self.btn_kelas.setText(f"{processed}/{total} ({int(eta)}s)")
+        self.btn_kelas.setToolTip(
+            f"Berhasil: {done}, Gagal: {failed}, Total: {total}\n"
+            f"Perkiraan sisa waktu: {int(eta)} detik\n"
+            f"Klik untuk membatalkan sinkronisasi"
+        )
+    
+    def _on_sync_finished(self, status, result):
+        """
+        Menampilkan hasil sinkronisasi setelah SyncWorker selesai.
+        
+        Args:
+            status (bool): Status sinkronisasi
+            result (dict): Ringkasan hasil sinkronisasi
+        """
+        # Kembalikan tombol Sync ke keadaan awal
+        self.btn_kelas.setText("Sync")
+        self.btn_kelas.setToolTip("")
+        self.btn_kelas.setEnabled(True)
+        self.sync_worker = None
+        
+        # Tampilkan hasil sinkronisasi
+        if status:
+            # Format pesan berhasil
+            success_count = result.get('synced', 0)
+            failed_count = result.get('failed', 0)
+            total_count = result.get('total', 0)
             
-            # Jalankan sinkronisasi
-            status, result = db_manager.sync_db_to_server()
+            if result.get('cancelled'):
+                message = f"Sinkronisasi dibatalkan.\n\n"
+            else:
+                message = f"Sinkronisasi selesai.\n\n"
+            message += f"Berhasil: {success_count}\n"
+            message += f"Gagal: {failed_count}\n"
+            message += f"Total: {total_count}"
             
-            # Tutup koneksi database
-            db_manager.close()
+            # Jika ada kegagalan, tambahkan detail
+            if failed_count > 0 and result.get('failed_details'):
+                message += "\n\nDetail kegagalan:"
+                for i, detail in enumerate(result['failed_details']):
+                    message += f"\n{i+1}. ID Absensi: {detail.get('id', 'N/A')}"
+                    if 'status_code' in detail:
+                        message += f"\n   Status: {detail.get('status_code', 'N/A')}"
+                        message += f"\n   Pesan: {detail.get('message', 'N/A')}"
+                    else:
+                        message += f"\n   Error: {detail.get('error', 'N/A')}"
             
-            # Tampilkan hasil sinkronisasi
-            if status:
-                # Format pesan berhasil
-                success_count = result.get('synced', 0)
-                failed_count = result.get('failed', 0)
-                total_count = result.get('total', 0)
-                
-                message = f"Sinkronisasi selesai.\n\n"
-                message += f"Berhasil: {success_count}\n"
-                message += f"Gagal: {failed_count}\n"
-                message += f"Total: {total_count}"
-                
-                # Jika ada kegagalan, tambahkan detail
-                if failed_count > 0 and result.get('failed_details'):
-                    message += "\n\nDetail kegagalan:"
-                    for i, detail in enumerate(result['failed_details']):
-                        message += f"\n{i+1}. ID Absensi: {detail.get('id', 'N/A')}"
-                        if 'status_code' in detail:
-                            message += f"\n   Status: {detail.get('status_code', 'N/A')}"
-                            message += f"\n   Pesan: {detail.get('message', 'N/A')}"
-                        else:
-                            message += f"\n   Error: {detail.get('error', 'N/A')}"
-                
-                # Tampilkan pesan berhasil
-                QMessageBox.information(
-                    self,
-                    "Sinkronisasi Berhasil",
-                    message,
-                    QMessageBox.Ok
-                )
-            else:
-                # Tampilkan pesan error
-                QMessageBox.critical(
-                    self,
-                    "Sinkronisasi Gagal",
-                    f"Error: {result.get('message', 'Terjadi kesalahan yang tidak diketahui.')}",
-                    QMessageBox.Ok
-                )
+            # Tampilkan pesan berhasil
+            QMessageBox.information(
+                self,
+                "Sinkronisasi Berhasil",
+                message,
+                QMessageBox.Ok
+            )
+        else:
+            # Tampilkan pesan error
+            QMessageBox.critical(
+                self,
+                "Sinkronisasi Gagal",
+                f"Error: {result.get('message', 'Terjadi kesalahan yang tidak diketahui.')}",
+                QMessageBox.Ok
+            )
     
     def _on_train_clicked(self):
         """
-        Menangani event saat tombol Dosen diklik.
+        Menangani event saat tombol Train diklik.
+        Enrollment wajah dijalankan di TrainWorker agar UI tidak membeku.
+        Jika enrollment sedang berjalan, klik tombol akan menawarkan pembatalan.
         """
         print("Tombol 'train' diklik")
-        # Tambahkan logika untuk tombol Dosen di sini
+        
+        # Enrollment sedang berjalan, tawarkan pembatalan
+        if self.train_worker is not None and self.train_worker.isRunning():
+            confirmation = QMessageBox.question(
+                self,
+                "Batalkan Train",
+                "Train wajah sedang berjalan. Batalkan?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if confirmation == QMessageBox.Yes:
+                self.train_worker.cancel()
+                self.btn_dosen.setText("Membatalkan...")
+                self.btn_dosen.setEnabled(False)
+            return
+        
+        confirmation = QMessageBox.question(
+            self,
+            "Konfirmasi Train",
+            "Proses foto baru di folder dataset dan perbarui data wajah mahasiswa?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        
+        if confirmation == QMessageBox.Yes:
+            self.train_worker = TrainWorker(self)
+            self.train_worker.progress.connect(self._on_train_progress)
+            self.train_worker.train_finished.connect(self._on_train_finished)
+            self.btn_dosen.setText("Train...")
+            self.btn_dosen.setToolTip("Klik untuk membatalkan train")
+            self.train_worker.start()
+    
+    def _on_train_progress(self, done, total):
+        """
+        Update tombol Train dengan progress enrollment.
+        
+        Args:
+            done (int): Jumlah foto yang sudah diproses
+            total (int): Jumlah foto baru
+        """
+        if self.btn_dosen.isEnabled():
+            self.btn_dosen.setText(f"{done}/{total}")
+        self.btn_dosen.setToolTip(f"Foto diproses: {done} dari {total}\nKlik untuk membatalkan train")
+    
+    def _on_train_finished(self, status, result):
+        """
+        Menampilkan hasil enrollment setelah TrainWorker selesai.
+        
+        Args:
+            status (bool): Status enrollment
+            result (dict): Ringkasan hasil enrollment
+        """
+        self.btn_dosen.setText("Train")
+        self.btn_dosen.setToolTip("")
+        self.btn_dosen.setEnabled(True)
+        self.train_worker = None
+        
+        if status:
+            message = "Train dibatalkan.\n\n" if result.get('cancelled') else "Train selesai.\n\n"
+            message += f"Foto baru diproses: {result.get('processed', 0)}\n"
+            message += f"Sudah diproses sebelumnya: {result.get('skipped', 0)}\n"
+            message += f"Tanpa wajah: {result.get('no_face', 0)}\n"
+            message += f"Gagal dibaca: {result.get('error', 0)}\n"
+            message += f"Mahasiswa diperbarui: {result.get('students', 0)}"
+            
+            QMessageBox.information(
+                self,
+                "Train Berhasil",
+                message,
+                QMessageBox.Ok
+            )
+        else:
+            QMessageBox.critical(
+                self,
+                "Train Gagal",
+                f"Error: {result.get('message', 'Terjadi kesalahan yang tidak diketahui.')}",
+                QMessageBox.Ok
+            )
     
     def _on_mulai_kelas_clicked(self):
         """
@@ -467,6 +648,95 @@ class DashboardScreen(QWidget):
         )
 
 
+class SyncWorker(QThread):
+    """
+    Worker untuk menjalankan sinkronisasi absensi di luar thread GUI
+    """
+    # Signal progress: berhasil, gagal, total, perkiraan sisa waktu (detik)
+    progress = pyqtSignal(int, int, int, float)
+    # Signal ketika sinkronisasi selesai: status dan ringkasan hasil
+    sync_finished = pyqtSignal(bool, dict)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cancel_event = threading.Event()
+        self._started_at = 0.0
+    
+    def cancel(self):
+        """Meminta sinkronisasi berhenti setelah chunk yang sedang berjalan"""
+        self._cancel_event.set()
+    
+    def run(self):
+        """Menjalankan sinkronisasi dengan koneksi database milik thread ini"""
+        self._started_at = time.perf_counter()
+        
+        db_manager = DatabaseManager()
+        try:
+            db_manager.connect()
+            status, result = db_manager.sync_db_to_server(
+                progress_callback=self._report_progress,
+                cancel_event=self._cancel_event
+            )
+        except Exception as e:
+            status, result = False, {"message": str(e)}
+        finally:
+            db_manager.close()
+            # Koneksi milik thread worker ini tidak dipakai lagi
+            connection_provider.close_thread_connections()
+        
+        self.sync_finished.emit(status, result)
+    
+    def _report_progress(self, done, failed, total):
+        """
+        Menghitung perkiraan sisa waktu dan mengirim signal progress.
+        
+        Args:
+            done (int): Jumlah data yang berhasil dikirim
+            failed (int): Jumlah data yang gagal dikirim
+            total (int): Jumlah seluruh data pending
+        """
+        processed = done + failed
+        elapsed = time.perf_counter() - self._started_at
+        eta = elapsed / processed * (total - processed) if processed else 0.0
+        self.progress.emit(done, failed, total, eta)
+
+
+class TrainWorker(QThread):
+    """
+    Worker untuk menjalankan enrollment wajah di luar thread GUI.
+    Pemrosesan foto sendiri berjalan di process pool milik enroll().
+    """
+    # Signal progress: foto diproses, jumlah foto baru
+    progress = pyqtSignal(int, int)
+    # Signal ketika enrollment selesai: status dan ringkasan hasil
+    train_finished = pyqtSignal(bool, dict)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cancel_event = threading.Event()
+    
+    def cancel(self):
+        """Meminta enrollment berhenti; foto yang sudah diproses tetap disimpan"""
+        self._cancel_event.set()
+    
+    def run(self):
+        """Menjalankan enrollment dengan koneksi database milik thread ini"""
+        try:
+            # enrollment memuat OpenCV dan NumPy, diimpor saat Train pertama kali dipakai
+            from enrollment import enroll
+            status, result = enroll(
+                progress_callback=self.progress.emit,
+                cancel_event=self._cancel_event
+            )
+        except Exception as e:
+            status, result = False, {"message": str(e)}
+        finally:
+            # Koneksi milik thread worker ini tidak dipakai lagi
+            connection_provider.close_thread_connections()
+        
+        self.train_finished.emit(status, result)
+
+
 class LoginDialog(QDialog):
     """
     Dialog popup untuk login dosen
@@ -660,10 +930,9 @@ class LoginDialog(QDialog):
             self.id_input.setFocus()
             return
         
-        # Koneksi database
+        # Koneksi database (skema sudah disiapkan saat aplikasi dimulai)
         db_manager = DatabaseManager()
         db_manager.connect()
-        db_manager.create_tables_if_not_exist()
         
         # Cek login
         status, result = db_manager.login(dosen_id, password)
@@ -700,10 +969,9 @@ class SelectClassDialog(QDialog):
         # Data kelas dan pertemuan yang dipilih
         self.selected_class_info = None
         
-        # Inisialisasi database manager
+        # Inisialisasi database manager (skema sudah disiapkan saat aplikasi dimulai)
         self.db_manager = DatabaseManager()
         self.db_manager.connect()
-        self.db_manager.create_tables_if_not_exist()
         
         # Load data kelas dari database
         self.class_data = self._load_class_data()
@@ -936,24 +1204,8 @@ class SelectClassDialog(QDialog):
             list: List berisi dict data kelas
         """
         try:
-            # Jalankan query untuk mendapatkan kelas yang diajar oleh dosen ini
-            self.db_manager.cursor.execute("""
-                SELECT kodeKelas, namaKelas, pinKelas, jumlahPertemuan
-                FROM kelas
-                WHERE dosenUtamaId = ? OR dosenPendampingId = ?
-                ORDER BY namaKelas
-            """, (self.user_data['id'], self.user_data['id']))
-            
-            columns = ['kodeKelas', 'namaKelas', 'pinKelas', 'jumlahPertemuan']
-            result = self.db_manager.cursor.fetchall()
-            
-            # Konversi hasil query ke list dict
-            class_data = []
-            for row in result:
-                class_dict = {columns[i]: row[i] for i in range(len(columns))}
-                class_data.append(class_dict)
-            
-            return class_data
+            # Ambil kelas yang diajar oleh dosen ini
+            return self.db_manager.get_kelas_dosen(self.user_data['id'])
             
         except Exception as e:
             print(f"Error saat mengambil data kelas: {e}")
@@ -1019,8 +1271,8 @@ class SelectClassDialog(QDialog):
         kode_kelas = self.kelas_combo.itemData(kelas_index)
         nomor_pertemuan = self.pertemuan_combo.itemData(pertemuan_index)
         
-        # Validasi pin kelas dan data lainnya menggunakan db_manager
-        status, result = self.db_manager.pilih_kelas(
+        # Validasi pin kelas dan ambil info kelas dalam satu panggilan db_manager
+        status, result = self.db_manager.pilih_kelas_lengkap(
             self.user_data['id'],
             kode_kelas,
             pin_kelas,
@@ -1028,24 +1280,18 @@ class SelectClassDialog(QDialog):
         )
         
         if status:
-            # Ambil info kelas lengkap untuk ditampilkan
-            kelas_status, kelas_info = self.db_manager.get_kelas_info(kode_kelas)
-            
-            if kelas_status:
-                # Susun informasi kelas dan pertemuan
-                self.selected_class_info = {
-                    'kode_kelas': kode_kelas,
-                    'nama_kelas': kelas_info.get('nama_kelas', ''),
-                    'nomor_pertemuan': nomor_pertemuan,
-                    'dosen': {
-                        'id': self.user_data['id'],
-                        'nama': self.user_data['nama']
-                    }
+            # Susun informasi kelas dan pertemuan
+            self.selected_class_info = {
+                'kode_kelas': kode_kelas,
+                'nama_kelas': result.get('nama_kelas', ''),
+                'nomor_pertemuan': nomor_pertemuan,
+                'dosen': {
+                    'id': self.user_data['id'],
+                    'nama': self.user_data['nama']
                 }
-                
-                self.accept()  # Tutup dialog dengan status Accepted
-            else:
-                self.status_label.setText(f"Error: {kelas_info.get('message', 'Terjadi kesalahan')}")
+            }
+            
+            self.accept()  # Tutup dialog dengan status Accepted
         else:
             self.status_label.setText(result.get('message', 'Terjadi kesalahan'))
     
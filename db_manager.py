@@ -7,13 +7,27 @@ Modul ini dapat digunakan sebagai library atau dijalankan langsung untuk penguji
 """
 
 import os
+import re
 import sys
+import argparse
 import sqlite3
-import requests
 import json
+import codecs
+import hashlib
+import hmac
 import logging
 import datetime
-from typing import Dict, List, Any, Optional, Tuple
+import tempfile
+import tracemalloc
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple
+
+if TYPE_CHECKING:
+    import requests
 
 
 # Konfigurasi logging
@@ -24,330 +38,1710 @@ logging.basicConfig(
 logger = logging.getLogger('db-manager')
 
 
+def _requests():
+    """
+    Mengimpor requests saat HTTP pertama kali dipakai agar startup aplikasi tetap
+    ringan. Impor berikutnya hanya membaca sys.modules.
+    """
+    import requests
+    return requests
+
+# Alamat dasar API server
+DEFAULT_API_BASE_URL = "https://www.face.my.id/api"
+
+# Kolom tabel master data, kolom pertama adalah primary key
+MASTER_TABLE_COLUMNS = {
+    "dosen": ["id", "nama", "nip", "email", "password"],
+    "mahasiswa": ["id", "nama", "email"],
+    "kelas": ["id", "kodeKelas", "namaKelas", "pinKelas", "dosenUtamaId",
+              "dosenPendampingId", "jumlahPertemuan", "deskripsi"],
+}
+
+# Urutan penulisan data master sesuai dependensi (kelas mereferensikan dosen)
+MASTER_REFRESH_ORDER = ["dosen", "kelas", "mahasiswa"]
+
+# Jumlah maksimal nilai dalam satu klausa IN (...)
+SQL_IN_CHUNK_SIZE = 500
+
+# Ukuran potongan data yang dibaca dari response streaming (byte)
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Jumlah prepared statement yang di-cache per koneksi SQLite
+SQL_STATEMENT_CACHE_SIZE = 256
+
+# Jeda antar flush antrian absensi write-behind (detik)
+ATTENDANCE_FLUSH_INTERVAL = 0.3
+
+# Percobaan flush terakhir saat antrian absensi dihentikan, dan jeda antar percobaan (detik)
+ATTENDANCE_FINAL_FLUSH_RETRIES = 3
+ATTENDANCE_FINAL_FLUSH_DELAY = 0.5
+
+# Umur maksimal cache dosen/kelas (detik). Refresh dari proses lain (cron)
+# tidak membatalkan cache proses ini, jadi cache dimuat ulang setelah TTL habis
+MASTER_CACHE_TTL = 300.0
+
+# Biaya hash password dosen (iterasi PBKDF2-HMAC-SHA256), bisa diganti lewat
+# ABSENSI_PASSWORD_ITERATIONS. Jumlah iterasi ikut disimpan di setiap hash,
+# jadi hash lama tetap bisa diverifikasi setelah biayanya diubah
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("ABSENSI_PASSWORD_ITERATIONS", "200000"))
+PASSWORD_HASH_SCHEME = "pbkdf2_sha256"
+PASSWORD_SALT_BYTES = 16
+
+# Panjang kunci HMAC (byte) untuk sidik baris dosen di tabel row_hash. Kunci disimpan
+# di file <database>.key di luar database agar salinan local.db saja tidak cukup
+# untuk menebak password dari sidik barisnya
+ROW_HASH_KEY_BYTES = 32
+
+# Umur sesi login yang sudah terverifikasi (detik). Login ulang di kiosk dalam
+# rentang ini tidak menghitung ulang hash password; 0 mematikan cache sesi
+LOGIN_SESSION_TTL = float(os.environ.get("ABSENSI_LOGIN_SESSION_TTL", "300"))
+
+# Profil penyimpanan SQLite yang diterapkan saat koneksi dibuat
+#   safe     : bawaan SQLite (rollback journal, fsync penuh setiap commit)
+#   balanced : WAL + synchronous=NORMAL, aman dari korupsi saat listrik padam
+#   fast     : tanpa fsync, hanya untuk pengujian atau perangkat dengan UPS
+STORAGE_PROFILES = {
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -2000,       # KiB (nilai negatif = ukuran dalam KiB)
+        "busy_timeout": 5000,      # ms
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -8000,
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -32000,
+        "busy_timeout": 5000,
+    },
+}
+
+# Profil bawaan, bisa diganti lewat environment variable ABSENSI_STORAGE_PROFILE
+DEFAULT_STORAGE_PROFILE = os.environ.get("ABSENSI_STORAGE_PROFILE", "balanced")
+
+# Query yang sering dipanggil, teks SQL yang sama membuat statement di-cache ulang
+SQL_LOGIN = "SELECT id, nama, password FROM dosen WHERE id = ?"
+SQL_INSERT_ABSENSI = """
+INSERT INTO absensi (mahasiswaId, noPertemuan, kodeKelas, statusSync, jamAbsen)
+VALUES (?, ?, ?, ?, ?)
+"""
+SQL_INSERT_ABSENSI_ANTRIAN = """
+INSERT OR IGNORE INTO absensi (mahasiswaId, noPertemuan, kodeKelas, statusSync, jamAbsen)
+VALUES (?, ?, ?, ?, ?)
+"""
+SQL_ABSENSI_DUPLIKAT = """
+SELECT id
+FROM absensi
+WHERE mahasiswaId = ? AND noPertemuan = ? AND kodeKelas = ?
+"""
+SQL_ABSENSI_PENDING = """
+SELECT id, mahasiswaId, noPertemuan, kodeKelas
+FROM absensi
+WHERE statusSync = 'pending'
+"""
+SQL_KELAS_PILIH = """
+SELECT id, dosenUtamaId, dosenPendampingId, pinKelas, jumlahPertemuan
+FROM kelas
+WHERE kodeKelas = ?
+"""
+SQL_KELAS_JUMLAH_PERTEMUAN = """
+SELECT jumlahPertemuan
+FROM kelas
+WHERE kodeKelas = ?
+"""
+SQL_KELAS_INFO = """
+SELECT
+    k.namaKelas,
+    k.deskripsi,
+    k.dosenUtamaId,
+    k.dosenPendampingId,
+    d1.nama as nama_dosen_utama,
+    d2.nama as nama_dosen_pendamping
+FROM kelas k
+LEFT JOIN dosen d1 ON k.dosenUtamaId = d1.id
+LEFT JOIN dosen d2 ON k.dosenPendampingId = d2.id
+WHERE k.kodeKelas = ?
+"""
+SQL_DOSEN_CACHE = "SELECT id, nama, password FROM dosen"
+SQL_KELAS_CACHE = """
+SELECT id, kodeKelas, namaKelas, pinKelas, dosenUtamaId, dosenPendampingId, jumlahPertemuan, deskripsi
+FROM kelas
+ORDER BY rowid
+"""
+SQL_KELAS_DOSEN = """
+SELECT kodeKelas, namaKelas, pinKelas, jumlahPertemuan
+FROM kelas
+WHERE dosenUtamaId = ? OR dosenPendampingId = ?
+ORDER BY namaKelas
+"""
+
+SQL_MAHASISWA_HADIR = """
+SELECT mahasiswaId FROM absensi WHERE kodeKelas = ? AND noPertemuan = ?
+"""
+
+# Migrasi skema berurutan: (versi PRAGMA user_version, nama, method DatabaseManager).
+# Migrasi baru selalu ditambahkan di akhir dengan versi berikutnya.
+MIGRATIONS = [
+    (1, "tabel dasar", "_migrate_tabel_dasar"),
+    (2, "metadata refresh inkremental", "_migrate_metadata_refresh"),
+    (3, "indeks absensi dan kelas", "_migrate_indeks"),
+    (4, "catatan enrollment wajah", "_migrate_enrollment"),
+    (5, "indeks absensi per kelas", "_migrate_indeks_absensi_kelas"),
+    (6, "hash password dosen", "_migrate_hash_password"),
+]
+
+# Indeks yang wajib dipakai oleh setiap query pada jalur utama aplikasi
+QUERY_PLAN_CHECKS = [
+    ("cek duplikat absensi", SQL_ABSENSI_DUPLIKAT, (1, 1, "X"), ["idx_absensi_unik"]),
+    ("absensi pending", SQL_ABSENSI_PENDING, (), ["idx_absensi_pending"]),
+    ("pilih kelas", SQL_KELAS_PILIH, ("X",), ["idx_kelas_kode"]),
+    ("jumlah pertemuan kelas", SQL_KELAS_JUMLAH_PERTEMUAN, ("X",), ["idx_kelas_kode"]),
+    ("info kelas", SQL_KELAS_INFO, ("X",), ["idx_kelas_kode"]),
+    ("kelas per dosen", SQL_KELAS_DOSEN, (1, 1), ["idx_kelas_dosen_utama", "idx_kelas_dosen_pendamping"]),
+    ("mahasiswa hadir", SQL_MAHASISWA_HADIR, ("X", 1), ["idx_absensi_kelas"]),
+]
+
+
+_ARRAY_KEY_PATTERN = re.compile(r'"(?:data|results)"\s*:\s*\[')
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Mem-parsing array JSON secara bertahap dari potongan byte response.
+    Mendukung array di level teratas maupun di dalam key "data"/"results".
+    Object tanpa kedua key tersebut menghasilkan object itu sendiri sebagai satu
+    item. Setelah array ditemukan, hanya satu elemen dan sisa buffer yang
+    disimpan di memori.
+    
+    Args:
+        chunks: Potongan byte, contoh response.iter_content()
+        
+    Yields:
+        Setiap elemen array yang sudah di-parse
+        
+    Raises:
+        ValueError: Jika JSON tidak valid atau array data tidak ditemukan
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    in_object = False
+    searched = 0
+    in_array = False
+    finished = False
+    
+    def read_more() -> bool:
+        nonlocal buffer, pos
+        for chunk in chunk_iter:
+            text = text_decoder.decode(chunk)
+            if text:
+                buffer = buffer[pos:] + text
+                pos = 0
+                return True
+        return False
+    
+    chunk_iter = iter(chunks)
+    
+    while not finished:
+        if not in_array:
+            # Cari awal array: '[' di level teratas atau setelah key "data"/"results"
+            stripped = buffer.lstrip()
+            if not in_object:
+                if stripped.startswith("["):
+                    pos = len(buffer) - len(stripped) + 1
+                    in_array = True
+                    continue
+                if stripped.startswith("{"):
+                    in_object = True
+                elif stripped:
+                    raise ValueError("Response bukan array JSON")
+            if in_object:
+                # Bagian object sebelum key disimpan utuh; pencarian dilanjutkan dari
+                # sedikit sebelum akhir buffer sebelumnya agar key yang terpotong tetap ditemukan
+                match = _ARRAY_KEY_PATTERN.search(buffer, max(0, searched - 64))
+                if match:
+                    pos = match.end()
+                    in_array = True
+                    continue
+                searched = len(buffer)
+            if not read_more():
+                if in_object:
+                    # Object tanpa key "data"/"results" dianggap satu item, sama seperti _extract_items
+                    data = json.loads(buffer)
+                    if isinstance(data, dict) and "data" not in data and "results" not in data:
+                        yield data
+                        return
+                raise ValueError("Array data tidak ditemukan di response")
+            continue
+        
+        # Lewati spasi dan koma di antara elemen
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buffer):
+            if not read_more():
+                raise ValueError("Response JSON terpotong")
+            continue
+        if buffer[pos] == "]":
+            finished = True
+            continue
+        
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Elemen belum lengkap, baca potongan berikutnya
+            if not read_more():
+                raise
+            continue
+        
+        # Angka di ujung buffer bisa saja masih terpotong
+        if end == len(buffer) and not isinstance(item, (dict, list, str)):
+            if read_more():
+                continue
+        
+        pos = end
+        yield item
+
+
+class ConnectionProvider:
+    """
+    Menyediakan koneksi SQLite yang hidup lama: satu koneksi per thread untuk
+    setiap file database. Koneksi dipakai ulang oleh semua DatabaseManager
+    sehingga file tidak dibuka ulang dan prepared statement tetap ter-cache.
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._schema_ready = set()
+    
+    def get_connection(self, db_name: str, storage_profile: Optional[str] = None) -> sqlite3.Connection:
+        """
+        Mengambil koneksi milik thread saat ini, dibuat jika belum ada.
+        
+        Args:
+            db_name: Nama file database SQLite
+            storage_profile: Nama profil di STORAGE_PROFILES, diterapkan saat koneksi dibuat
+            
+        Returns:
+            Koneksi SQLite untuk thread saat ini
+        """
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        
+        conn = connections.get(db_name)
+        if conn is None:
+            # check_same_thread=False hanya agar close_all bisa dipanggil dari thread utama
+            conn = sqlite3.connect(db_name, check_same_thread=False,
+                                   cached_statements=SQL_STATEMENT_CACHE_SIZE)
+            self._apply_storage_profile(conn, storage_profile or DEFAULT_STORAGE_PROFILE)
+            connections[db_name] = conn
+            with self._lock:
+                self._connections.append(conn)
+            logger.info(f"Berhasil terhubung ke database {db_name}")
+        return conn
+    
+    @staticmethod
+    def _apply_storage_profile(conn: sqlite3.Connection, profile_name: str) -> None:
+        """
+        Menerapkan PRAGMA dari profil penyimpanan ke koneksi.
+        
+        Args:
+            conn: Koneksi SQLite
+            profile_name: Nama profil di STORAGE_PROFILES
+        """
+        profile = STORAGE_PROFILES.get(profile_name)
+        if profile is None:
+            logger.warning(f"Profil penyimpanan '{profile_name}' tidak dikenal, menggunakan 'safe'")
+            profile_name, profile = "safe", STORAGE_PROFILES["safe"]
+        
+        journal_mode = conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']}").fetchone()[0]
+        conn.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+        conn.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+        conn.execute(f"PRAGMA cache_size = {int(profile['cache_size'])}")
+        conn.execute(f"PRAGMA busy_timeout = {int(profile['busy_timeout'])}")
+        logger.debug(f"Profil penyimpanan '{profile_name}' diterapkan (journal_mode={journal_mode})")
+    
+    def is_schema_ready(self, db_name: str) -> bool:
+        """Mengecek apakah skema database sudah disiapkan di proses ini."""
+        return db_name in self._schema_ready
+    
+    def mark_schema_ready(self, db_name: str) -> None:
+        """Menandai skema database sudah disiapkan di proses ini."""
+        self._schema_ready.add(db_name)
+    
+    def close_thread_connections(self) -> None:
+        """Menutup semua koneksi milik thread saat ini, dipanggil saat worker selesai."""
+        connections = getattr(self._local, "connections", None) or {}
+        with self._lock:
+            for conn in connections.values():
+                if conn in self._connections:
+                    self._connections.remove(conn)
+                conn.close()
+        connections.clear()
+    
+    def close_all(self) -> None:
+        """Menutup semua koneksi, dipanggil saat aplikasi ditutup."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+        logger.info("Semua koneksi database ditutup")
+
+
+# Provider koneksi bersama untuk seluruh proses
+connection_provider = ConnectionProvider()
+
+
+class MasterDataCache:
+    """
+    Cache read-through untuk tabel dosen dan kelas yang kecil dan jarang berubah.
+    
+    Kedua tabel dimuat utuh sekali per file database, lalu diindeks berdasarkan
+    id dosen, kodeKelas dan dosen pengajar. Snapshot tidak pernah diubah setelah
+    dibuat; invalidate() hanya membuang snapshot sehingga pembaca tidak pernah
+    melihat data setengah diperbarui. Counter generasi mencegah snapshot yang
+    dimuat sebelum invalidate() tersimpan kembali.
+    """
+    
+    def __init__(self, ttl: float = MASTER_CACHE_TTL):
+        """
+        Args:
+            ttl: Umur maksimal snapshot dalam detik
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._generations = {}
+        self._stats = {"hits": 0, "misses": 0, "loads": 0, "invalidations": 0}
+    
+    def get(self, db_manager: "DatabaseManager") -> Dict[str, Any]:
+        """
+        Mengambil snapshot dosen/kelas, dimuat dari database jika belum ada atau kedaluwarsa.
+        
+        Args:
+            db_manager: DatabaseManager yang sudah terhubung, dipakai untuk memuat snapshot
+            
+        Returns:
+            Dictionary berisi "dosen" (per id), "kelas" (per kodeKelas) dan
+            "kelas_dosen" (list kelas per id dosen pengajar, terurut namaKelas)
+        """
+        db_name = db_manager.db_name
+        with self._lock:
+            snapshot = self._snapshots.get(db_name)
+            if snapshot is not None and time.monotonic() - snapshot["loaded_at"] < self.ttl:
+                self._stats["hits"] += 1
+                return snapshot
+            self._stats["misses"] += 1
+            generation = self._generations.get(db_name, 0)
+        
+        snapshot = self._load(db_manager)
+        with self._lock:
+            self._stats["loads"] += 1
+            # Jangan simpan snapshot jika data berubah selama dimuat
+            if self._generations.get(db_name, 0) == generation:
+                self._snapshots[db_name] = snapshot
+        return snapshot
+    
+    def _load(self, db_manager: "DatabaseManager") -> Dict[str, Any]:
+        """Membaca tabel dosen dan kelas lalu membangun indeksnya."""
+        db_manager.cursor.execute(SQL_DOSEN_CACHE)
+        dosen = {row[0]: {"id": row[0], "nama": row[1], "password": row[2]}
+                 for row in db_manager.cursor.fetchall()}
+        
+        db_manager.cursor.execute(SQL_KELAS_CACHE)
+        columns = MASTER_TABLE_COLUMNS["kelas"]
+        kelas = {}
+        kelas_dosen = {}
+        for row in db_manager.cursor.fetchall():
+            item = dict(zip(columns, row))
+            # kodeKelas ganda: baris pertama yang dipakai, sama seperti fetchone()
+            kelas.setdefault(item["kodeKelas"], item)
+            for dosen_id in {item["dosenUtamaId"], item["dosenPendampingId"]} - {None}:
+                kelas_dosen.setdefault(dosen_id, []).append(item)
+        for items in kelas_dosen.values():
+            items.sort(key=lambda item: item["namaKelas"] or "")
+        
+        return {"dosen": dosen, "kelas": kelas, "kelas_dosen": kelas_dosen, "loaded_at": time.monotonic()}
+    
+    def invalidate(self, db_name: Optional[str] = None) -> None:
+        """
+        Membuang snapshot setelah data dosen/kelas ditulis.
+        
+        Args:
+            db_name: File database yang berubah, None untuk semua
+        """
+        with self._lock:
+            names = [db_name] if db_name else list(self._snapshots)
+            for name in names:
+                self._snapshots.pop(name, None)
+                self._generations[name] = self._generations.get(name, 0) + 1
+            self._stats["invalidations"] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counter hit, miss, load dan invalidasi cache."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._snapshots)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+# Cache dosen/kelas bersama untuk seluruh proses
+master_data_cache = MasterDataCache()
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    """
+    Membuat hash password dengan PBKDF2-HMAC-SHA256 dan salt acak.
+    
+    Args:
+        password: Password plaintext
+        iterations: Jumlah iterasi, default PASSWORD_HASH_ITERATIONS
+        
+    Returns:
+        String "pbkdf2_sha256$<iterasi>$<salt hex>$<hash hex>"
+    """
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
+    salt = os.urandom(PASSWORD_SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{PASSWORD_HASH_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def is_password_hash(value: Optional[str]) -> bool:
+    """Memeriksa apakah nilai kolom password sudah berupa hash dari hash_password()."""
+    return bool(value) and value.startswith(PASSWORD_HASH_SCHEME + "$")
+
+
+def verify_password(password: str, stored: Optional[str]) -> bool:
+    """
+    Memverifikasi password terhadap nilai tersimpan dengan perbandingan waktu konstan.
+    
+    Args:
+        password: Password yang dimasukkan
+        stored: Nilai kolom password (hash dari hash_password())
+        
+    Returns:
+        True jika password cocok
+    """
+    if not stored:
+        return False
+    if not is_password_hash(stored):
+        # Baris lama yang belum dimigrasi masih berisi plaintext
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    try:
+        _, iterations, salt, expected = stored.split("$")
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt), int(iterations))
+        return hmac.compare_digest(digest, bytes.fromhex(expected))
+    except ValueError:
+        logger.warning("Format hash password tidak dikenali")
+        return False
+
+
+class LoginSessionCache:
+    """
+    Cache sesi login dosen yang sudah terverifikasi.
+    
+    Setelah login berhasil, yang disimpan hanya HMAC password dengan kunci acak
+    milik proses (bukan password-nya) beserta hash password di database saat itu.
+    Login ulang dalam TTL cukup membandingkan HMAC tanpa menghitung ulang PBKDF2.
+    Sesi otomatis tidak berlaku jika hash password di database berubah.
+    """
+    
+    def __init__(self, ttl: float = LOGIN_SESSION_TTL):
+        """
+        Args:
+            ttl: Umur sesi dalam detik, 0 mematikan cache
+        """
+        self.ttl = ttl
+        self._key = os.urandom(32)
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._stats = {"hits": 0, "misses": 0}
+    
+    def _proof(self, password: str) -> bytes:
+        """HMAC password dengan kunci proses."""
+        return hmac.new(self._key, password.encode("utf-8"), hashlib.sha256).digest()
+    
+    def check(self, db_name: str, dosen_id: int, stored_hash: str, password: str) -> bool:
+        """
+        Memeriksa apakah password cocok dengan sesi terverifikasi yang masih berlaku.
+        
+        Args:
+            db_name: File database
+            dosen_id: ID dosen
+            stored_hash: Hash password dosen di database saat ini
+            password: Password yang dimasukkan
+            
+        Returns:
+            True jika sesi berlaku dan password sama dengan saat sesi dibuat
+        """
+        proof = self._proof(password)
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get((db_name, dosen_id))
+            valid = (session is not None and session["expires_at"] > now
+                     and session["stored_hash"] == stored_hash
+                     and hmac.compare_digest(session["proof"], proof))
+            self._stats["hits" if valid else "misses"] += 1
+        return valid
+    
+    def remember(self, db_name: str, dosen_id: int, stored_hash: str, password: str) -> None:
+        """
+        Menyimpan sesi setelah password terverifikasi.
+        
+        Args:
+            db_name: File database
+            dosen_id: ID dosen
+            stored_hash: Hash password dosen di database
+            password: Password yang baru saja terverifikasi
+        """
+        if self.ttl <= 0:
+            return
+        proof = self._proof(password)
+        now = time.monotonic()
+        with self._lock:
+            # Sesi kedaluwarsa dibuang agar cache tidak tumbuh tanpa batas
+            for key in [key for key, session in self._sessions.items() if session["expires_at"] <= now]:
+                del self._sessions[key]
+            self._sessions[(db_name, dosen_id)] = {"proof": proof, "stored_hash": stored_hash,
+                                                   "expires_at": now + self.ttl}
+    
+    def clear(self) -> None:
+        """Menghapus semua sesi, misalnya saat logout kiosk."""
+        with self._lock:
+            self._sessions.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counter hit dan miss serta jumlah sesi tersimpan."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._sessions)
+        checks = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / checks, 3) if checks else 0.0
+        return stats
+
+
+# Cache sesi login bersama untuk seluruh proses
+login_session_cache = LoginSessionCache()
+
+
 class DatabaseManager:
     """Class untuk mengelola database dosen dan kelas."""
 
-    def __init__(self, db_name: str = "local"):
+    def __init__(self, db_name: str = "local", api_base_url: str = DEFAULT_API_BASE_URL,
+                 storage_profile: Optional[str] = None):
         """
         Inisialisasi database manager.
         
         Args:
             db_name: Nama file database SQLite, default "local"
+            api_base_url: Alamat dasar API, bisa diarahkan ke server lokal untuk pengujian
+            storage_profile: Profil penyimpanan di STORAGE_PROFILES, default DEFAULT_STORAGE_PROFILE
         """
         self.db_name = f"{db_name}.db"
+        self.storage_profile = storage_profile
         self.conn = None
         self.cursor = None
-        self.api_url_getdosen = "https://www.face.my.id/api/getdosen"
-        self.api_url_getkelas = "https://www.face.my.id/api/getclasses"
-        self.api_url_getmahasiswa = "https://www.face.my.id/api/getmahasiswa"
-        self.api_url_updateabsensi = "https://www.face.my.id/api/updateabsensi"
+        api_base_url = api_base_url.rstrip("/")
+        self.api_url_getdosen = f"{api_base_url}/getdosen"
+        self.api_url_getkelas = f"{api_base_url}/getclasses"
+        self.api_url_getmahasiswa = f"{api_base_url}/getmahasiswa"
+        self.api_url_updateabsensi = f"{api_base_url}/updateabsensi"
+        
+        # Pengaturan sinkronisasi: ukuran chunk dan jumlah request paralel
+        self.sync_chunk_size = 50
+        self.sync_max_workers = 4
+        
+        self.http_session = None
+        self.http_pool_size = 0
+        
+        # Jumlah baris per batch saat ingest data secara streaming
+        self.stream_batch_size = 1000
 
     def connect(self) -> None:
-        """Membuat koneksi ke database."""
+        """Mengambil koneksi database milik thread ini dari connection_provider."""
         try:
-            self.conn = sqlite3.connect(self.db_name)
+            self.conn = connection_provider.get_connection(self.db_name, self.storage_profile)
             self.cursor = self.conn.cursor()
-            logger.info(f"Berhasil terhubung ke database {self.db_name}")
         except sqlite3.Error as e:
             logger.error(f"Error saat menghubungkan ke database: {e}")
             sys.exit(1)
 
     def close(self) -> None:
-        """Menutup koneksi database."""
+        """
+        Melepas koneksi database dan menutup session HTTP.
+        Koneksi SQLite tetap terbuka di connection_provider untuk dipakai ulang.
+        """
         if self.conn:
-            self.conn.close()
-            logger.info("Koneksi database ditutup")
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            self.cursor.close()
+            self.conn = None
+            self.cursor = None
+        if self.http_session:
+            self.http_session.close()
+            self.http_session = None
+
+    def get_http_session(self, pool_size: int = 4) -> "requests.Session":
+        """
+        Mengambil session HTTP dengan connection pool keep-alive.
+        Session dibuat sekali dan dipakai ulang sehingga handshake TCP/TLS
+        tidak diulang untuk setiap request.
+        
+        Args:
+            pool_size: Jumlah minimal koneksi yang disimpan di pool
+        
+        Returns:
+            Session requests yang siap dipakai
+        """
+        requests = _requests()
+        
+        if self.http_session is None or self.http_pool_size < pool_size:
+            if self.http_session:
+                self.http_session.close()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self.http_session = session
+            self.http_pool_size = pool_size
+        return self.http_session
 
     def create_tables_if_not_exist(self) -> None:
-        """Membuat tabel dosen, kelas, mahasiswa, dan absensi jika belum ada."""
+        """
+        Menyiapkan skema database dengan menjalankan migrasi yang belum diterapkan.
+        Hanya dijalankan sekali per file database dalam satu proses.
+        """
+        if connection_provider.is_schema_ready(self.db_name):
+            return
+        
         try:
-            # Tabel dosen
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS dosen (
-                id INTEGER PRIMARY KEY,
-                nama TEXT,
-                nip TEXT,
-                email TEXT,
-                password TEXT
-            )
-            ''')
-            
-            # Tabel mahasiswa
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS mahasiswa (
-                id INTEGER PRIMARY KEY,
-                nama TEXT,
-                email TEXT
-            )
-            ''')
-            
-            # Tabel kelas dengan foreign key dan id sebagai TEXT
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS kelas (
-                id TEXT PRIMARY KEY,
-                kodeKelas TEXT,
-                namaKelas TEXT,
-                pinKelas TEXT,
-                dosenUtamaId INTEGER,
-                dosenPendampingId INTEGER,
-                jumlahPertemuan INTEGER,
-                deskripsi TEXT,
-                FOREIGN KEY (dosenUtamaId) REFERENCES dosen(id),
-                FOREIGN KEY (dosenPendampingId) REFERENCES dosen(id)
-            )
-            ''')
-            
-            # Tabel absensi
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS absensi (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                mahasiswaId INTEGER NOT NULL,
-                noPertemuan INTEGER NOT NULL,
-                kodeKelas TEXT NOT NULL,
-                statusSync TEXT DEFAULT 'pending',
-                jamAbsen TEXT NOT NULL,
-                FOREIGN KEY (mahasiswaId) REFERENCES mahasiswa(id),
-                FOREIGN KEY (kodeKelas) REFERENCES kelas(kodeKelas)
-            )
-            ''')
-            
-            self.conn.commit()
-            logger.info("Tabel dosen, kelas, mahasiswa, dan absensi siap digunakan")
+            self.run_migrations()
+            connection_provider.mark_schema_ready(self.db_name)
         except sqlite3.Error as e:
             logger.error(f"Error saat membuat tabel: {e}")
+
+    def run_migrations(self) -> List[Dict[str, Any]]:
+        """
+        Menjalankan migrasi skema secara berurutan berdasarkan PRAGMA user_version.
+        
+        Setiap migrasi berjalan dalam transaksinya sendiri bersama pembaruan
+        user_version, lalu dicatat di tabel schema_migrations beserta durasinya.
+        Jika skema sudah terbaru, hanya satu PRAGMA yang dibaca.
+        
+        Returns:
+            List migrasi yang diterapkan (versi, nama, durasi_ms)
+            
+        Raises:
+            sqlite3.Error: Jika migrasi gagal (perubahan migrasi tersebut dibatalkan)
+        """
+        self.cursor.execute("PRAGMA user_version")
+        current_version = self.cursor.fetchone()[0]
+        latest_version = MIGRATIONS[-1][0]
+        
+        if current_version >= latest_version:
+            if current_version > latest_version:
+                logger.warning(f"Versi skema database ({current_version}) lebih baru dari aplikasi ({latest_version})")
+            logger.debug(f"Skema database sudah terbaru (versi {current_version})")
+            return []
+        
+        applied = []
+        for version, name, method_name in MIGRATIONS:
+            if version <= current_version:
+                continue
+            
+            started = time.perf_counter()
+            try:
+                self.cursor.execute("BEGIN")
+                getattr(self, method_name)()
+                self.cursor.execute(f"PRAGMA user_version = {version}")
+                duration_ms = round((time.perf_counter() - started) * 1000, 2)
+                self.cursor.execute('''
+                INSERT OR REPLACE INTO schema_migrations (versi, nama, appliedAt, durasiMs)
+                VALUES (?, ?, ?, ?)
+                ''', (version, name, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), duration_ms))
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                logger.error(f"Migrasi {version} ({name}) gagal: {e}")
+                raise
+            
+            applied.append({"versi": version, "nama": name, "durasi_ms": duration_ms})
+            logger.info(f"Migrasi {version} ({name}) selesai dalam {duration_ms} ms")
+        
+        logger.info(f"Skema database diperbarui dari versi {current_version} ke {latest_version}")
+        return applied
+
+    def _migrate_tabel_dasar(self) -> None:
+        """Migrasi 1: tabel dosen, mahasiswa, kelas, absensi dan catatan migrasi."""
+        # Tabel dosen
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dosen (
+            id INTEGER PRIMARY KEY,
+            nama TEXT,
+            nip TEXT,
+            email TEXT,
+            password TEXT
+        )
+        ''')
+        
+        # Tabel mahasiswa
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mahasiswa (
+            id INTEGER PRIMARY KEY,
+            nama TEXT,
+            email TEXT
+        )
+        ''')
+        
+        # Tabel kelas dengan foreign key dan id sebagai TEXT
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS kelas (
+            id TEXT PRIMARY KEY,
+            kodeKelas TEXT,
+            namaKelas TEXT,
+            pinKelas TEXT,
+            dosenUtamaId INTEGER,
+            dosenPendampingId INTEGER,
+            jumlahPertemuan INTEGER,
+            deskripsi TEXT,
+            FOREIGN KEY (dosenUtamaId) REFERENCES dosen(id),
+            FOREIGN KEY (dosenPendampingId) REFERENCES dosen(id)
+        )
+        ''')
+        
+        # Tabel absensi
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS absensi (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            mahasiswaId INTEGER NOT NULL,
+            noPertemuan INTEGER NOT NULL,
+            kodeKelas TEXT NOT NULL,
+            statusSync TEXT DEFAULT 'pending',
+            jamAbsen TEXT NOT NULL,
+            FOREIGN KEY (mahasiswaId) REFERENCES mahasiswa(id),
+            FOREIGN KEY (kodeKelas) REFERENCES kelas(kodeKelas)
+        )
+        ''')
+        
+        # Tabel catatan migrasi skema
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            versi INTEGER PRIMARY KEY,
+            nama TEXT NOT NULL,
+            appliedAt TEXT NOT NULL,
+            durasiMs REAL NOT NULL
+        )
+        ''')
+
+    def _migrate_metadata_refresh(self) -> None:
+        """Migrasi 2: tabel ETag/Last-Modified dan hash baris untuk refresh inkremental."""
+        # Tabel validator HTTP (ETag/Last-Modified) per endpoint master data
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_meta (
+            endpoint TEXT PRIMARY KEY,
+            etag TEXT,
+            lastModified TEXT,
+            fetchedAt TEXT
+        )
+        ''')
+        
+        # Tabel hash konten per baris master data untuk refresh inkremental
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS row_hash (
+            tableName TEXT NOT NULL,
+            rowId TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            PRIMARY KEY (tableName, rowId)
+        )
+        ''')
+
+    def _migrate_indeks(self) -> None:
+        """
+        Migrasi 3: indeks untuk jalur query absensi dan kelas.
+        
+        Sebelum indeks unik absensi dibuat, absensi ganda (mahasiswa, pertemuan,
+        kelas yang sama) dihapus dan hanya data pertama yang disimpan.
+        """
+        self.cursor.execute('''
+        DELETE FROM absensi
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM absensi
+            GROUP BY mahasiswaId, noPertemuan, kodeKelas
+        )
+        ''')
+        if self.cursor.rowcount > 0:
+            logger.warning(f"Menghapus {self.cursor.rowcount} data absensi ganda sebelum membuat indeks unik")
+        
+        # Satu absensi per mahasiswa per pertemuan per kelas
+        self.cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_absensi_unik
+        ON absensi (mahasiswaId, noPertemuan, kodeKelas)
+        ''')
+        
+        # Indeks parsial, hanya berisi absensi yang belum disinkronkan
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_absensi_pending
+        ON absensi (statusSync)
+        WHERE statusSync = 'pending'
+        ''')
+        
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_kelas_kode ON kelas (kodeKelas)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_kelas_dosen_utama ON kelas (dosenUtamaId)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_kelas_dosen_pendamping ON kelas (dosenPendampingId)")
+
+    def _migrate_enrollment(self) -> None:
+        """
+        Migrasi 4: catatan foto enrollment per hash konten.
+        
+        Setiap foto yang sudah diproses dicatat beserta embedding-nya sehingga
+        enrollment bisa dilanjutkan tanpa memproses ulang foto yang sama.
+        """
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS enrollment_images (
+            hash TEXT PRIMARY KEY,
+            mahasiswaId INTEGER,
+            path TEXT,
+            backend TEXT,
+            status TEXT,
+            embedding BLOB,
+            processedAt TEXT
+        )
+        ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_enrollment_mahasiswa ON enrollment_images (mahasiswaId)")
+
+    def _migrate_indeks_absensi_kelas(self) -> None:
+        """Migrasi 5: indeks absensi per kelas dan pertemuan untuk preload sesi kelas."""
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_absensi_kelas
+        ON absensi (kodeKelas, noPertemuan, mahasiswaId)
+        ''')
+
+    def _migrate_hash_password(self) -> None:
+        """Migrasi 6: mengganti password dosen plaintext dengan hash PBKDF2."""
+        self.cursor.execute("SELECT id, password FROM dosen")
+        rows = [(hash_password(password), dosen_id) for dosen_id, password in self.cursor.fetchall()
+                if password and not is_password_hash(password)]
+        self.cursor.executemany("UPDATE dosen SET password = ? WHERE id = ?", rows)
+        # Sidik baris dosen lama dihitung dari password plaintext, dibuang agar
+        # dihitung ulang dengan HMAC saat refresh berikutnya
+        self.cursor.execute("DELETE FROM row_hash WHERE tableName = 'dosen'")
+
+    def check_query_plans(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Memeriksa EXPLAIN QUERY PLAN setiap query di QUERY_PLAN_CHECKS.
+        
+        Returns:
+            Dictionary per jalur query berisi rencana eksekusi, indeks yang
+            diharapkan dan status apakah semua indeks tersebut dipakai
+        """
+        results = {}
+        for name, sql, params, expected_indexes in QUERY_PLAN_CHECKS:
+            self.cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = [row[3] for row in self.cursor.fetchall()]
+            plan_text = "\n".join(plan)
+            results[name] = {
+                "plan": plan,
+                "expected": expected_indexes,
+                "ok": all(index in plan_text for index in expected_indexes) and "SCAN" not in plan_text
+            }
+        return results
+
+    def _extract_items(self, data: Any) -> Optional[List[Any]]:
+        """
+        Mengambil list data dari response API.
+        
+        Args:
+            data: Hasil parsing JSON dari API
+            
+        Returns:
+            List data atau None jika format tidak dikenali
+        """
+        if isinstance(data, dict):
+            # Jika response adalah dictionary, coba ambil data dari key yang umum
+            if 'data' in data:
+                data = data['data']
+            elif 'results' in data:
+                data = data['results']
+            else:
+                # Konversi dictionary ke list jika tidak ada key yang umum
+                data = [data]
+        
+        if not isinstance(data, list):
+            logger.error(f"Data dari API tidak dalam format yang diharapkan: {type(data)}")
+            return None
+        return data
+
+    def _master_api_url(self, table: str) -> str:
+        """Mengembalikan URL API untuk tabel master data."""
+        return {
+            "dosen": self.api_url_getdosen,
+            "kelas": self.api_url_getkelas,
+            "mahasiswa": self.api_url_getmahasiswa,
+        }[table]
+
+    def _load_validators(self, table: str) -> Dict[str, str]:
+        """
+        Mengambil ETag/Last-Modified terakhir dari tabel sync_meta.
+        
+        Args:
+            table: Nama tabel master data
+            
+        Returns:
+            Dictionary header request kondisional (bisa kosong)
+        """
+        self.cursor.execute("SELECT etag, lastModified FROM sync_meta WHERE endpoint = ?", (table,))
+        result = self.cursor.fetchone()
+        headers = {}
+        if result:
+            etag, last_modified = result
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _save_validators(self, table: str, validators: Dict[str, Optional[str]]) -> None:
+        """
+        Menyimpan ETag/Last-Modified terbaru ke tabel sync_meta. Tidak melakukan commit.
+        
+        Args:
+            table: Nama tabel master data
+            validators: Dictionary berisi "etag" dan "last_modified" dari response
+        """
+        self.cursor.execute('''
+        INSERT INTO sync_meta (endpoint, etag, lastModified, fetchedAt)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(endpoint) DO UPDATE SET
+            etag = excluded.etag,
+            lastModified = excluded.lastModified,
+            fetchedAt = excluded.fetchedAt
+        ''', (
+            table,
+            validators.get("etag"),
+            validators.get("last_modified"),
+            datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ))
+
+    def fetch_data_from_api(self, api_url: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Mengambil data dari API.
+        
+        URL master data (dosen, kelas, mahasiswa) diambil lewat fetch_master_payload
+        tanpa header kondisional, sehingga selalu mengembalikan data lengkap.
+        
+        Args:
+            api_url: URL API yang akan diakses
+            
+        Returns:
+            List data atau None jika terjadi error
+        """
+        requests = _requests()
+        tables = {
+            self.api_url_getdosen: "dosen",
+            self.api_url_getkelas: "kelas",
+            self.api_url_getmahasiswa: "mahasiswa",
+        }
+        try:
+            if api_url in tables:
+                _, data, _ = self.fetch_master_payload(tables[api_url])
+            else:
+                response = self.get_http_session().get(api_url, timeout=60)
+                response.raise_for_status()
+                data = self._extract_items(response.json())
+                if data is not None:
+                    logger.info(f"Berhasil mengambil {len(data)} data dari {api_url}")
+            if data is None:
+                return None
+                
+            # Pre-process data - pastikan field numeric dikonversi dengan benar
+            # Namun tetap simpan ID kelas sebagai string
+            for item in data:
+                if isinstance(item, dict):
+                    # Konversi ID ke int untuk API dosen dan mahasiswa
+                    if (api_url == self.api_url_getdosen or api_url == self.api_url_getmahasiswa) and 'id' in item and item['id']:
+                        try:
+                            item['id'] = int(item['id'])
+                        except (ValueError, TypeError):
+                            logger.warning(f"Gagal mengkonversi ID '{item['id']}' ke integer")
+                    
+                    # Jika API getkelas, konversi field numerik kecuali ID
+                    if api_url == self.api_url_getkelas:
+                        # Pastikan ID kelas sebagai string
+                        if 'id' in item and item['id'] is not None:
+                            item['id'] = str(item['id'])
+                            
+                        # Konversi dosenUtamaId
+                        if 'dosenUtamaId' in item and item['dosenUtamaId']:
+                            try:
+                                item['dosenUtamaId'] = int(item['dosenUtamaId']) 
+                            except (ValueError, TypeError):
+                                logger.warning(f"Gagal mengkonversi dosenUtamaId '{item['dosenUtamaId']}' ke integer")
+                        
+                        # Konversi dosenPendampingId
+                        if 'dosenPendampingId' in item and item['dosenPendampingId']:
+                            try:
+                                item['dosenPendampingId'] = int(item['dosenPendampingId'])
+                            except (ValueError, TypeError):
+                                logger.warning(f"Gagal mengkonversi dosenPendampingId '{item['dosenPendampingId']}' ke integer")
+                        
+                        # Konversi jumlahPertemuan
+                        if 'jumlahPertemuan' in item and item['jumlahPertemuan']:
+                            try:
+                                item['jumlahPertemuan'] = int(item['jumlahPertemuan'])
+                            except (ValueError, TypeError):
+                                item['jumlahPertemuan'] = 0
+                                logger.warning(f"Gagal mengkonversi jumlahPertemuan, menggunakan default 0")
+                
+            # Tampilkan contoh data untuk debugging
+            if data and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Contoh data pertama setelah konversi: {json.dumps(data[0], indent=2)}")
+            
+            return data
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error saat mengambil data dari API: {e}")
+            return None
+        except json.JSONDecodeError as e:
+            logger.error(f"Error saat parsing response JSON: {e}")
+            return None
+
+    def fetch_master_payload(self, table: str, request_headers: Optional[Dict[str, str]] = None
+                             ) -> Tuple[int, Optional[List[Any]], Dict[str, Optional[str]]]:
+        """
+        Mengambil data master dari API dengan request kondisional.
+        Method ini tidak menyentuh database sehingga aman dipanggil dari thread lain.
+        
+        Args:
+            table: Nama tabel master data ("dosen", "kelas" atau "mahasiswa")
+            request_headers: Header kondisional (If-None-Match / If-Modified-Since)
+            
+        Returns:
+            Tuple berisi status code HTTP, list data (None jika 304 atau error)
+            dan validator baru ("etag", "last_modified")
+        """
+        api_url = self._master_api_url(table)
+        response = self.get_http_session().get(api_url, headers=request_headers or {}, timeout=60)
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+        
+        if response.status_code == 304:
+            logger.info(f"Data {table} tidak berubah sejak refresh terakhir (304)")
+            return 304, None, validators
+        
+        response.raise_for_status()
+        items = self._extract_items(response.json())
+        if items is not None:
+            logger.info(f"Berhasil mengambil {len(items)} data dari {api_url}")
+        return response.status_code, items, validators
+
+    @staticmethod
+    def _row_hash(row: Tuple) -> str:
+        """Menghitung hash konten dari satu baris yang sudah dinormalkan."""
+        encoded = json.dumps(row, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()
+
+    def _select_in(self, sql: str, params: Tuple, values: List[Any]) -> List[Tuple]:
+        """
+        Menjalankan query dengan klausa IN per potongan agar tidak melewati
+        batas jumlah parameter SQLite.
+        
+        Args:
+            sql: Query dengan penanda {placeholders} untuk isi klausa IN
+            params: Parameter sebelum isi klausa IN
+            values: Nilai untuk klausa IN
+            
+        Returns:
+            Gabungan seluruh baris hasil query
+        """
+        results = []
+        for start in range(0, len(values), SQL_IN_CHUNK_SIZE):
+            part = values[start:start + SQL_IN_CHUNK_SIZE]
+            self.cursor.execute(sql.format(placeholders=", ".join("?" for _ in part)), params + tuple(part))
+            results.extend(self.cursor.fetchall())
+        return results
+
+    def _row_hash_key(self) -> bytes:
+        """
+        Membaca kunci HMAC sidik baris dosen dari file <database>.key.
+        
+        Kunci baru ditulis dulu ke file sementara (izin 0600) dan di-fsync, lalu
+        dipasang dengan os.link sehingga proses lain tidak pernah membaca file
+        kunci yang baru setengah ditulis. File kunci yang lebih pendek dari
+        ROW_HASH_KEY_BYTES (mis. sisa crash versi lama) dianggap rusak dan diganti;
+        sidik baris dosen lama tidak cocok lagi sehingga baris ditulis ulang sekali.
+        """
+        key_path = f"{self.db_name}.key"
+        try:
+            with open(key_path, "rb") as f:
+                key = f.read()
+            if len(key) >= ROW_HASH_KEY_BYTES:
+                return key
+            logger.warning(f"Kunci sidik baris {key_path} rusak ({len(key)} byte), dibuat ulang")
+        except FileNotFoundError:
+            key = None
+        
+        fd, temp_path = tempfile.mkstemp(prefix=".key-", dir=os.path.dirname(os.path.abspath(key_path)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(os.urandom(ROW_HASH_KEY_BYTES))
+                f.flush()
+                os.fsync(f.fileno())
+            if key is None:
+                try:
+                    os.link(temp_path, key_path)
+                except FileExistsError:
+                    # Proses lain lebih dulu memasang kunci; kunci itu yang dipakai
+                    pass
+            else:
+                os.replace(temp_path, key_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        
+        with open(key_path, "rb") as f:
+            key = f.read()
+        if len(key) < ROW_HASH_KEY_BYTES:
+            raise ValueError(f"Kunci sidik baris {key_path} tidak valid ({len(key)} byte)")
+        return key
+
+    def _fingerprint_rows(self, table: str, rows: List[Tuple]) -> List[Tuple]:
+        """
+        Menyiapkan baris untuk _row_hash. Password dosen diganti HMAC berkunci
+        agar tabel row_hash tidak berisi hash cepat dari password plaintext.
+        
+        Args:
+            table: Nama tabel master data
+            rows: Baris yang sudah dinormalkan
+            
+        Returns:
+            Baris dengan urutan yang sama, siap di-hash
+        """
+        if table != "dosen":
+            return rows
+        key = self._row_hash_key()
+        password_index = MASTER_TABLE_COLUMNS["dosen"].index("password")
+        return [
+            row[:password_index]
+            + (hmac.new(key, row[password_index].encode("utf-8"), hashlib.sha256).hexdigest(),)
+            + row[password_index + 1:]
+            for row in rows
+        ]
+
+    def _filter_changed_rows(self, table: str, rows: List[Tuple]) -> List[Tuple]:
+        """
+        Memilih baris yang hash kontennya berbeda dengan yang tersimpan
+        dan mencatat hash barunya. Tidak melakukan commit.
+        
+        Args:
+            table: Nama tabel master data
+            rows: Baris yang sudah dinormalkan
+            
+        Returns:
+            List baris yang berubah atau baru
+        """
+        stored_hashes = dict(self._select_in(
+            "SELECT rowId, hash FROM row_hash WHERE tableName = ? AND rowId IN ({placeholders})",
+            (table,), [str(row[0]) for row in rows]
+        ))
+        
+        changed_rows = []
+        changed_hashes = []
+        for row, fingerprint_row in zip(rows, self._fingerprint_rows(table, rows)):
+            row_id = str(row[0])
+            row_hash = self._row_hash(fingerprint_row)
+            if stored_hashes.get(row_id) != row_hash:
+                changed_rows.append(row)
+                changed_hashes.append((table, row_id, row_hash))
+        
+        if changed_hashes:
+            self.cursor.executemany('''
+            INSERT INTO row_hash (tableName, rowId, hash)
+            VALUES (?, ?, ?)
+            ON CONFLICT(tableName, rowId) DO UPDATE SET hash = excluded.hash
+            ''', changed_hashes)
+        return changed_rows
+
+    def _apply_master_payload(self, table: str, items: List[Any], incremental: bool = True) -> Dict[str, Any]:
+        """
+        Menulis data master hasil fetch ke database. Pada mode inkremental
+        hanya baris yang hash kontennya berubah yang ditulis. Tidak melakukan commit.
+        
+        Args:
+            table: Nama tabel master data
+            items: List data dari API
+            incremental: Hanya tulis baris yang berubah
+            
+        Returns:
+            Dictionary statistik penulisan
+        """
+        rows, skipped = self._normalize_master_rows(table, items)
+        
+        # Hash selalu dicatat agar refresh inkremental berikutnya tetap akurat
+        changed_rows = self._filter_changed_rows(table, rows)
+        changed_ids = {row[0] for row in changed_rows}
+        if not incremental:
+            changed_rows = rows
+        if table == "dosen":
+            changed_rows = self._hash_dosen_passwords(changed_rows, changed_ids)
+        inserted, updated = self._bulk_upsert(table, changed_rows)
+        return {
+            "fetched": len(items),
+            "unchanged": len(rows) - len(changed_rows),
+            "inserted": inserted,
+            "updated": updated,
+            "skipped": skipped
+        }
+
+    def refresh_master_data(self, table: str, incremental: bool = True) -> Dict[str, Any]:
+        """
+        Memperbarui satu tabel master data dari API.
+        
+        Pada mode inkremental request dikirim dengan ETag/Last-Modified terakhir.
+        Jika server menjawab 304, tidak ada baris yang ditulis. Jika ada data baru,
+        hanya baris yang hash kontennya berubah yang ditulis.
+        
+        Args:
+            table: Nama tabel master data ("dosen", "kelas" atau "mahasiswa")
+            incremental: Gunakan request kondisional dan hash per baris
+            
+        Returns:
+            Dictionary statistik refresh
+        """
+        requests = _requests()
+        stats = {"table": table, "not_modified": False, "fetched": 0, "unchanged": 0,
+                 "inserted": 0, "updated": 0, "skipped": 0, "elapsed_seconds": 0.0}
+        started = time.perf_counter()
+        
+        try:
+            request_headers = self._load_validators(table) if incremental else {}
+            status_code, items, validators = self.fetch_master_payload(table, request_headers)
+            
+            if status_code == 304:
+                stats["not_modified"] = True
+            elif items is None:
+                stats["error"] = "Format data dari API tidak dikenali"
+            else:
+                stats.update(self._apply_master_payload(table, items, incremental))
+                self._save_validators(table, validators)
+                self.conn.commit()
+                self._invalidate_master_cache(table)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error saat mengambil data {table} dari API: {e}")
+            stats["error"] = str(e)
+        except sqlite3.Error as e:
+            logger.error(f"Error saat menyimpan data {table} ke database: {e}")
             self.conn.rollback()
+            stats["error"] = str(e)
+        
+        stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Refresh {table}: diambil {stats['fetched']}, tidak berubah {stats['unchanged']}, "
+                    f"baru {stats['inserted']}, diperbarui {stats['updated']}, "
+                    f"304: {stats['not_modified']} ({stats['elapsed_seconds']} detik)")
+        return stats
+
+    def stream_master_data(self, table: str, batch_size: Optional[int] = None,
+                           incremental: bool = True) -> Dict[str, Any]:
+        """
+        Memperbarui satu tabel master data dengan membaca response secara streaming.
+        
+        Body response tidak pernah disimpan utuh di memori. Elemen di-parse satu per
+        satu dan ditulis per batch berukuran tetap, sehingga pemakaian memori tidak
+        bergantung pada jumlah data. Semua batch ditulis dalam satu transaksi.
+        
+        Args:
+            table: Nama tabel master data ("dosen", "kelas" atau "mahasiswa")
+            batch_size: Jumlah baris per batch, default self.stream_batch_size
+            incremental: Gunakan request kondisional dan hanya tulis baris yang berubah
+            
+        Returns:
+            Dictionary statistik refresh (sama seperti refresh_master_data)
+        """
+        requests = _requests()
+        batch_size = max(1, batch_size or self.stream_batch_size)
+        stats = {"table": table, "not_modified": False, "fetched": 0, "unchanged": 0,
+                 "inserted": 0, "updated": 0, "skipped": 0, "batches": 0, "elapsed_seconds": 0.0}
+        started = time.perf_counter()
+        
+        def write_batch(batch: List[Any]) -> None:
+            batch_stats = self._apply_master_payload(table, batch, incremental)
+            for key in ("fetched", "unchanged", "inserted", "updated", "skipped"):
+                stats[key] += batch_stats[key]
+            stats["batches"] += 1
+        
+        try:
+            request_headers = self._load_validators(table) if incremental else {}
+            api_url = self._master_api_url(table)
+            with self.get_http_session().get(api_url, headers=request_headers, stream=True, timeout=60) as response:
+                if response.status_code == 304:
+                    logger.info(f"Data {table} tidak berubah sejak refresh terakhir (304)")
+                    stats["not_modified"] = True
+                else:
+                    response.raise_for_status()
+                    batch = []
+                    for item in iter_json_array(response.iter_content(STREAM_CHUNK_BYTES)):
+                        batch.append(item)
+                        if len(batch) >= batch_size:
+                            write_batch(batch)
+                            batch = []
+                    if batch:
+                        write_batch(batch)
+                    
+                    self._save_validators(table, {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified")
+                    })
+                    self.conn.commit()
+                    self._invalidate_master_cache(table)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"Error saat mengambil data {table} dari API: {e}")
+            self.conn.rollback()
+            stats["error"] = str(e)
+        except sqlite3.Error as e:
+            logger.error(f"Error saat menyimpan data {table} ke database: {e}")
+            self.conn.rollback()
+            stats["error"] = str(e)
+        
+        stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Refresh streaming {table}: diambil {stats['fetched']} dalam {stats['batches']} batch, "
+                    f"tidak berubah {stats['unchanged']}, baru {stats['inserted']}, "
+                    f"diperbarui {stats['updated']}, 304: {stats['not_modified']} ({stats['elapsed_seconds']} detik)")
+        return stats
+
+    def _timed_fetch(self, table: str, request_headers: Dict[str, str]) -> Tuple[int, Optional[List[Any]], Dict[str, Optional[str]], float]:
+        """
+        Memanggil fetch_master_payload sambil mengukur durasinya.
+        
+        Returns:
+            Tuple hasil fetch_master_payload ditambah durasi (detik)
+        """
+        started = time.perf_counter()
+        status_code, items, validators = self.fetch_master_payload(table, request_headers)
+        return status_code, items, validators, time.perf_counter() - started
 
-    def fetch_data_from_api(self, api_url: str) -> Optional[List[Dict[str, Any]]]:
+    def refresh_all_master_data(self, incremental: bool = True) -> Dict[str, Any]:
         """
-        Mengambil data dari API.
+        Memperbarui semua data master sekaligus.
+        
+        Endpoint dosen, kelas dan mahasiswa diambil paralel melalui satu
+        connection pool, lalu ditulis sesuai urutan dependensi (dosen sebelum
+        kelas) dalam satu transaksi. Jika salah satu fetch gagal, tidak ada
+        data yang ditulis.
         
         Args:
-            api_url: URL API yang akan diakses
+            incremental: Gunakan request kondisional dan hanya tulis baris yang berubah
             
         Returns:
-            List data atau None jika terjadi error
+            Dictionary berisi status, statistik per tabel dan waktu setiap tahap (detik)
         """
+        requests = _requests()
+        started = time.perf_counter()
+        result = {"success": False, "tables": {}, "timings": {}}
+        timings = result["timings"]
+        
         try:
-            response = requests.get(api_url)
-            response.raise_for_status()  # Raise an exception for 4XX/5XX responses
+            request_headers = {
+                table: self._load_validators(table) if incremental else {}
+                for table in MASTER_REFRESH_ORDER
+            }
             
-            raw_data = response.text
-            logger.debug(f"Raw API Response: {raw_data[:200]}...")  # Tampilkan bagian awal response
+            # Tahap 1: ambil semua endpoint secara paralel (tanpa akses database)
+            fetch_started = time.perf_counter()
+            self.get_http_session(len(MASTER_REFRESH_ORDER))
+            fetched = {}
+            errors = {}
+            with ThreadPoolExecutor(max_workers=len(MASTER_REFRESH_ORDER)) as executor:
+                futures = {
+                    table: executor.submit(self._timed_fetch, table, request_headers[table])
+                    for table in MASTER_REFRESH_ORDER
+                }
+                for table, future in futures.items():
+                    try:
+                        fetched[table] = future.result()
+                        timings[f"fetch_{table}"] = round(fetched[table][3], 3)
+                    except (requests.exceptions.RequestException, ValueError) as e:
+                        logger.error(f"Error saat mengambil data {table} dari API: {e}")
+                        errors[table] = str(e)
+            timings["fetch"] = round(time.perf_counter() - fetch_started, 3)
+            
+            for table, (status_code, items, _, _) in fetched.items():
+                if status_code != 304 and items is None:
+                    errors[table] = "Format data dari API tidak dikenali"
+            
+            if errors:
+                result["errors"] = errors
+                result["message"] = f"Refresh dibatalkan, gagal mengambil: {', '.join(errors)}"
+                return result
+            
+            # Tahap 2: tulis ke database sesuai urutan dependensi dalam satu transaksi
+            for table in MASTER_REFRESH_ORDER:
+                status_code, items, validators, _ = fetched[table]
+                stage_started = time.perf_counter()
+                if status_code == 304:
+                    stats = {"not_modified": True, "fetched": 0, "unchanged": 0,
+                             "inserted": 0, "updated": 0, "skipped": 0}
+                else:
+                    stats = self._apply_master_payload(table, items, incremental)
+                    stats["not_modified"] = False
+                    self._save_validators(table, validators)
+                result["tables"][table] = stats
+                timings[f"apply_{table}"] = round(time.perf_counter() - stage_started, 3)
             
-            data = response.json()
+            commit_started = time.perf_counter()
+            self.conn.commit()
+            timings["commit"] = round(time.perf_counter() - commit_started, 3)
+            self._invalidate_master_cache(*MASTER_REFRESH_ORDER)
             
-            # Periksa struktur data
-            if isinstance(data, dict):
-                # Jika response adalah dictionary, coba ambil data dari key yang umum
-                if 'data' in data:
-                    data = data['data']
-                elif 'results' in data:
-                    data = data['results']
-                else:
-                    # Konversi dictionary ke list jika tidak ada key yang umum
-                    data = [data]
+            result["success"] = True
+            result["message"] = "Refresh semua data master selesai"
+        except sqlite3.Error as e:
+            logger.error(f"Error saat menyimpan data master ke database: {e}")
+            self.conn.rollback()
+            result["message"] = f"Error database: {str(e)}"
+        finally:
+            timings["total"] = round(time.perf_counter() - started, 3)
+        
+        for table, stats in result["tables"].items():
+            logger.info(f"Refresh {table}: diambil {stats['fetched']}, tidak berubah {stats['unchanged']}, "
+                        f"baru {stats['inserted']}, diperbarui {stats['updated']}, 304: {stats['not_modified']}")
+        logger.info(f"{result['message']}. Waktu per tahap: {timings}")
+        return result
+
+    def _normalize_master_rows(self, table: str, data: List[Any]) -> Tuple[List[Tuple], int]:
+        """
+        Memvalidasi dan menormalkan data master dari API dalam satu kali jalan.
+        
+        Args:
+            table: Nama tabel tujuan ("dosen", "mahasiswa" atau "kelas")
+            data: List data dari API
             
-            if not isinstance(data, list):
-                logger.error(f"Data dari API tidak dalam format yang diharapkan: {type(data)}")
-                return None
-                
-            # Pre-process data - pastikan field numeric dikonversi dengan benar
-            # Namun tetap simpan ID kelas sebagai string
-            for item in data:
-                if isinstance(item, dict):
-                    # Konversi ID ke int untuk API dosen dan mahasiswa
-                    if (api_url == self.api_url_getdosen or api_url == self.api_url_getmahasiswa) and 'id' in item and item['id']:
-                        try:
-                            item['id'] = int(item['id'])
-                        except (ValueError, TypeError):
-                            logger.warning(f"Gagal mengkonversi ID '{item['id']}' ke integer")
-                    
-                    # Jika API getkelas, konversi field numerik kecuali ID
-                    if api_url == self.api_url_getkelas:
-                        # Pastikan ID kelas sebagai string
-                        if 'id' in item and item['id'] is not None:
-                            item['id'] = str(item['id'])
-                            
-                        # Konversi dosenUtamaId
-                        if 'dosenUtamaId' in item and item['dosenUtamaId']:
-                            try:
-                                item['dosenUtamaId'] = int(item['dosenUtamaId']) 
-                            except (ValueError, TypeError):
-                                logger.warning(f"Gagal mengkonversi dosenUtamaId '{item['dosenUtamaId']}' ke integer")
-                        
-                        # Konversi dosenPendampingId
-                        if 'dosenPendampingId' in item and item['dosenPendampingId']:
-                            try:
-                                item['dosenPendampingId'] = int(item['dosenPendampingId'])
-                            except (ValueError, TypeError):
-                                logger.warning(f"Gagal mengkonversi dosenPendampingId '{item['dosenPendampingId']}' ke integer")
-                        
-                        # Konversi jumlahPertemuan
-                        if 'jumlahPertemuan' in item and item['jumlahPertemuan']:
-                            try:
-                                item['jumlahPertemuan'] = int(item['jumlahPertemuan'])
-                            except (ValueError, TypeError):
-                                item['jumlahPertemuan'] = 0
-                                logger.warning(f"Gagal mengkonversi jumlahPertemuan, menggunakan default 0")
+        Returns:
+            Tuple berisi list baris siap simpan (urutan kolom MASTER_TABLE_COLUMNS)
+            dan jumlah item yang dilewati
+        """
+        rows = []
+        skipped = 0
+        missing_id_rows = []
+        max_payload_id = None
+        
+        for item in data:
+            # Pastikan item adalah dictionary
+            if not isinstance(item, dict):
+                logger.warning(f"Melewati item non-dictionary: {item}")
+                skipped += 1
+                continue
+            
+            if table == "kelas":
+                # Ambil ID kelas sebagai string
+                kelas_id = str(item.get('id') or '')
+                if not kelas_id:
+                    # Jika tidak ada ID, gunakan UUID atau timestamp sebagai ID unik
+                    kelas_id = f"gen_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+                    logger.info(f"Generated string ID untuk kelas: {kelas_id}")
                 
-            logger.info(f"Berhasil mengambil {len(data)} data dari {api_url}")
+                rows.append((
+                    kelas_id,
+                    str(item.get('kodeKelas', '')),
+                    str(item.get('namaKelas', '')),
+                    str(item.get('pinKelas', '')),
+                    self.safe_int_convert(item.get('dosenUtamaId')),
+                    self.safe_int_convert(item.get('dosenPendampingId')),
+                    self.safe_int_convert(item.get('jumlahPertemuan'), 0),
+                    str(item.get('deskripsi', ''))
+                ))
+                continue
+            
+            # Pastikan ID dosen/mahasiswa adalah integer
+            row_id = self.safe_int_convert(item.get('id'))
+            if row_id is None:
+                # ID dibuat setelah semua item dibaca agar tidak bentrok dengan ID dari API
+                logger.warning(f"{table.capitalize()} tanpa ID valid, ID akan di-generate: {item}")
+                missing_id_rows.append(len(rows))
+            elif max_payload_id is None or row_id > max_payload_id:
+                max_payload_id = row_id
+            
+            if table == "dosen":
+                rows.append((
+                    row_id,
+                    str(item.get('nama', '')),
+                    str(item.get('nip', '')),
+                    str(item.get('email', '')),
+                    str(item.get('password', ''))
+                ))
+            else:
+                rows.append((
+                    row_id,
+                    str(item.get('nama', '')),
+                    str(item.get('email', ''))
+                ))
+        
+        if missing_id_rows:
+            # Lanjutkan dari ID maksimum di database maupun di data API
+            self.cursor.execute(f"SELECT MAX(id) FROM {table}")
+            next_id = max(self.cursor.fetchone()[0] or 0, max_payload_id or 0) + 1
+            for index in missing_id_rows:
+                rows[index] = (next_id,) + rows[index][1:]
+                logger.info(f"Generated ID untuk {table}: {next_id}")
+                next_id += 1
+        
+        return rows, skipped
+
+    def _hash_dosen_passwords(self, rows: List[Tuple], changed_ids: set) -> List[Tuple]:
+        """
+        Mengganti password plaintext pada baris dosen dengan hash sebelum ditulis.
+        Baris yang kontennya tidak berubah memakai ulang hash yang sudah tersimpan,
+        sehingga biaya PBKDF2 hanya dibayar untuk dosen baru atau yang berubah.
+        
+        Args:
+            rows: Baris dosen hasil _normalize_master_rows
+            changed_ids: ID dosen yang kontennya berubah (dari _filter_changed_rows)
             
-            # Tampilkan contoh data untuk debugging
-            if data and len(data) > 0:
-                logger.debug(f"Contoh data pertama setelah konversi: {json.dumps(data[0], indent=2)}")
+        Returns:
+            List baris dengan kolom password berisi hash
+        """
+        password_index = MASTER_TABLE_COLUMNS["dosen"].index("password")
+        unchanged_ids = [row[0] for row in rows if row[0] not in changed_ids]
+        stored_hashes = dict(self._select_in(
+            "SELECT id, password FROM dosen WHERE id IN ({placeholders})", (), unchanged_ids
+        )) if unchanged_ids else {}
+        
+        hashed_rows = []
+        for row in rows:
+            password = row[password_index]
+            stored_hash = stored_hashes.get(row[0])
+            if is_password_hash(stored_hash):
+                password = stored_hash
+            elif password:
+                password = hash_password(password)
+            hashed_rows.append(row[:password_index] + (password,) + row[password_index + 1:])
+        return hashed_rows
+
+    def _bulk_upsert(self, table: str, rows: List[Tuple]) -> Tuple[int, int]:
+        """
+        Menulis banyak baris sekaligus dengan satu executemany
+        INSERT ... ON CONFLICT DO UPDATE. Tidak melakukan commit.
+        
+        Args:
+            table: Nama tabel tujuan
+            rows: Baris dengan urutan kolom MASTER_TABLE_COLUMNS
             
-            return data
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error saat mengambil data dari API: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            logger.error(f"Error saat parsing response JSON: {e}")
-            logger.debug(f"Response yang tidak dapat di-parse: {response.text[:500]}...")
-            return None
+        Returns:
+            Tuple berisi jumlah baris yang ditambahkan dan diperbarui
+        """
+        if not rows:
+            return 0, 0
+        
+        columns = MASTER_TABLE_COLUMNS[table]
+        
+        # Hitung insert/update dari ID yang sudah ada (hanya ID dalam batch ini)
+        seen_ids = {row[0] for row in self._select_in(
+            f"SELECT id FROM {table} WHERE id IN ({{placeholders}})", (), [row[0] for row in rows]
+        )}
+        inserted = 0
+        updated = 0
+        for row in rows:
+            if row[0] in seen_ids:
+                updated += 1
+            else:
+                inserted += 1
+                seen_ids.add(row[0])
+        
+        self.cursor.executemany(f'''
+        INSERT INTO {table} ({", ".join(columns)})
+        VALUES ({", ".join("?" for _ in columns)})
+        ON CONFLICT(id) DO UPDATE SET {", ".join(f"{col} = excluded.{col}" for col in columns[1:])}
+        ''', rows)
+        
+        return inserted, updated
 
-    def save_dosen_data(self, data: List[Dict[str, Any]]) -> None:
+    def _save_master_data(self, table: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Menyimpan data dosen ke database. Jika ID sudah ada, data diperbarui.
-        Jika belum ada, data ditambahkan.
+        Menyimpan data master ke database dalam satu transaksi.
         
         Args:
-            data: List data dosen dari API
+            table: Nama tabel tujuan ("dosen", "mahasiswa" atau "kelas")
+            data: List data dari API
+            
+        Returns:
+            Dictionary berisi jumlah baris inserted, updated, skipped dan waktu proses
         """
+        stats = {"table": table, "inserted": 0, "updated": 0, "skipped": 0, "elapsed_seconds": 0.0}
+        
         if not data:
-            logger.warning("Tidak ada data dosen untuk disimpan")
-            return
-
+            logger.warning(f"Tidak ada data {table} untuk disimpan")
+            return stats
+        
+        started = time.perf_counter()
         try:
-            for item in data:
-                # Pastikan item adalah dictionary
-                if not isinstance(item, dict):
-                    logger.warning(f"Melewati item non-dictionary: {item}")
-                    continue
-                    
-                # Debug item data
-                logger.debug(f"Processing dosen item: {json.dumps(item, indent=2)}")
-                
-                # Pastikan item['id'] adalah integer
-                dosen_id = self.safe_int_convert(item.get('id'))
-                
-                if dosen_id is None:
-                    # Jika tidak ada ID, coba gunakan auto-increment
-                    logger.warning(f"Dosen tanpa ID valid, mencoba generate ID: {item}")
-                    
-                    # Dapatkan ID maksimum saat ini dan tambahkan 1
-                    self.cursor.execute("SELECT MAX(id) FROM dosen")
-                    max_id = self.cursor.fetchone()[0]
-                    dosen_id = 1 if max_id is None else max_id + 1
-                    logger.info(f"Generated ID untuk dosen: {dosen_id}")
-                
-                # Cek apakah ID sudah ada
-                self.cursor.execute("SELECT id FROM dosen WHERE id = ?", (dosen_id,))
-                existing_id = self.cursor.fetchone()
-                
-                if existing_id:
-                    # Update data yang sudah ada
-                    self.cursor.execute('''
-                    UPDATE dosen 
-                    SET nama = ?, nip = ?, email = ?, password = ?
-                    WHERE id = ?
-                    ''', (
-                        str(item.get('nama', '')),
-                        str(item.get('nip', '')),
-                        str(item.get('email', '')),
-                        str(item.get('password', '')),
-                        dosen_id
-                    ))
-                    logger.debug(f"Updated data for dosen ID: {dosen_id}")
-                else:
-                    # Tambah data baru
-                    self.cursor.execute('''
-                    INSERT INTO dosen (id, nama, nip, email, password)
-                    VALUES (?, ?, ?, ?, ?)
-                    ''', (
-                        dosen_id,
-                        str(item.get('nama', '')),
-                        str(item.get('nip', '')),
-                        str(item.get('email', '')),
-                        str(item.get('password', ''))
-                    ))
-                    logger.debug(f"Inserted new data for dosen ID: {dosen_id}")
-            
+            rows, stats["skipped"] = self._normalize_master_rows(table, data)
+            changed_rows = self._filter_changed_rows(table, rows)
+            if table == "dosen":
+                rows = self._hash_dosen_passwords(rows, {row[0] for row in changed_rows})
+            stats["inserted"], stats["updated"] = self._bulk_upsert(table, rows)
             self.conn.commit()
-            logger.info(f"Berhasil menyimpan {len(data)} data dosen ke database")
+            self._invalidate_master_cache(table)
+            
+            stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+            logger.info(f"Berhasil menyimpan {len(rows)} data {table} ke database "
+                        f"(baru: {stats['inserted']}, diperbarui: {stats['updated']}, "
+                        f"dilewati: {stats['skipped']}, {stats['elapsed_seconds']} detik)")
         except sqlite3.Error as e:
-            logger.error(f"Error saat menyimpan data dosen ke database: {e}")
+            logger.error(f"Error saat menyimpan data {table} ke database: {e}")
             logger.debug(f"Stack trace: ", exc_info=True)
             self.conn.rollback()
+            stats["error"] = str(e)
+        
+        return stats
 
-    def save_mahasiswa_data(self, data: List[Dict[str, Any]]) -> None:
+    def _invalidate_master_cache(self, *tables: str) -> None:
         """
-        Menyimpan data mahasiswa ke database. Jika ID sudah ada, data diperbarui.
+        Membuang cache dosen/kelas setelah salah satu tabelnya di-commit.
+        
+        Args:
+            tables: Nama tabel yang baru ditulis
+        """
+        if {"dosen", "kelas"} & set(tables):
+            master_data_cache.invalidate(self.db_name)
+    
+    def save_dosen_data(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Menyimpan data dosen ke database. Jika ID sudah ada, data diperbarui.
         Jika belum ada, data ditambahkan.
         
         Args:
-            data: List data mahasiswa dari API
+            data: List data dosen dari API
+            
+        Returns:
+            Dictionary statistik penyimpanan (inserted, updated, skipped, elapsed_seconds)
         """
-        if not data:
-            logger.warning("Tidak ada data mahasiswa untuk disimpan")
-            return
+        return self._save_master_data("dosen", data)
 
-        try:
-            for item in data:
-                # Pastikan item adalah dictionary
-                if not isinstance(item, dict):
-                    logger.warning(f"Melewati item non-dictionary: {item}")
-                    continue
-                    
-                # Debug item data
-                logger.debug(f"Processing mahasiswa item: {json.dumps(item, indent=2)}")
-                
-                # Pastikan item['id'] adalah integer
-                mahasiswa_id = self.safe_int_convert(item.get('id'))
-                
-                if mahasiswa_id is None:
-                    # Jika tidak ada ID, coba gunakan auto-increment
-                    logger.warning(f"Mahasiswa tanpa ID valid, mencoba generate ID: {item}")
-                    
-                    # Dapatkan ID maksimum saat ini dan tambahkan 1
-                    self.cursor.execute("SELECT MAX(id) FROM mahasiswa")
-                    max_id = self.cursor.fetchone()[0]
-                    mahasiswa_id = 1 if max_id is None else max_id + 1
-                    logger.info(f"Generated ID untuk mahasiswa: {mahasiswa_id}")
-                
-                # Cek apakah ID sudah ada
-                self.cursor.execute("SELECT id FROM mahasiswa WHERE id = ?", (mahasiswa_id,))
-                existing_id = self.cursor.fetchone()
-                
-                if existing_id:
-                    # Update data yang sudah ada
-                    self.cursor.execute('''
-                    UPDATE mahasiswa 
-                    SET nama = ?, email = ?
-                    WHERE id = ?
-                    ''', (
-                        str(item.get('nama', '')),
-                        str(item.get('email', '')),
-                        mahasiswa_id
-                    ))
-                    logger.debug(f"Updated data for mahasiswa ID: {mahasiswa_id}")
-                else:
-                    # Tambah data baru
-                    self.cursor.execute('''
-                    INSERT INTO mahasiswa (id, nama, email)
-                    VALUES (?, ?, ?)
-                    ''', (
-                        mahasiswa_id,
-                        str(item.get('nama', '')),
-                        str(item.get('email', ''))
-                    ))
-                    logger.debug(f"Inserted new data for mahasiswa ID: {mahasiswa_id}")
+    def save_mahasiswa_data(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Menyimpan data mahasiswa ke database. Jika ID sudah ada, data diperbarui.
+        Jika belum ada, data ditambahkan.
+        
+        Args:
+            data: List data mahasiswa dari API
             
-            self.conn.commit()
-            logger.info(f"Berhasil menyimpan {len(data)} data mahasiswa ke database")
-        except sqlite3.Error as e:
-            logger.error(f"Error saat menyimpan data mahasiswa ke database: {e}")
-            logger.debug(f"Stack trace: ", exc_info=True)
-            self.conn.rollback()
+        Returns:
+            Dictionary statistik penyimpanan (inserted, updated, skipped, elapsed_seconds)
+        """
+        return self._save_master_data("mahasiswa", data)
     
     def safe_int_convert(self, value, default=None):
         """
@@ -376,95 +1770,18 @@ class DatabaseManager:
         except (ValueError, TypeError):
             return default
     
-    def save_kelas_data(self, data: List[Dict[str, Any]]) -> None:
+    def save_kelas_data(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Menyimpan data kelas ke database. Jika ID sudah ada, data diperbarui.
         Jika belum ada, data ditambahkan.
         
         Args:
             data: List data kelas dari API
-        """
-        if not data:
-            logger.warning("Tidak ada data kelas untuk disimpan")
-            return
-
-        try:
-            for item in data:
-                # Pastikan item adalah dictionary
-                if not isinstance(item, dict):
-                    logger.warning(f"Melewati item non-dictionary: {item}")
-                    continue
-                
-                # Debug item data
-                logger.debug(f"Processing kelas item: {json.dumps(item, indent=2)}")
-                
-                # Ambil ID kelas sebagai string
-                kelas_id = str(item.get('id', ''))
-                
-                if not kelas_id:
-                    # Jika tidak ada ID, gunakan UUID atau timestamp sebagai ID unik
-                    import uuid
-                    import time
-                    kelas_id = f"gen_{int(time.time())}_{uuid.uuid4().hex[:8]}"
-                    logger.info(f"Generated string ID untuk kelas: {kelas_id}")
-                
-                # Konversi data lainnya
-                dosen_utama_id = self.safe_int_convert(item.get('dosenUtamaId'))
-                dosen_pendamping_id = self.safe_int_convert(item.get('dosenPendampingId'))
-                jumlah_pertemuan = self.safe_int_convert(item.get('jumlahPertemuan'), 0)
-                
-                # Debug nilai yang sudah dikonversi
-                logger.debug(f"Converted values - kelas ID: {kelas_id}, dosenUtamaId: {dosen_utama_id}, " +
-                           f"dosenPendampingId: {dosen_pendamping_id}, jumlahPertemuan: {jumlah_pertemuan}")
-                
-                # Cek apakah ID sudah ada
-                self.cursor.execute("SELECT id FROM kelas WHERE id = ?", (kelas_id,))
-                existing_id = self.cursor.fetchone()
-                
-                if existing_id:
-                    # Update data yang sudah ada
-                    self.cursor.execute('''
-                    UPDATE kelas 
-                    SET kodeKelas = ?, namaKelas = ?, pinKelas = ?, 
-                        dosenUtamaId = ?, dosenPendampingId = ?,
-                        jumlahPertemuan = ?, deskripsi = ?
-                    WHERE id = ?
-                    ''', (
-                        str(item.get('kodeKelas', '')),
-                        str(item.get('namaKelas', '')),
-                        str(item.get('pinKelas', '')),
-                        dosen_utama_id,
-                        dosen_pendamping_id,
-                        jumlah_pertemuan,
-                        str(item.get('deskripsi', '')),
-                        kelas_id
-                    ))
-                    logger.debug(f"Updated data for kelas ID: {kelas_id}")
-                else:
-                    # Tambah data baru
-                    self.cursor.execute('''
-                    INSERT INTO kelas (id, kodeKelas, namaKelas, pinKelas, 
-                                      dosenUtamaId, dosenPendampingId, 
-                                      jumlahPertemuan, deskripsi)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        kelas_id,
-                        str(item.get('kodeKelas', '')),
-                        str(item.get('namaKelas', '')),
-                        str(item.get('pinKelas', '')),
-                        dosen_utama_id,
-                        dosen_pendamping_id,
-                        jumlah_pertemuan,
-                        str(item.get('deskripsi', ''))
-                    ))
-                    logger.debug(f"Inserted new data for kelas ID: {kelas_id}")
             
-            self.conn.commit()
-            logger.info(f"Berhasil menyimpan {len(data)} data kelas ke database")
-        except sqlite3.Error as e:
-            logger.error(f"Error saat menyimpan data kelas ke database: {e}")
-            logger.debug(f"Stack trace: ", exc_info=True)
-            self.conn.rollback()
+        Returns:
+            Dictionary statistik penyimpanan (inserted, updated, skipped, elapsed_seconds)
+        """
+        return self._save_master_data("kelas", data)
 
     def display_data(self, table_name: str) -> None:
         """
@@ -579,20 +1896,21 @@ class DatabaseManager:
             if not dosen_id or not password:
                 return False, {"message": "ID dan password harus diisi"}
             
-            # Cari dosen dengan ID yang diberikan
-            self.cursor.execute("SELECT id, nama, password FROM dosen WHERE id = ?", (dosen_id,))
-            result = self.cursor.fetchone()
+            # Cari dosen dengan ID yang diberikan (dari cache dosen/kelas)
+            dosen = master_data_cache.get(self)["dosen"].get(self.safe_int_convert(dosen_id))
             
-            if not result:
+            if not dosen:
                 logger.info(f"Login gagal: Dosen dengan ID {dosen_id} tidak ditemukan")
                 return False, {"message": f"Dosen dengan ID {dosen_id} tidak ditemukan"}
             
-            db_id, db_nama, db_password = result
+            db_id, db_nama, db_password = dosen["id"], dosen["nama"], dosen["password"]
             
-            # Periksa password
-            if db_password != password:
-                logger.info(f"Login gagal: Password salah untuk dosen ID {dosen_id}")
-                return False, {"message": "Password salah"}
+            # Periksa password, login ulang dalam TTL sesi tidak menghitung ulang hash
+            if not login_session_cache.check(self.db_name, db_id, db_password, password):
+                if not verify_password(password, db_password):
+                    logger.info(f"Login gagal: Password salah untuk dosen ID {dosen_id}")
+                    return False, {"message": "Password salah"}
+                login_session_cache.remember(self.db_name, db_id, db_password, password)
             
             # Login berhasil
             logger.info(f"Login berhasil: Dosen ID {dosen_id} ({db_nama})")
@@ -602,9 +1920,12 @@ class DatabaseManager:
             logger.error(f"Error saat login: {e}")
             return False, {"message": f"Error database: {str(e)}"}
     
-    def pilih_kelas(self, dosen_id: int, kode_kelas: str, pin_kelas: str, nomor_pertemuan: int) -> Tuple[bool, Dict[str, Any]]:
+    def pilih_kelas_lengkap(self, dosen_id: int, kode_kelas: str, pin_kelas: str,
+                            nomor_pertemuan: int) -> Tuple[bool, Dict[str, Any]]:
         """
-        Validasi pemilihan kelas oleh dosen.
+        Validasi pemilihan kelas oleh dosen (dosen, pengajar, PIN dan nomor
+        pertemuan) sekaligus mengambil informasi kelas dari satu snapshot cache
+        dosen/kelas, sehingga satu klik pilih kelas cukup satu lookup.
         
         Args:
             dosen_id: ID dosen
@@ -613,7 +1934,8 @@ class DatabaseManager:
             nomor_pertemuan: Nomor pertemuan
             
         Returns:
-            Tuple berisi status validasi (True/False) dan data/pesan hasil
+            Tuple berisi status validasi (True/False) dan informasi kelas
+            (format get_kelas_info ditambah kode_kelas dan nomor_pertemuan) atau pesan hasil
         """
         try:
             # Validasi input
@@ -626,25 +1948,23 @@ class DatabaseManager:
             if nomor_pertemuan <= 0:
                 return False, {"message": "Nomor pertemuan harus lebih besar dari 0"}
             
+            master_data = master_data_cache.get(self)
+            
             # Cek apakah dosen ada
-            self.cursor.execute("SELECT id FROM dosen WHERE id = ?", (dosen_id,))
-            if not self.cursor.fetchone():
+            if self.safe_int_convert(dosen_id) not in master_data["dosen"]:
                 logger.info(f"Pilih kelas gagal: Dosen dengan ID {dosen_id} tidak ditemukan")
                 return False, {"message": f"Dosen dengan ID {dosen_id} tidak ditemukan"}
             
             # Cek apakah kelas ada
-            self.cursor.execute('''
-            SELECT id, dosenUtamaId, dosenPendampingId, pinKelas, jumlahPertemuan 
-            FROM kelas 
-            WHERE kodeKelas = ?
-            ''', (kode_kelas,))
-            
-            result = self.cursor.fetchone()
-            if not result:
+            kelas = master_data["kelas"].get(kode_kelas)
+            if not kelas:
                 logger.info(f"Pilih kelas gagal: Kelas dengan kode {kode_kelas} tidak ditemukan")
                 return False, {"message": f"Kelas dengan kode {kode_kelas} tidak ditemukan"}
             
-            kelas_id, dosen_utama_id, dosen_pendamping_id, db_pin_kelas, jumlah_pertemuan = result
+            dosen_utama_id = kelas["dosenUtamaId"]
+            dosen_pendamping_id = kelas["dosenPendampingId"]
+            db_pin_kelas = kelas["pinKelas"]
+            jumlah_pertemuan = kelas["jumlahPertemuan"]
             
             # Cek apakah dosen mengajar di kelas tersebut
             if dosen_id != dosen_utama_id and dosen_id != dosen_pendamping_id:
@@ -661,72 +1981,224 @@ class DatabaseManager:
                 logger.info(f"Pilih kelas gagal: Nomor pertemuan {nomor_pertemuan} melebihi jumlah pertemuan {jumlah_pertemuan}")
                 return False, {"message": f"Nomor pertemuan tidak valid. Maksimal: {jumlah_pertemuan}"}
             
-            # Validasi berhasil
+            # Validasi berhasil, info kelas diambil dari snapshot yang sama
+            kelas_info = self._susun_kelas_info(master_data, kelas)
+            kelas_info["kode_kelas"] = kode_kelas
+            kelas_info["nomor_pertemuan"] = nomor_pertemuan
+            
             logger.info(f"Pilih kelas berhasil: Dosen ID {dosen_id}, Kelas {kode_kelas}, Pertemuan {nomor_pertemuan}")
-            return True, {"kode_kelas": kode_kelas, "nomor_pertemuan": nomor_pertemuan}
+            return True, kelas_info
             
         except sqlite3.Error as e:
             logger.error(f"Error saat pilih kelas: {e}")
             return False, {"message": f"Error database: {str(e)}"}
     
-    def get_kelas_info(self, kode_kelas: str) -> Tuple[bool, Dict[str, Any]]:
+    def pilih_kelas(self, dosen_id: int, kode_kelas: str, pin_kelas: str, nomor_pertemuan: int) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Validasi pemilihan kelas oleh dosen.
+        Pembungkus pilih_kelas_lengkap yang hanya mengembalikan kode kelas dan nomor pertemuan.
+        
+        Args:
+            dosen_id: ID dosen
+            kode_kelas: Kode kelas
+            pin_kelas: PIN kelas
+            nomor_pertemuan: Nomor pertemuan
+            
+        Returns:
+            Tuple berisi status validasi (True/False) dan data/pesan hasil
+        """
+        status, result = self.pilih_kelas_lengkap(dosen_id, kode_kelas, pin_kelas, nomor_pertemuan)
+        if not status:
+            return False, result
+        return True, {"kode_kelas": result["kode_kelas"], "nomor_pertemuan": result["nomor_pertemuan"]}
+    
+    def _susun_kelas_info(self, master_data: Dict[str, Any], kelas: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Menyusun informasi kelas beserta nama dosen dari snapshot cache dosen/kelas.
+        
+        Args:
+            master_data: Snapshot dari master_data_cache
+            kelas: Baris kelas dari snapshot
+            
+        Returns:
+            Dictionary informasi kelas
+        """
+        dosen_utama_id, dosen_pendamping_id = kelas["dosenUtamaId"], kelas["dosenPendampingId"]
+        nama_dosen_utama = master_data["dosen"].get(dosen_utama_id, {}).get("nama")
+        nama_dosen_pendamping = master_data["dosen"].get(dosen_pendamping_id, {}).get("nama")
+        
+        return {
+            "nama_kelas": kelas["namaKelas"] or "Tidak ada nama",
+            "deskripsi": kelas["deskripsi"] or "Tidak ada deskripsi",
+            "dosen_utama": {
+                "id": dosen_utama_id,
+                "nama": nama_dosen_utama or "Tidak diketahui"
+            },
+            "dosen_pendamping": {
+                "id": dosen_pendamping_id,
+                "nama": nama_dosen_pendamping or "Tidak diketahui"
+            }
+        }
+    
+    def get_kelas_info(self, kode_kelas: str) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Mendapatkan informasi detail kelas berdasarkan kode kelas.
+        Untuk pemilihan kelas oleh dosen gunakan pilih_kelas_lengkap.
+        
+        Args:
+            kode_kelas: Kode kelas yang akan dicari
+            
+        Returns:
+            Tuple berisi status (True/False) dan data/pesan hasil
+        """
+        try:
+            # Validasi input
+            if not kode_kelas:
+                return False, {"message": "Kode kelas harus diisi"}
+            
+            master_data = master_data_cache.get(self)
+            kelas = master_data["kelas"].get(kode_kelas)
+            
+            if not kelas:
+                logger.info(f"Info kelas gagal: Kelas dengan kode {kode_kelas} tidak ditemukan")
+                return False, {"message": f"Kelas dengan kode {kode_kelas} tidak ditemukan"}
+            
+            logger.info(f"Info kelas berhasil: Kelas dengan kode {kode_kelas} ditemukan")
+            return True, self._susun_kelas_info(master_data, kelas)
+            
+        except sqlite3.Error as e:
+            logger.error(f"Error saat mendapatkan info kelas: {e}")
+            return False, {"message": f"Error database: {str(e)}"}
+    
+    def get_kelas_dosen(self, dosen_id: int) -> List[Dict[str, Any]]:
+        """
+        Mengambil daftar kelas yang diajar oleh dosen (utama atau pendamping).
+        
+        Args:
+            dosen_id: ID dosen
+            
+        Returns:
+            List dictionary berisi kodeKelas, namaKelas, pinKelas dan jumlahPertemuan
+        """
+        columns = ['kodeKelas', 'namaKelas', 'pinKelas', 'jumlahPertemuan']
+        kelas_dosen = master_data_cache.get(self)["kelas_dosen"].get(self.safe_int_convert(dosen_id), [])
+        return [{column: kelas[column] for column in columns} for kelas in kelas_dosen]
+    
+    def preload_master_data(self) -> Dict[str, int]:
+        """
+        Memuat cache dosen/kelas sekali saat startup agar login dan pemilihan
+        kelas pertama tidak perlu membaca database.
+
+        Returns:
+            Dictionary jumlah baris dosen dan kelas
+        """
+        master_data = master_data_cache.get(self)
+        return {"dosen": len(master_data["dosen"]), "kelas": len(master_data["kelas"])}
+
+    def get_mahasiswa_ids(self) -> List[int]:
+        """
+        Mengambil ID seluruh mahasiswa, dipakai untuk mencocokkan versi
+        store embedding dengan tabel mahasiswa.
+        
+        Returns:
+            List ID mahasiswa terurut
+        """
+        self.cursor.execute("SELECT id FROM mahasiswa ORDER BY id")
+        return [row[0] for row in self.cursor.fetchall()]
+    
+    def get_enrolled_hashes(self, backend: str) -> set:
         """
-        Mendapatkan informasi detail kelas berdasarkan kode kelas.
+        Mengambil hash foto enrollment yang sudah diproses dengan backend embedding tertentu.
         
         Args:
-            kode_kelas: Kode kelas yang akan dicari
+            backend: Nama backend embedding (misalnya "sface" atau "pixel")
             
         Returns:
-            Tuple berisi status (True/False) dan data/pesan hasil
+            Set hash konten foto
         """
-        try:
-            # Validasi input
-            if not kode_kelas:
-                return False, {"message": "Kode kelas harus diisi"}
-            
-            # Query untuk informasi kelas dan dosen
-            self.cursor.execute('''
-            SELECT 
-                k.namaKelas, 
-                k.deskripsi, 
-                k.dosenUtamaId, 
-                k.dosenPendampingId,
-                d1.nama as nama_dosen_utama,
-                d2.nama as nama_dosen_pendamping
-            FROM kelas k
-            LEFT JOIN dosen d1 ON k.dosenUtamaId = d1.id
-            LEFT JOIN dosen d2 ON k.dosenPendampingId = d2.id
-            WHERE k.kodeKelas = ?
-            ''', (kode_kelas,))
-            
-            result = self.cursor.fetchone()
+        self.cursor.execute("SELECT hash FROM enrollment_images WHERE backend = ?", (backend,))
+        return {row[0] for row in self.cursor.fetchall()}
+    
+    def save_enrollment_results(self, results: List[Dict[str, Any]]) -> None:
+        """
+        Menyimpan hasil pemrosesan foto enrollment dalam satu transaksi.
+        
+        Args:
+            results: List dictionary berisi hash, mahasiswa_id, path, backend, status dan embedding (bytes atau None)
+        """
+        processed_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.cursor.executemany('''
+        INSERT OR REPLACE INTO enrollment_images (hash, mahasiswaId, path, backend, status, embedding, processedAt)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [(r["hash"], r["mahasiswa_id"], r["path"], r["backend"], r["status"], r["embedding"], processed_at)
+              for r in results])
+        self.conn.commit()
+    
+    def get_enrollment_embeddings(self, mahasiswa_ids: List[int], backend: str) -> Dict[int, List[bytes]]:
+        """
+        Mengambil embedding foto enrollment yang berhasil untuk beberapa mahasiswa.
+        
+        Args:
+            mahasiswa_ids: ID mahasiswa
+            backend: Nama backend embedding
             
-            if not result:
-                logger.info(f"Info kelas gagal: Kelas dengan kode {kode_kelas} tidak ditemukan")
-                return False, {"message": f"Kelas dengan kode {kode_kelas} tidak ditemukan"}
+        Returns:
+            Dictionary mahasiswa_id -> list embedding (bytes float32)
+        """
+        rows = self._select_in(
+            "SELECT mahasiswaId, embedding FROM enrollment_images "
+            "WHERE status = 'ok' AND backend = ? AND mahasiswaId IN ({placeholders})",
+            (backend,), mahasiswa_ids
+        )
+        embeddings = {}
+        for mahasiswa_id, embedding in rows:
+            embeddings.setdefault(mahasiswa_id, []).append(embedding)
+        return embeddings
+    
+    def get_enrollment_students(self, backend: str, since: Optional[str] = None) -> List[int]:
+        """
+        Mengambil mahasiswa yang punya foto enrollment berhasil.
+        
+        Args:
+            backend: Nama backend embedding
+            since: Hanya foto dengan processedAt setelah waktu ini (format "%Y-%m-%d %H:%M:%S"), None untuk semua
             
-            nama_kelas, deskripsi, dosen_utama_id, dosen_pendamping_id, nama_dosen_utama, nama_dosen_pendamping = result
-           
-            # Membuat dictionary hasil
-            kelas_info = {
-                "nama_kelas": nama_kelas or "Tidak ada nama",
-                "deskripsi": deskripsi or "Tidak ada deskripsi",
-                "dosen_utama": {
-                    "id": dosen_utama_id,
-                    "nama": nama_dosen_utama or "Tidak diketahui"
-                },
-                "dosen_pendamping": {
-                    "id": dosen_pendamping_id,
-                    "nama": nama_dosen_pendamping or "Tidak diketahui"
-                }
-            }
+        Returns:
+            List ID mahasiswa
+        """
+        self.cursor.execute(
+            "SELECT DISTINCT mahasiswaId FROM enrollment_images "
+            "WHERE status = 'ok' AND backend = ? AND (? IS NULL OR processedAt > ?)",
+            (backend, since, since)
+        )
+        return [row[0] for row in self.cursor.fetchall()]
+    
+    def get_last_enrollment_time(self, backend: str) -> Optional[str]:
+        """
+        Mengambil waktu foto enrollment terakhir yang diproses dengan backend tertentu.
+        
+        Args:
+            backend: Nama backend embedding
             
-            logger.info(f"Info kelas berhasil: Kelas dengan kode {kode_kelas} ditemukan")
-            return True, kelas_info
+        Returns:
+            processedAt terbaru, atau None jika belum ada
+        """
+        self.cursor.execute("SELECT MAX(processedAt) FROM enrollment_images WHERE backend = ?", (backend,))
+        return self.cursor.fetchone()[0]
+    
+    def get_mahasiswa_hadir(self, kode_kelas: str, no_pertemuan: int) -> set:
+        """
+        Mengambil ID mahasiswa yang sudah absen pada pertemuan kelas.
+        
+        Args:
+            kode_kelas: Kode kelas
+            no_pertemuan: Nomor pertemuan
             
-        except sqlite3.Error as e:
-            logger.error(f"Error saat mendapatkan info kelas: {e}")
-            return False, {"message": f"Error database: {str(e)}"}
+        Returns:
+            Set ID mahasiswa yang sudah hadir
+        """
+        self.cursor.execute(SQL_MAHASISWA_HADIR, (kode_kelas, no_pertemuan))
+        return {row[0] for row in self.cursor.fetchall()}
     
     def tambah_absensi(self, mahasiswa_id: int, no_pertemuan: int, kode_kelas: str) -> Tuple[bool, Dict[str, Any]]:
         """
@@ -756,11 +2228,7 @@ class DatabaseManager:
                 return False, {"message": f"Mahasiswa dengan ID {mahasiswa_id} tidak ditemukan"}
             
             # Cek apakah kelas ada dan nomor pertemuan valid
-            self.cursor.execute('''
-            SELECT jumlahPertemuan 
-            FROM kelas 
-            WHERE kodeKelas = ?
-            ''', (kode_kelas,))
+            self.cursor.execute(SQL_KELAS_JUMLAH_PERTEMUAN, (kode_kelas,))
             
             result = self.cursor.fetchone()
             if not result:
@@ -775,11 +2243,7 @@ class DatabaseManager:
                 return False, {"message": f"Nomor pertemuan tidak valid. Maksimal: {jumlah_pertemuan}"}
             
             # Cek apakah mahasiswa sudah absen pada pertemuan ini
-            self.cursor.execute('''
-            SELECT id
-            FROM absensi
-            WHERE mahasiswaId = ? AND noPertemuan = ? AND kodeKelas = ?
-            ''', (mahasiswa_id, no_pertemuan, kode_kelas))
+            self.cursor.execute(SQL_ABSENSI_DUPLIKAT, (mahasiswa_id, no_pertemuan, kode_kelas))
             
             if self.cursor.fetchone():
                 logger.info(f"Tambah absensi gagal: Mahasiswa {mahasiswa_id} sudah absen pada pertemuan {no_pertemuan} kelas {kode_kelas}")
@@ -789,10 +2253,7 @@ class DatabaseManager:
             jam_absen = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             # Tambahkan data absensi
-            self.cursor.execute('''
-            INSERT INTO absensi (mahasiswaId, noPertemuan, kodeKelas, statusSync, jamAbsen)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (
+            self.cursor.execute(SQL_INSERT_ABSENSI, (
                 mahasiswa_id,
                 no_pertemuan,
                 kode_kelas,
@@ -814,25 +2275,108 @@ class DatabaseManager:
                 "jam_absen": jam_absen
             }
             
+        except sqlite3.IntegrityError:
+            # Indeks unik menolak absensi ganda yang lolos dari pengecekan di atas
+            self.conn.rollback()
+            logger.info(f"Tambah absensi gagal: Mahasiswa {mahasiswa_id} sudah absen pada pertemuan {no_pertemuan} kelas {kode_kelas}")
+            return False, {"message": f"Mahasiswa sudah absen pada pertemuan ini"}
         except sqlite3.Error as e:
             logger.error(f"Error saat menambahkan absensi: {e}")
             self.conn.rollback()
             return False, {"message": f"Error database: {str(e)}"}
     
-    def sync_db_to_server(self) -> Tuple[bool, Dict[str, Any]]:
+    def _post_absensi(self, session: "requests.Session", absensi: Tuple) -> Tuple[int, bool, float, Optional[Dict[str, Any]]]:
+        """
+        Mengirim satu data absensi ke server.
+        
+        Args:
+            session: Session HTTP yang dipakai bersama
+            absensi: Tuple (id, mahasiswaId, noPertemuan, kodeKelas)
+            
+        Returns:
+            Tuple berisi ID absensi, status berhasil, latensi (detik) dan detail kegagalan
+        """
+        requests = _requests()
+        absensi_id, mahasiswa_id, no_pertemuan, kode_kelas = absensi
+        
+        # Siapkan data untuk dikirim ke server
+        payload = {
+            "mahasiswaId": str(mahasiswa_id),  # Convert to string as API might expect string
+            "noPertemuan": no_pertemuan,
+            "kodeKelas": kode_kelas,
+            "statusKehadiran": "HADIR"
+        }
+        
+        started = time.perf_counter()
+        try:
+            response = session.post(
+                self.api_url_updateabsensi,
+                json=payload,
+                headers={"Content-Type": "application/json"},
+                timeout=30
+            )
+            latency = time.perf_counter() - started
+            
+            if response.status_code == 200:
+                logger.debug(f"Absensi ID {absensi_id} berhasil disinkronkan")
+                return absensi_id, True, latency, None
+            
+            logger.warning(f"Absensi ID {absensi_id} gagal disinkronkan: {response.status_code} - {response.text}")
+            return absensi_id, False, latency, {
+                "id": absensi_id,
+                "status_code": response.status_code,
+                "message": response.text
+            }
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error saat sinkronisasi absensi ID {absensi_id}: {e}")
+            return absensi_id, False, time.perf_counter() - started, {
+                "id": absensi_id,
+                "error": str(e)
+            }
+
+    @staticmethod
+    def _percentile(values: List[float], pct: float) -> float:
+        """
+        Menghitung persentil (nearest-rank) dari list nilai.
+        
+        Args:
+            values: List nilai
+            pct: Persentil yang dicari (0-100)
+            
+        Returns:
+            Nilai persentil atau 0.0 jika list kosong
+        """
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+        return ordered[index]
+    
+    def sync_db_to_server(self, chunk_size: Optional[int] = None,
+                          max_workers: Optional[int] = None,
+                          progress_callback: Optional[Callable[[int, int, int], None]] = None,
+                          cancel_event: Optional[threading.Event] = None) -> Tuple[bool, Dict[str, Any]]:
         """
         Menyinkronkan data absensi yang belum terkirim ke server.
         
+        Data dikirim per chunk melalui session keep-alive dengan beberapa request
+        paralel. Setiap chunk yang selesai ditandai 'synced' dalam satu transaksi.
+        
+        Args:
+            chunk_size: Jumlah baris per chunk, default self.sync_chunk_size
+            max_workers: Jumlah request paralel, default self.sync_max_workers
+            progress_callback: Dipanggil setelah setiap chunk dengan (berhasil, gagal, total)
+            cancel_event: Jika di-set, sinkronisasi berhenti setelah chunk yang sedang berjalan
+        
         Returns:
             Tuple berisi status (True/False) dan data/pesan hasil
         """
+        chunk_size = max(1, chunk_size or self.sync_chunk_size)
+        max_workers = max(1, max_workers or self.sync_max_workers)
+        
         try:
             # Ambil semua absensi dengan status 'pending'
-            self.cursor.execute('''
-            SELECT id, mahasiswaId, noPertemuan, kodeKelas
-            FROM absensi
-            WHERE statusSync = 'pending'
-            ''')
+            self.cursor.execute(SQL_ABSENSI_PENDING)
             
             pending_absensi = self.cursor.fetchall()
             
@@ -844,67 +2388,68 @@ class DatabaseManager:
             synced_count = 0
             failed_count = 0
             failed_list = []
-            
-            for absensi in pending_absensi:
-                absensi_id, mahasiswa_id, no_pertemuan, kode_kelas = absensi
-                
-                # Siapkan data untuk dikirim ke server
-                payload = {
-                    "mahasiswaId": str(mahasiswa_id),  # Convert to string as API might expect string
-                    "noPertemuan": no_pertemuan,
-                    "kodeKelas": kode_kelas,
-                    "statusKehadiran": "HADIR"
-                }
-                
-                try:
-                    # Kirim data ke server
-                    response = requests.post(
-                        self.api_url_updateabsensi,
-                        json=payload,
-                        headers={"Content-Type": "application/json"}
-                    )
+            latencies = []
+            cancelled = False
+            
+            session = self.get_http_session(max_workers)
+            started = time.perf_counter()
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for start in range(0, total_pending, chunk_size):
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = True
+                        logger.info("Sinkronisasi dibatalkan oleh pengguna")
+                        break
+                    
+                    chunk = pending_absensi[start:start + chunk_size]
+                    results = executor.map(lambda row: self._post_absensi(session, row), chunk)
                     
-                    # Periksa response
-                    if response.status_code == 200:
-                        # Update status menjadi 'synced'
-                        self.cursor.execute('''
+                    synced_ids = []
+                    for absensi_id, success, latency, detail in results:
+                        latencies.append(latency)
+                        if success:
+                            synced_ids.append((absensi_id,))
+                        else:
+                            failed_list.append(detail)
+                    
+                    # Tandai satu chunk sebagai 'synced' dalam satu transaksi
+                    if synced_ids:
+                        self.cursor.executemany('''
                         UPDATE absensi
                         SET statusSync = 'synced'
                         WHERE id = ?
-                        ''', (absensi_id,))
-                        
-                        synced_count += 1
-                        logger.info(f"Absensi ID {mahasiswa_id} berhasil disinkronkan")
-                    else:
-                        failed_count += 1
-                        failed_list.append({
-                            "id": absensi_id,
-                            "status_code": response.status_code,
-                            "message": response.text
-                        })
-                        logger.warning(f"Absensi ID {absensi_id} gagal disinkronkan: {response.status_code} - {response.text}")
-                
-                except requests.exceptions.RequestException as e:
-                    failed_count += 1
-                    failed_list.append({
-                        "id": absensi_id,
-                        "error": str(e)
-                    })
-                    logger.error(f"Error saat sinkronisasi absensi ID {absensi_id}: {e}")
+                        ''', synced_ids)
+                        self.conn.commit()
+                    
+                    synced_count += len(synced_ids)
+                    failed_count += len(chunk) - len(synced_ids)
+                    
+                    if progress_callback:
+                        progress_callback(synced_count, failed_count, total_pending)
             
-            # Commit semua perubahan
-            self.conn.commit()
+            elapsed = time.perf_counter() - started
+            processed = synced_count + failed_count
+            status_text = "dibatalkan" if cancelled else "selesai"
             
             # Buat laporan hasil sinkronisasi
             result = {
-                "message": f"Sinkronisasi selesai. Berhasil: {synced_count}, Gagal: {failed_count}, Total: {total_pending}",
+                "message": f"Sinkronisasi {status_text}. Berhasil: {synced_count}, Gagal: {failed_count}, Total: {total_pending}",
                 "synced": synced_count,
                 "failed": failed_count,
                 "total": total_pending,
-                "failed_details": failed_list if failed_list else None
+                "cancelled": cancelled,
+                "failed_details": failed_list if failed_list else None,
+                "elapsed_seconds": round(elapsed, 3),
+                "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+                "latency_p50_ms": round(self._percentile(latencies, 50) * 1000, 1),
+                "latency_p95_ms": round(self._percentile(latencies, 95) * 1000, 1),
+                "chunk_size": chunk_size,
+                "max_workers": max_workers
             }
             
-            logger.info(f"Sinkronisasi selesai. Berhasil: {synced_count}, Gagal: {failed_count}, Total: {total_pending}")
+            logger.info(f"Sinkronisasi {status_text}. Berhasil: {synced_count}, Gagal: {failed_count}, Total: {total_pending} "
+                        f"({result['rows_per_second']} baris/detik, p50 {result['latency_p50_ms']} ms, "
+                        f"p95 {result['latency_p95_ms']} ms)")
             return True, result
             
         except sqlite3.Error as e:
@@ -915,62 +2460,124 @@ class DatabaseManager:
             logger.error(f"Error umum saat sinkronisasi: {e}")
             return False, {"message": f"Error: {str(e)}"}
 
-    def process_dosen_data(self) -> None:
-        """Proses untuk mengambil dan menyimpan data dosen."""
+    def process_dosen_data(self, incremental: bool = True) -> Dict[str, Any]:
+        """
+        Proses untuk mengambil dan menyimpan data dosen.
+        
+        Args:
+            incremental: Gunakan request kondisional dan hanya tulis baris yang berubah
+            
+        Returns:
+            Dictionary statistik refresh
+        """
         self.connect()
         self.create_tables_if_not_exist()
         
-        logger.info("Mengambil data dosen dari API...")
-        dosen_data = self.fetch_data_from_api(self.api_url_getdosen)
+        logger.info("Mengambil dan menyimpan data dosen dari API...")
+        stats = self.refresh_master_data("dosen", incremental)
         
-        if dosen_data:
-            logger.info("Menyimpan data dosen ke database...")
-            self.save_dosen_data(dosen_data)
-            
+        if "error" in stats:
+            logger.warning(f"Gagal memperbarui data dosen: {stats['error']}")
+        else:
             logger.info("Menampilkan data dosen dari database...")
             self.display_data("dosen")
-        else:
-            logger.warning("Tidak ada data dosen yang diperoleh dari API")
         
         self.close()
+        return stats
     
-    def process_kelas_data(self) -> None:
-        """Proses untuk mengambil dan menyimpan data kelas."""
+    def process_kelas_data(self, incremental: bool = True) -> Dict[str, Any]:
+        """
+        Proses untuk mengambil dan menyimpan data kelas.
+        
+        Args:
+            incremental: Gunakan request kondisional dan hanya tulis baris yang berubah
+            
+        Returns:
+            Dictionary statistik refresh
+        """
         self.connect()
         self.create_tables_if_not_exist()
         
-        logger.info("Mengambil data kelas dari API...")
-        kelas_data = self.fetch_data_from_api(self.api_url_getkelas)
+        logger.info("Mengambil dan menyimpan data kelas dari API...")
+        stats = self.refresh_master_data("kelas", incremental)
         
-        if kelas_data:
-            logger.info("Menyimpan data kelas ke database...")
-            self.save_kelas_data(kelas_data)
-            
+        if "error" in stats:
+            logger.warning(f"Gagal memperbarui data kelas: {stats['error']}")
+        else:
             logger.info("Menampilkan data kelas dari database...")
             self.display_data("kelas")
-        else:
-            logger.warning("Tidak ada data kelas yang diperoleh dari API")
         
         self.close()
+        return stats
     
-    def process_mahasiswa_data(self) -> None:
-        """Proses untuk mengambil dan menyimpan data mahasiswa."""
+    def process_mahasiswa_data(self, incremental: bool = True) -> Dict[str, Any]:
+        """
+        Proses untuk mengambil dan menyimpan data mahasiswa.
+        
+        Args:
+            incremental: Gunakan request kondisional dan hanya tulis baris yang berubah
+            
+        Returns:
+            Dictionary statistik refresh
+        """
         self.connect()
         self.create_tables_if_not_exist()
         
-        logger.info("Mengambil data mahasiswa dari API...")
-        mahasiswa_data = self.fetch_data_from_api(self.api_url_getmahasiswa)
+        logger.info("Mengambil dan menyimpan data mahasiswa dari API...")
+        stats = self.stream_master_data("mahasiswa", incremental=incremental)
         
-        if mahasiswa_data:
-            logger.info("Menyimpan data mahasiswa ke database...")
-            self.save_mahasiswa_data(mahasiswa_data)
-            
+        if "error" in stats:
+            logger.warning(f"Gagal memperbarui data mahasiswa: {stats['error']}")
+        else:
             logger.info("Menampilkan data mahasiswa dari database...")
             self.display_data("mahasiswa")
-        else:
-            logger.warning("Tidak ada data mahasiswa yang diperoleh dari API")
         
         self.close()
+        return stats
+    
+    def test_query_plans(self) -> None:
+        """Menu pengujian indeks pada jalur query utama (EXPLAIN QUERY PLAN)."""
+        self.connect()
+        self.create_tables_if_not_exist()
+        
+        print("\n=== Test Query Plan ===")
+        all_ok = True
+        for name, result in self.check_query_plans().items():
+            all_ok = all_ok and result["ok"]
+            print(f"[{'OK' if result['ok'] else 'GAGAL'}] {name} (indeks: {', '.join(result['expected'])})")
+            for step in result["plan"]:
+                print(f"      {step}")
+        print("\nSemua query memakai indeks." if all_ok else "\nAda query yang tidak memakai indeks!")
+        
+        self.close()
+    
+    def process_all_master_data(self, incremental: bool = True) -> Dict[str, Any]:
+        """
+        Proses untuk mengambil dan menyimpan semua data master sekaligus.
+        
+        Args:
+            incremental: Gunakan request kondisional dan hanya tulis baris yang berubah
+            
+        Returns:
+            Dictionary hasil refresh_all_master_data
+        """
+        self.connect()
+        self.create_tables_if_not_exist()
+        
+        result = self.refresh_all_master_data(incremental)
+        
+        print(f"\n=== {result['message']} ===")
+        for table, stats in result["tables"].items():
+            if stats["not_modified"]:
+                print(f"{table:<10} | tidak berubah (304)")
+            else:
+                print(f"{table:<10} | diambil {stats['fetched']}, baru {stats['inserted']}, "
+                      f"diperbarui {stats['updated']}, tidak berubah {stats['unchanged']}, "
+                      f"dilewati {stats['skipped']}")
+        print("Waktu per tahap (detik): " + ", ".join(f"{k}={v}" for k, v in result["timings"].items()))
+        
+        self.close()
+        return result
     
     def test_login(self) -> None:
         """Menu pengujian fungsi login."""
@@ -1192,6 +2799,9 @@ class DatabaseManager:
             if status:
                 print("\n=== Sinkronisasi Selesai ===")
                 print(result["message"])
+                if result.get("total"):
+                    print(f"Throughput: {result['rows_per_second']} baris/detik "
+                          f"(p50 {result['latency_p50_ms']} ms, p95 {result['latency_p95_ms']} ms)")
                 
                 if result["failed"] > 0 and result["failed_details"]:
                     print("\nDetail kegagalan:")
@@ -1233,11 +2843,592 @@ class DatabaseManager:
         self.close()
 
 
+class AttendanceQueue:
+    """
+    Antrian absensi write-behind untuk loop pengenalan wajah.
+    
+    submit() hanya memeriksa data di memori (roster mahasiswa yang di-cache dan
+    mahasiswa yang sudah hadir) lalu mengembalikan hasil tanpa menunggu disk.
+    Thread flusher menulis antrian ke tabel absensi dalam satu transaksi
+    setiap flush_interval detik.
+    """
+    
+    def __init__(self, kode_kelas: str, no_pertemuan: int, db_name: str = "local",
+                 flush_interval: float = ATTENDANCE_FLUSH_INTERVAL,
+                 on_flushed: Optional[Callable[[List[Tuple[int, str]]], None]] = None):
+        """
+        Args:
+            kode_kelas: Kode kelas yang sedang berjalan
+            no_pertemuan: Nomor pertemuan
+            db_name: Nama database (tanpa .db)
+            flush_interval: Jeda antar flush dalam detik
+            on_flushed: Dipanggil dari thread flusher dengan list (mahasiswa_id, jam_absen) yang benar-benar
+                tertulis (tanpa baris yang ditolak indeks unik)
+        """
+        self.kode_kelas = kode_kelas
+        self.no_pertemuan = no_pertemuan
+        self.db_name = db_name
+        self.flush_interval = flush_interval
+        self.on_flushed = on_flushed
+        self.roster = set()
+        self.seen = set()
+        self.stats = {"submitted": 0, "queued": 0, "duplicates": 0, "rejected": 0,
+                      "written": 0, "ignored": 0, "flushes": 0, "last_flush_ms": 0.0, "unflushed": 0}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def load(self, db_manager: "DatabaseManager", hadir: Optional[Iterable[int]] = None) -> None:
+        """
+        Memvalidasi kelas dan pertemuan sekali, lalu meng-cache roster mahasiswa
+        dan mahasiswa yang sudah hadir.
+        
+        Args:
+            db_manager: DatabaseManager yang sudah terhubung
+            hadir: Mahasiswa yang sudah hadir jika sudah dimuat sebelumnya
+            
+        Raises:
+            ValueError: Jika kelas tidak ditemukan atau nomor pertemuan tidak valid
+        """
+        db_manager.cursor.execute(SQL_KELAS_JUMLAH_PERTEMUAN, (self.kode_kelas,))
+        result = db_manager.cursor.fetchone()
+        if not result:
+            raise ValueError(f"Kelas dengan kode {self.kode_kelas} tidak ditemukan")
+        if not 0 < self.no_pertemuan <= (result[0] or 0):
+            raise ValueError(f"Nomor pertemuan tidak valid. Maksimal: {result[0]}")
+        
+        self.roster = set(db_manager.get_mahasiswa_ids())
+        self.seen = set(hadir) if hadir is not None else db_manager.get_mahasiswa_hadir(self.kode_kelas, self.no_pertemuan)
+    
+    def submit(self, mahasiswa_id: int) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Memasukkan absensi ke antrian tanpa menyentuh database.
+        
+        Args:
+            mahasiswa_id: ID mahasiswa yang dikenali
+            
+        Returns:
+            Tuple berisi status (True jika masuk antrian) dan data/pesan hasil
+        """
+        with self._lock:
+            self.stats["submitted"] += 1
+            if mahasiswa_id in self.seen:
+                self.stats["duplicates"] += 1
+                return False, {"message": "Mahasiswa sudah absen pada pertemuan ini"}
+            if mahasiswa_id not in self.roster:
+                self.stats["rejected"] += 1
+                return False, {"message": f"Mahasiswa dengan ID {mahasiswa_id} tidak ditemukan"}
+            
+            jam_absen = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.seen.add(mahasiswa_id)
+            self._pending.append((mahasiswa_id, jam_absen))
+            self.stats["queued"] += 1
+        return True, {"mahasiswa_id": mahasiswa_id, "jam_absen": jam_absen}
+    
+    def start(self) -> None:
+        """Menjalankan thread flusher."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="attendance-flusher", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> List[Tuple[int, str]]:
+        """
+        Menghentikan thread flusher setelah sisa antrian ditulis.
+        
+        Returns:
+            List (mahasiswa_id, jam_absen) yang tetap gagal ditulis setelah
+            ATTENDANCE_FINAL_FLUSH_RETRIES percobaan (kosong jika semua tersimpan)
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            unflushed = list(self._pending)
+            self.stats["unflushed"] = len(unflushed)
+        if unflushed:
+            logger.error(f"{len(unflushed)} absensi kelas {self.kode_kelas} pertemuan "
+                         f"{self.no_pertemuan} tidak tertulis ke database")
+        return unflushed
+    
+    def _run(self) -> None:
+        """Loop thread flusher dengan koneksi database milik thread ini."""
+        db_manager = DatabaseManager(self.db_name)
+        try:
+            db_manager.connect()
+            while not self._stop_event.wait(self.flush_interval):
+                self.flush(db_manager)
+            # Tulis sisa antrian sebelum berhenti, diulang jika database sedang terkunci
+            for attempt in range(ATTENDANCE_FINAL_FLUSH_RETRIES):
+                self.flush(db_manager)
+                with self._lock:
+                    if not self._pending:
+                        break
+                if attempt + 1 < ATTENDANCE_FINAL_FLUSH_RETRIES:
+                    time.sleep(ATTENDANCE_FINAL_FLUSH_DELAY)
+        finally:
+            db_manager.close()
+            connection_provider.close_thread_connections()
+    
+    def flush(self, db_manager: "DatabaseManager") -> int:
+        """
+        Menulis seluruh antrian ke tabel absensi dalam satu transaksi.
+        
+        Args:
+            db_manager: DatabaseManager yang sudah terhubung di thread pemanggil
+            
+        Returns:
+            Jumlah absensi yang benar-benar tertulis, tanpa baris yang diabaikan
+            karena absensi yang sama sudah ada di database
+        """
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        
+        started = time.perf_counter()
+        written = []
+        try:
+            # INSERT OR IGNORE: indeks unik tetap menolak absensi ganda dari proses lain,
+            # rowcount per baris menunjukkan baris mana yang benar-benar masuk
+            for mahasiswa_id, jam_absen in batch:
+                db_manager.cursor.execute(
+                    SQL_INSERT_ABSENSI_ANTRIAN,
+                    (mahasiswa_id, self.no_pertemuan, self.kode_kelas, "pending", jam_absen)
+                )
+                if db_manager.cursor.rowcount == 1:
+                    written.append((mahasiswa_id, jam_absen))
+            db_manager.conn.commit()
+        except sqlite3.Error as e:
+            db_manager.conn.rollback()
+            logger.error(f"Flush antrian absensi gagal, {len(batch)} data dikembalikan ke antrian: {e}")
+            with self._lock:
+                self._pending = batch + self._pending
+            return 0
+        
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        ignored = len(batch) - len(written)
+        with self._lock:
+            self.stats["written"] += len(written)
+            self.stats["ignored"] += ignored
+            self.stats["flushes"] += 1
+            self.stats["last_flush_ms"] = elapsed_ms
+        logger.info(f"Flush antrian absensi: {len(written)} data kelas {self.kode_kelas} dalam {elapsed_ms} ms"
+                    + (f", {ignored} sudah ada di database" if ignored else ""))
+        
+        if self.on_flushed and written:
+            self.on_flushed(written)
+        return len(written)
+
+
+class StandInAbsensiHandler(BaseHTTPRequestHandler):
+    """Handler server tiruan untuk menguji sinkronisasi dan refresh data master tanpa server asli."""
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    disable_nagle_algorithm = True
+    latency = 0.0  # Simulasi waktu proses server (detik)
+
+    # Payload GET per nama endpoint, contoh {"getdosen": b'[...]'}
+    payloads: Dict[str, bytes] = {}
+
+    def do_GET(self):
+        body = self.payloads.get(self.path.rstrip("/").rsplit("/", 1)[-1])
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if self.latency:
+            time.sleep(self.latency)
+        
+        body = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Jangan tampilkan log setiap request
+        pass
+
+
+def start_stand_in_server(latency: float = 0.0,
+                          payloads: Optional[Dict[str, Any]] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Menjalankan server HTTP tiruan di localhost pada thread terpisah.
+    
+    Args:
+        latency: Simulasi waktu proses server per request (detik)
+        payloads: Data GET per endpoint, contoh {"getdosen": [...]}
+        
+    Returns:
+        Tuple berisi objek server dan alamat dasar API-nya
+    """
+    encoded = {name: json.dumps(data).encode("utf-8") for name, data in (payloads or {}).items()}
+    handler = type("StandInHandler", (StandInAbsensiHandler,), {"latency": latency, "payloads": encoded})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api"
+
+
+def benchmark_sync(rows: int = 1000, latency: float = 0.005) -> None:
+    """
+    Mengukur throughput sinkronisasi terhadap server tiruan di localhost
+    dengan beberapa konfigurasi chunk dan jumlah request paralel.
+    
+    Args:
+        rows: Jumlah baris absensi pending yang disinkronkan
+        latency: Simulasi waktu proses server per request (detik)
+    """
+    server, api_base_url = start_stand_in_server(latency)
+    
+    print(f"\n=== Benchmark Sinkronisasi ({rows} baris, latensi server {latency * 1000:.0f} ms) ===")
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for chunk_size, max_workers in [(1, 1), (50, 4), (100, 8)]:
+                db_manager = DatabaseManager(os.path.join(tmp_dir, f"bench_{chunk_size}_{max_workers}"), api_base_url)
+                db_manager.connect()
+                db_manager.create_tables_if_not_exist()
+                jam_absen = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                db_manager.cursor.executemany('''
+                INSERT INTO absensi (mahasiswaId, noPertemuan, kodeKelas, statusSync, jamAbsen)
+                VALUES (?, ?, ?, 'pending', ?)
+                ''', [(i, 1, "BENCH", jam_absen) for i in range(1, rows + 1)])
+                db_manager.conn.commit()
+                
+                status, result = db_manager.sync_db_to_server(chunk_size=chunk_size, max_workers=max_workers)
+                db_manager.close()
+                connection_provider.close_thread_connections()
+                
+                if status:
+                    print(f"chunk={chunk_size:<4} workers={max_workers:<2} | "
+                          f"{result['rows_per_second']:>8} baris/detik | "
+                          f"p50 {result['latency_p50_ms']:>6} ms | p95 {result['latency_p95_ms']:>6} ms | "
+                          f"berhasil {result['synced']}/{result['total']}")
+                else:
+                    print(f"chunk={chunk_size} workers={max_workers} gagal: {result['message']}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def benchmark_stream_ingest(rows: int = 50000) -> None:
+    """
+    Membandingkan puncak pemakaian memori refresh biasa dengan refresh streaming
+    terhadap server tiruan di localhost.
+    
+    Args:
+        rows: Jumlah data mahasiswa pada payload
+    """
+    payload = [{"id": i, "nama": f"Mahasiswa {i}", "email": f"mhs{i}@example.com"} for i in range(1, rows + 1)]
+    server, api_base_url = start_stand_in_server(payloads={"getmahasiswa": payload})
+    del payload
+    
+    print(f"\n=== Benchmark Ingest Mahasiswa ({rows} baris) ===")
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for mode in ("biasa", "streaming"):
+                db_manager = DatabaseManager(os.path.join(tmp_dir, f"bench_{mode}"), api_base_url)
+                db_manager.connect()
+                db_manager.create_tables_if_not_exist()
+                
+                tracemalloc.start()
+                if mode == "streaming":
+                    stats = db_manager.stream_master_data("mahasiswa", incremental=False)
+                else:
+                    stats = db_manager.refresh_master_data("mahasiswa", incremental=False)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                db_manager.close()
+                connection_provider.close_thread_connections()
+                
+                print(f"{mode:<10} | puncak memori {peak / 1024 / 1024:>7.1f} MB | "
+                      f"{stats['elapsed_seconds']:>6} detik | baru {stats['inserted']}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def benchmark_connection_reuse(clicks: int = 500) -> None:
+    """
+    Membandingkan latensi per klik login: pola lama (buka file, jalankan DDL,
+    login, tutup) dengan koneksi bersama dari connection_provider.
+    
+    Args:
+        clicks: Jumlah simulasi klik untuk setiap pola
+    """
+    print(f"\n=== Benchmark Koneksi per Klik ({clicks} klik) ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_name = os.path.join(tmp_dir, "bench_conn")
+        db_manager = DatabaseManager(db_name)
+        db_manager.connect()
+        db_manager.create_tables_if_not_exist()
+        db_manager.save_dosen_data([{"id": 1, "nama": "Dosen Benchmark", "password": "rahasia"}])
+        db_manager.close()
+        
+        # Pola lama: koneksi baru dan DDL setiap klik
+        started = time.perf_counter()
+        for _ in range(clicks):
+            conn = sqlite3.connect(db_manager.db_name)
+            cursor = conn.cursor()
+            for table in MASTER_REFRESH_ORDER + ["absensi"]:
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY)")
+            conn.commit()
+            cursor.execute(SQL_LOGIN, (1,))
+            cursor.fetchone()
+            conn.close()
+        fresh_ms = (time.perf_counter() - started) / clicks * 1000
+        
+        # Pola baru: koneksi bersama dan statement yang sudah di-cache
+        started = time.perf_counter()
+        for _ in range(clicks):
+            db_manager = DatabaseManager(db_name)
+            db_manager.connect()
+            db_manager.create_tables_if_not_exist()
+            db_manager.login(1, "rahasia")
+            db_manager.close()
+        pooled_ms = (time.perf_counter() - started) / clicks * 1000
+        connection_provider.close_thread_connections()
+    
+    print(f"Koneksi baru per klik   : {fresh_ms:.3f} ms/klik")
+    print(f"Koneksi bersama (pooled): {pooled_ms:.3f} ms/klik")
+    if pooled_ms > 0:
+        print(f"Percepatan              : {fresh_ms / pooled_ms:.1f}x")
+
+
+def benchmark_storage_profiles(inserts: int = 300) -> None:
+    """
+    Mengukur jumlah tambah_absensi per detik (satu commit per mahasiswa)
+    untuk setiap profil penyimpanan di STORAGE_PROFILES.
+    
+    Args:
+        inserts: Jumlah mahasiswa yang diabsen untuk setiap profil
+    """
+    print(f"\n=== Benchmark Profil Penyimpanan ({inserts} absensi) ===")
+    with tempfile.TemporaryDirectory(dir=".") as tmp_dir:
+        for profile_name, profile in STORAGE_PROFILES.items():
+            db_manager = DatabaseManager(os.path.join(tmp_dir, f"bench_{profile_name}"), storage_profile=profile_name)
+            db_manager.connect()
+            db_manager.create_tables_if_not_exist()
+            db_manager.save_kelas_data([{"id": "bench", "kodeKelas": "BENCH", "jumlahPertemuan": 16}])
+            db_manager.save_mahasiswa_data([{"id": i, "nama": f"Mahasiswa {i}"} for i in range(1, inserts + 1)])
+            
+            started = time.perf_counter()
+            for mahasiswa_id in range(1, inserts + 1):
+                db_manager.tambah_absensi(mahasiswa_id, 1, "BENCH")
+            elapsed = time.perf_counter() - started
+            
+            db_manager.close()
+            connection_provider.close_thread_connections()
+            
+            print(f"{profile_name:<9} | journal={profile['journal_mode']:<6} synchronous={profile['synchronous']:<6} | "
+                  f"{inserts / elapsed:>9.1f} absensi/detik")
+
+
+def benchmark_attendance_queue(students: int = 300) -> None:
+    """
+    Membandingkan latensi per wajah yang dikenali: tambah_absensi langsung
+    (validasi SELECT + INSERT + commit) dengan submit ke AttendanceQueue.
+    
+    Args:
+        students: Jumlah mahasiswa yang diabsen untuk setiap pola
+    """
+    print(f"\n=== Benchmark Antrian Absensi ({students} mahasiswa) ===")
+    with tempfile.TemporaryDirectory(dir=".") as tmp_dir:
+        db_name = os.path.join(tmp_dir, "bench_antrian")
+        db_manager = DatabaseManager(db_name)
+        db_manager.connect()
+        db_manager.create_tables_if_not_exist()
+        db_manager.save_kelas_data([{"id": "bench", "kodeKelas": "BENCH", "jumlahPertemuan": 16}])
+        db_manager.save_mahasiswa_data([{"id": i, "nama": f"Mahasiswa {i}"} for i in range(1, students + 1)])
+        
+        # Pola lama: setiap wajah menunggu validasi dan commit
+        started = time.perf_counter()
+        for mahasiswa_id in range(1, students + 1):
+            db_manager.tambah_absensi(mahasiswa_id, 1, "BENCH")
+        direct_ms = (time.perf_counter() - started) / students * 1000
+        
+        # Pola baru: submit di memori, flush di thread terpisah
+        queue = AttendanceQueue("BENCH", 2, db_name)
+        queue.load(db_manager)
+        queue.start()
+        started = time.perf_counter()
+        for mahasiswa_id in range(1, students + 1):
+            queue.submit(mahasiswa_id)
+            # Wajah yang sama terlihat lagi di frame berikutnya
+            queue.submit(mahasiswa_id)
+        queued_ms = (time.perf_counter() - started) / (students * 2) * 1000
+        queue.stop()
+        
+        db_manager.cursor.execute("SELECT COUNT(*) FROM absensi WHERE noPertemuan = 2")
+        written = db_manager.cursor.fetchone()[0]
+        db_manager.close()
+        connection_provider.close_thread_connections()
+    
+    print(f"tambah_absensi langsung : {direct_ms:.3f} ms/wajah")
+    print(f"AttendanceQueue.submit  : {queued_ms:.4f} ms/wajah")
+    print(f"Tertulis                : {written} absensi dalam {queue.stats['flushes']} flush, "
+          f"{queue.stats['duplicates']} duplikat diabaikan")
+
+
+def benchmark_pilih_kelas(clicks: int = 2000) -> None:
+    """
+    Membandingkan latensi per klik pilih kelas: tiga query SQL (cek dosen,
+    pilih kelas, info kelas), pola lama pilih_kelas + get_kelas_info, dan satu
+    panggilan pilih_kelas_lengkap.
+    
+    Args:
+        clicks: Jumlah simulasi klik untuk setiap pola
+    """
+    print(f"\n=== Benchmark Pilih Kelas ({clicks} klik) ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_name = os.path.join(tmp_dir, "bench_pilih")
+        db_manager = DatabaseManager(db_name)
+        db_manager.connect()
+        db_manager.create_tables_if_not_exist()
+        db_manager.save_dosen_data([{"id": i, "nama": f"Dosen {i}", "password": "rahasia"} for i in range(1, 51)])
+        db_manager.save_kelas_data([
+            {"id": f"k{i}", "kodeKelas": f"BENCH{i}", "namaKelas": f"Kelas {i}", "pinKelas": "1234",
+             "dosenUtamaId": i % 50 + 1, "dosenPendampingId": (i + 1) % 50 + 1, "jumlahPertemuan": 16}
+            for i in range(200)
+        ])
+        
+        # Log per klik tidak ikut diukur
+        previous_level = logger.level
+        logger.setLevel(logging.WARNING)
+        try:
+            # Pola sebelum cache: tiga query per klik
+            started = time.perf_counter()
+            for _ in range(clicks):
+                db_manager.cursor.execute(SQL_LOGIN, (2,))
+                db_manager.cursor.fetchone()
+                db_manager.cursor.execute(SQL_KELAS_PILIH, ("BENCH1",))
+                db_manager.cursor.fetchone()
+                db_manager.cursor.execute(SQL_KELAS_INFO, ("BENCH1",))
+                db_manager.cursor.fetchone()
+            sql_us = (time.perf_counter() - started) / clicks * 1e6
+            
+            # Pola lama: dua panggilan, dua lookup cache
+            started = time.perf_counter()
+            for _ in range(clicks):
+                status, _ = db_manager.pilih_kelas(2, "BENCH1", "1234", 3)
+                if status:
+                    db_manager.get_kelas_info("BENCH1")
+            separate_us = (time.perf_counter() - started) / clicks * 1e6
+            
+            # Pola baru: satu panggilan
+            started = time.perf_counter()
+            for _ in range(clicks):
+                status, kelas_info = db_manager.pilih_kelas_lengkap(2, "BENCH1", "1234", 3)
+            combined_us = (time.perf_counter() - started) / clicks * 1e6
+        finally:
+            logger.setLevel(previous_level)
+        
+        db_manager.close()
+        master_data_cache.invalidate(db_manager.db_name)
+        connection_provider.close_thread_connections()
+    
+    print(f"3 query SQL per klik          : {sql_us:.1f} us/klik")
+    print(f"pilih_kelas + get_kelas_info  : {separate_us:.1f} us/klik")
+    print(f"pilih_kelas_lengkap           : {combined_us:.1f} us/klik")
+    if combined_us > 0:
+        print(f"Percepatan vs pola lama       : {separate_us / combined_us:.1f}x")
+    print(f"Hasil: {kelas_info['nama_kelas']} ({kelas_info['dosen_utama']['nama']}), status {status}")
+
+
+def benchmark_login_cost(costs: Tuple[int, ...] = (10000, 50000, 100000, 200000, 600000),
+                         attempts: int = 5) -> None:
+    """
+    Mengukur latensi login dosen untuk setiap biaya hash password: login
+    pertama (PBKDF2 dihitung) dan login ulang dari cache sesi.
+    
+    Args:
+        costs: Jumlah iterasi PBKDF2 yang dibandingkan
+        attempts: Jumlah login pertama per biaya (login ulang diukur 100 kali lipatnya)
+    """
+    print("\n=== Benchmark Login per Biaya Hash Password ===")
+    print(f"{'Iterasi':>9} | {'Login pertama':>13} | {'Login ulang (sesi)':>18}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_name = os.path.join(tmp_dir, "bench_login")
+        db_manager = DatabaseManager(db_name)
+        db_manager.connect()
+        db_manager.create_tables_if_not_exist()
+        db_manager.save_dosen_data([{"id": 1, "nama": "Dosen Benchmark", "password": "rahasia"}])
+        
+        # Log per login tidak ikut diukur
+        previous_level = logger.level
+        logger.setLevel(logging.WARNING)
+        try:
+            for iterations in costs:
+                db_manager.cursor.execute("UPDATE dosen SET password = ? WHERE id = 1",
+                                          (hash_password("rahasia", iterations),))
+                db_manager.conn.commit()
+                db_manager._invalidate_master_cache("dosen")
+                
+                cold_ms = []
+                for _ in range(attempts):
+                    login_session_cache.clear()
+                    started = time.perf_counter()
+                    status, _ = db_manager.login(1, "rahasia")
+                    cold_ms.append((time.perf_counter() - started) * 1000)
+                
+                warm_attempts = attempts * 100
+                started = time.perf_counter()
+                for _ in range(warm_attempts):
+                    db_manager.login(1, "rahasia")
+                warm_ms = (time.perf_counter() - started) / warm_attempts * 1000
+                
+                print(f"{iterations:>9} | {sum(cold_ms) / len(cold_ms):>10.2f} ms | {warm_ms:>15.4f} ms"
+                      f"{'' if status else '  (login gagal)'}")
+        finally:
+            logger.setLevel(previous_level)
+            login_session_cache.clear()
+        
+        db_manager.close()
+        master_data_cache.invalidate(db_manager.db_name)
+        connection_provider.close_thread_connections()
+    print(f"Biaya saat ini: {PASSWORD_HASH_ITERATIONS} iterasi (ABSENSI_PASSWORD_ITERATIONS)")
+
+
 def main():
     """Fungsi utama yang dijalankan ketika script dieksekusi langsung."""
     logger.info("Menjalankan db-manager.py")
     
-    db_manager = DatabaseManager()
+    # Mode non-interaktif, contoh untuk cron: python db_manager.py refresh-all
+    parser = argparse.ArgumentParser(description="Database manager sistem absensi")
+    parser.add_argument("command", nargs="?", choices=["refresh-all"],
+                        help="Jalankan perintah tanpa menu interaktif")
+    parser.add_argument("--full", action="store_true",
+                        help="Abaikan ETag/hash dan tulis ulang semua baris")
+    parser.add_argument("--db", default="local", help="Nama file database tanpa .db")
+    args = parser.parse_args()
+    
+    db_manager = DatabaseManager(args.db)
+    
+    if args.command == "refresh-all":
+        result = db_manager.process_all_master_data(incremental=not args.full)
+        sys.exit(0 if result["success"] else 1)
     
     while True:
         print("\nPilihan:")
@@ -1251,8 +3442,18 @@ def main():
         print("7. Test tambah absensi")
         print("8. Test sinkronisasi absensi")
         print("9. Proses data mahasiswa")
+        print("10. Benchmark sinkronisasi (server lokal)")
+        print("11. Proses semua data master")
+        print("12. Benchmark ingest mahasiswa streaming (server lokal)")
+        print("13. Benchmark koneksi per klik")
+        print("14. Benchmark profil penyimpanan")
+        print("15. Test query plan (indeks)")
+        print("16. Benchmark antrian absensi")
+        print("17. Statistik cache dosen/kelas")
+        print("18. Benchmark pilih kelas")
+        print("19. Benchmark login (biaya hash password)")
         
-        choice = input("Masukkan pilihan (0-9): ")
+        choice = input("Masukkan pilihan (0-19): ")
         
         try:
             if choice == "0":
@@ -1276,6 +3477,32 @@ def main():
                 db_manager.test_sync_db_to_server()
             elif choice == "9":
                 db_manager.process_mahasiswa_data()
+            elif choice == "10":
+                benchmark_sync()
+            elif choice == "11":
+                db_manager.process_all_master_data()
+            elif choice == "12":
+                benchmark_stream_ingest()
+            elif choice == "13":
+                benchmark_connection_reuse()
+            elif choice == "14":
+                benchmark_storage_profiles()
+            elif choice == "15":
+                db_manager.test_query_plans()
+            elif choice == "16":
+                benchmark_attendance_queue()
+            elif choice == "17":
+                stats = master_data_cache.stats()
+                print(f"\nCache dosen/kelas: {stats['hits']} hit, {stats['misses']} miss "
+                      f"(hit rate {stats['hit_rate'] * 100:.1f}%), {stats['loads']} kali dimuat, "
+                      f"{stats['invalidations']} invalidasi, {stats['entries']} database")
+                sessions = login_session_cache.stats()
+                print(f"Sesi login: {sessions['hits']} hit, {sessions['misses']} miss "
+                      f"(hit rate {sessions['hit_rate'] * 100:.1f}%), {sessions['entries']} sesi tersimpan")
+            elif choice == "18":
+                benchmark_pilih_kelas()
+            elif choice == "19":
+                benchmark_login_cost()
             else:
                 print("Pilihan tidak valid. Silakan coba lagi.")
         except Exception as e:
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Penyimpanan embedding wajah di disk, berdampingan dengan local.db.
+Embedding disimpan sebagai file float32 mentah dan id mahasiswa sebagai file
+int64, keduanya dibuka dengan memory-mapping sehingga membuka store tidak
+perlu membaca atau mendekode seluruh isi file.
+
+Isi folder store:
+    embeddings.f32  baris embedding (n x dim) yang sudah dinormalisasi L2
+    ids.i64         id mahasiswa untuk setiap baris, TOMBSTONE_ID jika dihapus
+    meta.json       dimensi embedding, backend embedding, versi roster mahasiswa
+                    dan generasi file data
+
+Setiap compact() menulis file data generasi baru (embeddings.<g>.f32 dan
+ids.<g>.i64), lalu berpindah ke generasi itu dengan satu penggantian meta.json.
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import argparse
+from typing import Iterable, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from face_gallery import FaceGallery, normalize_rows
+from face_pipeline import DEFAULT_MATCH_THRESHOLD
+
+
+logger = logging.getLogger('embedding-store')
+
+# Folder store bawaan, relatif terhadap folder kerja seperti local.db
+DEFAULT_STORE_DIR = os.environ.get("ABSENSI_EMBEDDING_DIR", "embeddings")
+
+# Penanda baris yang sudah dihapus di ids.i64
+TOMBSTONE_ID = -1
+
+EMBEDDINGS_FILE = "embeddings.f32"
+IDS_FILE = "ids.i64"
+META_FILE = "meta.json"
+
+# Nama file data generasi compaction, generasi 0 memakai nama tanpa nomor
+GENERATION_FILE_PATTERN = re.compile(r"^(embeddings|ids)\.(\d+)\.(f32|i64)$")
+
+
+def roster_version(mahasiswa_ids: Iterable[int]) -> str:
+    """
+    Menghitung versi roster dari daftar id mahasiswa.
+
+    Args:
+        mahasiswa_ids: ID seluruh mahasiswa di tabel mahasiswa
+
+    Returns:
+        Hash sha1 dari id yang sudah diurutkan
+    """
+    ids = np.sort(np.fromiter(mahasiswa_ids, dtype=np.int64))
+    return hashlib.sha1(ids.tobytes()).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Store embedding append-only dengan hapus berbasis tombstone.
+    Baris baru hanya ditambahkan di akhir file dan penghapusan hanya menulis
+    TOMBSTONE_ID di ids.i64, sehingga file tidak pernah ditulis ulang
+    kecuali lewat compact().
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_DIR):
+        """
+        Args:
+            path: Folder store
+        """
+        self.path = path
+        self.meta = {"dim": 0, "backend": None, "roster_version": None}
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        self.open()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @staticmethod
+    def _data_files(generation: int) -> Tuple[str, str]:
+        """Nama file embedding dan id untuk satu generasi compaction."""
+        if generation == 0:
+            return EMBEDDINGS_FILE, IDS_FILE
+        return f"embeddings.{generation}.f32", f"ids.{generation}.i64"
+
+    @property
+    def _embeddings_file(self) -> str:
+        return self._file(self._data_files(self.meta.get("generation", 0))[0])
+
+    @property
+    def _ids_file(self) -> str:
+        return self._file(self._data_files(self.meta.get("generation", 0))[1])
+
+    @property
+    def dim(self) -> int:
+        """Dimensi embedding (0 jika store masih kosong)."""
+        return self.meta["dim"]
+
+    @property
+    def backend(self) -> Optional[str]:
+        """Backend embedding (FaceEmbedder.backend) isi store, None untuk store lama."""
+        return self.meta.get("backend")
+
+    def exists(self) -> bool:
+        """True jika store sudah pernah dibuat di disk."""
+        return os.path.exists(self._file(META_FILE))
+
+    def open(self) -> None:
+        """
+        Memetakan file store ke memori. Jika append terakhir terputus, baris
+        embedding tanpa id (dan baris yang terpotong) dibuang sehingga kedua
+        file berisi jumlah baris lengkap yang sama.
+
+        Raises:
+            ValueError: Jika ids berisi lebih banyak baris daripada embedding;
+                append selalu menulis embedding lebih dulu, jadi pasangan file rusak
+        """
+        if not self.exists():
+            return
+
+        with open(self._file(META_FILE), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        dim = self.dim
+        id_rows = os.path.getsize(self._ids_file) // 8
+        embedding_rows = os.path.getsize(self._embeddings_file) // (dim * 4)
+        if id_rows > embedding_rows:
+            raise ValueError(f"Store {self.path} rusak: {id_rows} id untuk {embedding_rows} embedding")
+        rows = id_rows
+
+        for path, row_bytes in ((self._ids_file, 8), (self._embeddings_file, dim * 4)):
+            if os.path.getsize(path) != rows * row_bytes:
+                logger.warning(f"Memotong {os.path.basename(path)} ke {rows} baris lengkap")
+                os.truncate(path, rows * row_bytes)
+
+        if rows == 0:
+            self.ids = np.zeros(0, dtype=np.int64)
+            self.embeddings = np.zeros((0, dim), dtype=np.float32)
+            return
+
+        self.ids = np.memmap(self._ids_file, dtype=np.int64, mode="r+", shape=(rows,))
+        self.embeddings = np.memmap(self._embeddings_file, dtype=np.float32, mode="r",
+                                    shape=(rows, dim))
+
+    def close(self) -> None:
+        """Melepas memory-map store."""
+        self._release()
+
+    def _release(self) -> None:
+        # Map tidak ditutup paksa karena galeri yang sudah dibuat mungkin masih
+        # memakainya; map dilepas saat referensi terakhir hilang
+        if isinstance(self.ids, np.memmap):
+            self.ids.flush()
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.embeddings = np.zeros((0, self.dim), dtype=np.float32)
+
+    def _write_meta(self) -> None:
+        """Menulis meta.json secara atomik."""
+        temp_path = self._file(META_FILE + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._file(META_FILE))
+
+    def update_meta(self, **values: Any) -> None:
+        """
+        Mengubah nilai di meta.json secara atomik.
+
+        Args:
+            **values: Kunci dan nilai baru
+        """
+        self.meta.update(values)
+        self._write_meta()
+
+    def __len__(self) -> int:
+        """Jumlah baris, termasuk baris yang sudah di-tombstone."""
+        return len(self.ids)
+
+    @property
+    def live_count(self) -> int:
+        """Jumlah baris yang masih aktif."""
+        return int(np.count_nonzero(self.ids != TOMBSTONE_ID))
+
+    def append(self, ids: Iterable[int], embeddings: np.ndarray, backend: Optional[str] = None) -> int:
+        """
+        Menambahkan embedding di akhir store tanpa menulis ulang file.
+
+        Args:
+            ids: ID mahasiswa untuk setiap embedding
+            embeddings: Matriks embedding (n x dim)
+            backend: Backend embedding (FaceEmbedder.backend) yang membuat embedding
+
+        Returns:
+            Jumlah baris yang ditambahkan
+
+        Raises:
+            ValueError: Jika jumlah, dimensi atau backend embedding tidak cocok dengan store
+        """
+        ids = np.asarray(list(ids) if not isinstance(ids, np.ndarray) else ids, dtype=np.int64)
+        embeddings = normalize_rows(np.atleast_2d(embeddings))
+        if len(ids) != len(embeddings):
+            raise ValueError(f"Jumlah id ({len(ids)}) tidak sama dengan jumlah embedding ({len(embeddings)})")
+        if len(ids) == 0:
+            return 0
+        if self.dim and embeddings.shape[1] != self.dim:
+            raise ValueError(f"Dimensi embedding {embeddings.shape[1]} tidak sama dengan store ({self.dim})")
+        if backend and self.backend and backend != self.backend:
+            raise ValueError(f"Backend embedding {backend} tidak sama dengan store ({self.backend})")
+
+        if not self.exists():
+            os.makedirs(self.path, exist_ok=True)
+            self.meta["dim"] = int(embeddings.shape[1])
+            self.meta["backend"] = backend
+            open(self._ids_file, "wb").close()
+            open(self._embeddings_file, "wb").close()
+            self._write_meta()
+
+        # Embedding ditulis lebih dulu: baris tanpa id akan dipotong saat open()
+        self._release()
+        with open(self._embeddings_file, "ab") as f:
+            f.write(embeddings.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._ids_file, "ab") as f:
+            f.write(ids.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.open()
+        logger.info(f"Menambahkan {len(ids)} embedding ke {self.path}")
+        return len(ids)
+
+    def delete(self, mahasiswa_ids: Iterable[int]) -> int:
+        """
+        Menandai semua embedding milik mahasiswa sebagai dihapus (tombstone).
+
+        Args:
+            mahasiswa_ids: ID mahasiswa yang embedding-nya dihapus
+
+        Returns:
+            Jumlah baris yang di-tombstone
+        """
+        if len(self) == 0:
+            return 0
+        mask = np.isin(self.ids, np.fromiter(mahasiswa_ids, dtype=np.int64)) & (self.ids != TOMBSTONE_ID)
+        deleted = int(np.count_nonzero(mask))
+        if deleted:
+            self.ids[mask] = TOMBSTONE_ID
+            self.ids.flush()
+            logger.info(f"Menandai {deleted} embedding sebagai dihapus")
+        return deleted
+
+    def sync_with_roster(self, mahasiswa_ids: Iterable[int]) -> int:
+        """
+        Mencocokkan store dengan tabel mahasiswa: embedding milik mahasiswa yang
+        sudah tidak ada di-tombstone. Tidak melakukan apa-apa jika versi roster sama.
+
+        Args:
+            mahasiswa_ids: ID seluruh mahasiswa di tabel mahasiswa
+
+        Returns:
+            Jumlah baris yang di-tombstone
+        """
+        mahasiswa_ids = list(mahasiswa_ids)
+        if not mahasiswa_ids:
+            # Data mahasiswa belum diunduh, jangan hapus semua embedding
+            return 0
+        version = roster_version(mahasiswa_ids)
+        if not self.exists() or self.meta.get("roster_version") == version:
+            return 0
+
+        live = self.ids[self.ids != TOMBSTONE_ID]
+        removed = np.setdiff1d(live, np.asarray(mahasiswa_ids, dtype=np.int64))
+        deleted = self.delete(removed) if len(removed) else 0
+
+        self.meta["roster_version"] = version
+        self._write_meta()
+        return deleted
+
+    def load(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mengambil id dan embedding yang masih aktif.
+
+        Returns:
+            Tuple (ids, embeddings). ids selalu berupa salinan agar tombstone
+            berikutnya tidak mengubah galeri yang sudah dibuat; tanpa tombstone,
+            embeddings adalah memmap langsung tanpa salinan
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, self.dim), dtype=np.float32)
+        mask = self.ids != TOMBSTONE_ID
+        if mask.all():
+            return np.array(self.ids), self.embeddings
+        return np.array(self.ids[mask]), np.asarray(self.embeddings[mask])
+
+    def to_gallery(self, threshold: float = DEFAULT_MATCH_THRESHOLD) -> FaceGallery:
+        """
+        Membuat FaceGallery dari embedding yang masih aktif.
+
+        Args:
+            threshold: Skor kemiripan minimal galeri
+
+        Returns:
+            FaceGallery (kosong jika store belum ada)
+        """
+        ids, embeddings = self.load()
+        return FaceGallery(ids, embeddings, threshold, normalized=True, backend=self.backend)
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Menulis ulang store tanpa baris tombstone. Kedua file data ditulis
+        sebagai generasi baru, lalu store berpindah ke generasi itu dengan satu
+        penggantian meta.json yang atomik. Jika proses terhenti sebelum meta
+        diganti, store tetap memakai generasi lama yang utuh.
+
+        Returns:
+            Dictionary berisi jumlah baris sebelum dan sesudah compaction
+        """
+        before = len(self)
+        ids, embeddings = self.load()
+        ids, embeddings = np.array(ids), np.array(embeddings)
+        self._release()
+
+        generation = self.meta.get("generation", 0) + 1
+        for name, array in zip(self._data_files(generation), (embeddings, ids)):
+            with open(self._file(name), "wb") as f:
+                f.write(array.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.meta["generation"] = generation
+        self._write_meta()
+        self._remove_stale_generations()
+
+        self.open()
+        logger.info(f"Compaction {self.path}: {before} -> {len(self)} baris")
+        return {"before": before, "after": len(self)}
+
+    def _remove_stale_generations(self) -> None:
+        """Menghapus file data generasi selain generasi aktif, termasuk sisa compaction yang terputus."""
+        active = set(self._data_files(self.meta.get("generation", 0)))
+        for name in os.listdir(self.path):
+            if name in active or not (name in (EMBEDDINGS_FILE, IDS_FILE) or GENERATION_FILE_PATTERN.match(name)):
+                continue
+            try:
+                os.remove(self._file(name))
+            except OSError as e:
+                # Di Windows file yang masih dipetakan proses lain belum bisa dihapus
+                logger.warning(f"File {name} belum bisa dihapus: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Ringkasan isi store."""
+        return {
+            "path": self.path,
+            "dim": self.dim,
+            "backend": self.backend,
+            "rows": len(self),
+            "live": self.live_count,
+            "tombstones": len(self) - self.live_count,
+            "students": int(len(np.unique(self.ids[self.ids != TOMBSTONE_ID]))) if len(self) else 0,
+            "roster_version": self.meta.get("roster_version"),
+            "generation": self.meta.get("generation", 0),
+        }
+
+
+def main():
+    """Perintah pengelolaan store embedding dari command line."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Pengelolaan store embedding wajah")
+    parser.add_argument("command", choices=["info", "compact", "sync"],
+                        help="info: ringkasan store, compact: buang tombstone, "
+                             "sync: cocokkan dengan tabel mahasiswa")
+    parser.add_argument("--path", default=DEFAULT_STORE_DIR, help="Folder store embedding")
+    parser.add_argument("--db", default="local", help="Nama database (tanpa .db) untuk sync")
+    args = parser.parse_args()
+
+    store = EmbeddingStore(args.path)
+    if not store.exists():
+        print(f"Store embedding {args.path} belum ada")
+        sys.exit(1)
+
+    if args.command == "compact":
+        result = store.compact()
+        print(f"Compaction selesai: {result['before']} -> {result['after']} baris")
+    elif args.command == "sync":
+        from db_manager import DatabaseManager
+        db_manager = DatabaseManager(args.db)
+        db_manager.connect()
+        try:
+            deleted = store.sync_with_roster(db_manager.get_mahasiswa_ids())
+        finally:
+            db_manager.close()
+        print(f"Sinkronisasi roster selesai: {deleted} embedding dihapus")
+
+    for key, value in store.stats().items():
+        print(f"{key:<15}: {value}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Enrollment wajah ("Train") secara batch.
+Foto mahasiswa dibaca dari folder dataset/<mahasiswa_id>/*.jpg, lalu setiap foto
+dideteksi, dipotong (align) dan dibuat embedding-nya di process pool yang
+memakai semua core CPU. Embedding per mahasiswa dirata-rata dan ditulis ke
+store embedding. Foto yang sudah diproses dilewati berdasarkan hash kontennya,
+sehingga enrollment yang terputus bisa dilanjutkan: mahasiswa yang fotonya
+sudah tercatat di database tetapi belum masuk store ditulis di run berikutnya.
+"""
+
+import os
+import sys
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import multiprocessing
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from db_manager import DatabaseManager
+from embedding_store import EmbeddingStore, DEFAULT_STORE_DIR
+from face_pipeline import FaceDetector, FaceEmbedder, MODEL_DIR, IMAGE_EXTENSIONS, face_box
+
+
+logger = logging.getLogger('enrollment')
+
+# Folder dataset bawaan: satu subfolder per mahasiswa.id
+DEFAULT_DATASET_DIR = os.environ.get("ABSENSI_DATASET_DIR", "dataset")
+
+# Margin di sekitar kotak wajah saat memotong foto, relatif terhadap ukuran wajah
+FACE_MARGIN = 0.2
+
+# Hasil disimpan ke database setiap sekian foto agar progress tidak hilang saat terputus
+SAVE_EVERY = 50
+
+# Detektor dan embedder milik setiap proses worker, dibuat sekali di _init_worker
+_worker_detector = None
+_worker_embedder = None
+
+
+def scan_dataset(dataset_dir: str) -> List[Tuple[int, str]]:
+    """
+    Mencari foto enrollment di folder dataset.
+
+    Args:
+        dataset_dir: Folder berisi subfolder bernama mahasiswa.id
+
+    Returns:
+        List (mahasiswa_id, path foto), terurut berdasarkan path
+    """
+    images = []
+    for entry in sorted(os.listdir(dataset_dir)):
+        folder = os.path.join(dataset_dir, entry)
+        if not os.path.isdir(folder):
+            continue
+        if not entry.isdigit():
+            logger.warning(f"Folder {folder} dilewati: nama folder harus mahasiswa.id")
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                images.append((int(entry), os.path.join(folder, name)))
+    return images
+
+
+def file_hash(path: str) -> str:
+    """Menghitung hash sha1 isi file."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def align_box(box: Tuple[int, int, int, int], width: int, height: int,
+              margin: float = FACE_MARGIN) -> Tuple[int, int, int, int]:
+    """
+    Memperbesar kotak wajah menjadi persegi dengan margin, dibatasi tepi foto.
+    Hanya dipakai jika detektor tidak memberi landmark (Haar); wajah dari YuNet
+    di-align oleh FaceEmbedder.
+
+    Args:
+        box: Kotak wajah (x, y, w, h)
+        width: Lebar foto
+        height: Tinggi foto
+        margin: Margin relatif terhadap sisi wajah terpanjang
+
+    Returns:
+        Kotak persegi (x, y, w, h)
+    """
+    x, y, w, h = box
+    side = int(max(w, h) * (1 + 2 * margin))
+    cx, cy = x + w // 2, y + h // 2
+    x0, y0 = max(0, cx - side // 2), max(0, cy - side // 2)
+    x1, y1 = min(width, x0 + side), min(height, y0 + side)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def _init_worker(model_dir: str) -> None:
+    """Membuat detektor dan embedder sekali per proses worker."""
+    global _worker_detector, _worker_embedder
+    # Setiap proses memakai satu thread OpenCV agar tidak berebut core
+    cv2.setNumThreads(1)
+    _worker_detector = FaceDetector(model_dir)
+    _worker_embedder = FaceEmbedder(model_dir)
+
+
+def _embed_image(task: Tuple[int, str, str]) -> Dict[str, Any]:
+    """
+    Memproses satu foto enrollment di proses worker.
+
+    Args:
+        task: (mahasiswa_id, path foto, hash konten)
+
+    Returns:
+        Dictionary hasil berisi status "ok", "no_face" atau "error" dan embedding (bytes)
+    """
+    mahasiswa_id, path, content_hash = task
+    result = {"hash": content_hash, "mahasiswa_id": mahasiswa_id, "path": path,
+              "backend": _worker_embedder.backend, "status": "error", "embedding": None}
+
+    image = cv2.imread(path)
+    if image is None:
+        return result
+
+    faces = _worker_detector.detect_faces(image)
+    if not faces:
+        result["status"] = "no_face"
+        return result
+
+    # Foto enrollment berisi satu orang: ambil wajah terbesar
+    largest = max(faces, key=lambda face: face[2] * face[3])
+    if len(largest) >= FaceEmbedder.YUNET_ROW_LENGTH:
+        # Landmark YuNet tersedia: embedder meng-align wajah sama seperti saat absensi
+        embedding = _worker_embedder.embed(image, [largest])[0]
+    else:
+        aligned = align_box(face_box(largest), image.shape[1], image.shape[0])
+        embedding = _worker_embedder.embed(image, [aligned])[0]
+
+    result["status"] = "ok"
+    result["embedding"] = embedding.astype(np.float32).tobytes()
+    return result
+
+
+def enroll(dataset_dir: str = DEFAULT_DATASET_DIR, store_path: str = DEFAULT_STORE_DIR,
+           workers: Optional[int] = None, db_name: str = "local",
+           progress_callback: Optional[Callable[[int, int], None]] = None,
+           cancel_event: Optional[threading.Event] = None) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Menjalankan enrollment untuk semua foto baru di folder dataset.
+
+    Args:
+        dataset_dir: Folder dataset (subfolder per mahasiswa.id)
+        store_path: Folder store embedding
+        workers: Jumlah proses worker (default semua core CPU)
+        db_name: Nama database (tanpa .db)
+        progress_callback: Dipanggil dengan (jumlah foto diproses, jumlah foto baru)
+        cancel_event: Jika di-set, enrollment berhenti; hasil yang sudah ada tetap disimpan
+
+    Returns:
+        Tuple berisi status (True/False) dan ringkasan hasil
+    """
+    if not os.path.isdir(dataset_dir):
+        return False, {"message": f"Folder dataset {dataset_dir} tidak ditemukan"}
+
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    backend = FaceEmbedder(MODEL_DIR).backend
+
+    db_manager = DatabaseManager(db_name)
+    try:
+        db_manager.connect()
+        db_manager.create_tables_if_not_exist()
+
+        images = scan_dataset(dataset_dir)
+        known = db_manager.get_enrolled_hashes(backend)
+        pending = []
+        for mahasiswa_id, path in images:
+            content_hash = file_hash(path)
+            if content_hash not in known:
+                pending.append((mahasiswa_id, path, content_hash))
+                # Foto kembar dalam satu dataset cukup diproses sekali
+                known.add(content_hash)
+
+        stats = {
+            "images": len(images),
+            "skipped": len(images) - len(pending),
+            "processed": 0,
+            "ok": 0,
+            "no_face": 0,
+            "error": 0,
+            "students": 0,
+            "workers": workers,
+            "backend": backend,
+            "cancelled": False,
+        }
+        logger.info(f"Enrollment: {len(images)} foto, {len(pending)} baru, {workers} worker")
+
+        touched = set()
+        if pending:
+            buffer = []
+            # spawn agar aman dipanggil dari thread Qt (fork dari proses multi-thread tidak aman)
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(min(workers, len(pending)), initializer=_init_worker,
+                              initargs=(MODEL_DIR,)) as pool:
+                for result in pool.imap_unordered(_embed_image, pending, chunksize=4):
+                    buffer.append(result)
+                    stats["processed"] += 1
+                    stats[result["status"]] += 1
+                    if result["status"] == "ok":
+                        touched.add(result["mahasiswa_id"])
+
+                    if len(buffer) >= SAVE_EVERY:
+                        db_manager.save_enrollment_results(buffer)
+                        buffer = []
+                    if progress_callback:
+                        progress_callback(stats["processed"], len(pending))
+                    if cancel_event is not None and cancel_event.is_set():
+                        stats["cancelled"] = True
+                        pool.terminate()
+                        break
+
+            if buffer:
+                db_manager.save_enrollment_results(buffer)
+
+        # Termasuk mahasiswa dari run sebelumnya yang terhenti sebelum store ditulis
+        touched.update(_students_missing_from_store(db_manager, store_path, backend))
+        stats["students"] = _write_student_embeddings(db_manager, store_path, sorted(touched), backend)
+    except Exception as e:
+        logger.error(f"Enrollment gagal: {e}")
+        return False, {"message": str(e)}
+    finally:
+        db_manager.close()
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_seconds"] = round(elapsed, 2)
+    stats["images_per_second"] = round(stats["processed"] / elapsed, 2) if elapsed > 0 else 0.0
+    logger.info(f"Enrollment selesai: {stats}")
+    return True, stats
+
+
+def _students_missing_from_store(db_manager: DatabaseManager, store_path: str, backend: str) -> set:
+    """
+    Mencari mahasiswa yang foto enrollment-nya sudah tersimpan di database tetapi
+    belum tercermin di store: foto yang diproses setelah penulisan store terakhir
+    (meta "enrolled_at") dan mahasiswa yang belum punya baris aktif di store.
+
+    Args:
+        db_manager: DatabaseManager yang sudah terhubung
+        store_path: Folder store embedding
+        backend: Nama backend embedding
+
+    Returns:
+        Set ID mahasiswa yang embedding-nya perlu ditulis ulang
+    """
+    store = EmbeddingStore(store_path)
+    try:
+        live_ids = set(store.load()[0].tolist())
+        enrolled_at = store.meta.get("enrolled_at") if store.backend == backend else None
+    finally:
+        store.close()
+
+    students = set(db_manager.get_enrollment_students(backend, enrolled_at))
+    missing = set(db_manager.get_enrollment_students(backend)) - live_ids
+    roster = set(db_manager.get_mahasiswa_ids())
+    if roster:
+        # Mahasiswa yang sudah dihapus dari roster sengaja di-tombstone oleh sync_with_roster
+        missing &= roster
+    students.update(missing)
+    if students:
+        logger.info(f"{len(students)} mahasiswa dari enrollment sebelumnya belum ada di store")
+    return students
+
+
+def _write_student_embeddings(db_manager: DatabaseManager, store_path: str,
+                              mahasiswa_ids: List[int], backend: str) -> int:
+    """
+    Menghitung rata-rata embedding setiap mahasiswa dari seluruh fotonya
+    (termasuk foto dari enrollment sebelumnya) dan mengganti barisnya di store.
+
+    Args:
+        db_manager: DatabaseManager yang sudah terhubung
+        store_path: Folder store embedding
+        mahasiswa_ids: Mahasiswa yang mendapat foto baru
+        backend: Nama backend embedding
+
+    Returns:
+        Jumlah mahasiswa yang embedding-nya diperbarui
+    """
+    if not mahasiswa_ids:
+        return 0
+
+    enrolled_at = db_manager.get_last_enrollment_time(backend)
+    per_student = db_manager.get_enrollment_embeddings(mahasiswa_ids, backend)
+    ids = sorted(per_student)
+    if not ids:
+        return 0
+    means = np.stack([
+        np.frombuffer(b"".join(per_student[mahasiswa_id]), dtype=np.float32)
+        .reshape(len(per_student[mahasiswa_id]), -1).mean(axis=0)
+        for mahasiswa_id in ids
+    ])
+
+    # Baris lama di-tombstone, rata-rata baru ditambahkan di akhir store
+    store = EmbeddingStore(store_path)
+    if store.backend and store.backend != backend:
+        store.close()
+        raise ValueError(f"Store {store_path} berisi embedding backend {store.backend}, "
+                         f"enrollment memakai {backend}")
+    store.delete(ids)
+    store.append(ids, means, backend)
+    # Dicatat terakhir: jika terhenti sebelum ini, run berikutnya menulis ulang mahasiswa yang sama
+    store.update_meta(enrolled_at=enrolled_at, backend=backend)
+    store.close()
+    return len(ids)
+
+
+def main():
+    """Menjalankan enrollment dari command line."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Enrollment wajah mahasiswa dari folder foto")
+    parser.add_argument("dataset", nargs="?", default=DEFAULT_DATASET_DIR,
+                        help="Folder dataset dengan subfolder per mahasiswa.id")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses (default semua core)")
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR, help="Folder store embedding")
+    parser.add_argument("--db", default="local", help="Nama database (tanpa .db)")
+    args = parser.parse_args()
+
+    def print_progress(done, total):
+        print(f"\rMemproses foto {done}/{total}", end="", flush=True)
+
+    status, result = enroll(args.dataset, args.store, args.workers, args.db, print_progress)
+    print()
+    if not status:
+        print(f"Enrollment gagal: {result['message']}")
+        sys.exit(1)
+
+    print(f"\n=== Enrollment selesai dalam {result['elapsed_seconds']} detik ===")
+    print(f"Foto          : {result['images']} ({result['skipped']} sudah diproses sebelumnya)")
+    print(f"Diproses      : {result['processed']} ({result['images_per_second']} foto/detik, {result['workers']} worker)")
+    print(f"Berhasil      : {result['ok']}")
+    print(f"Tanpa wajah   : {result['no_face']}")
+    print(f"Gagal dibaca  : {result['error']}")
+    print(f"Mahasiswa     : {result['students']} diperbarui")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Galeri embedding wajah di memori.
+Semua embedding disimpan sebagai satu matriks float32 kontigu yang sudah
+dinormalisasi L2, sehingga pencocokan satu batch wajah cukup satu perkalian
+matriks ditambah pemilihan top-k.
+"""
+
+import time
+import logging
+import argparse
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from face_pipeline import SimpleMatcher, DEFAULT_MATCH_THRESHOLD
+
+
+logger = logging.getLogger('face-gallery')
+
+# Ukuran galeri yang diukur oleh benchmark
+BENCHMARK_SIZES = (1000, 10000, 100000)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Menormalisasi L2 setiap baris matriks.
+
+    Args:
+        matrix: Matriks embedding (n x dim)
+
+    Returns:
+        Matriks float32 kontigu dengan panjang setiap baris 1 (baris nol tetap nol)
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class FaceGallery:
+    """
+    Galeri embedding wajah: matriks embedding (n x dim) dan array id mahasiswa.
+    Satu mahasiswa boleh memiliki lebih dari satu baris embedding.
+    """
+
+    def __init__(self, ids: Optional[Iterable[int]] = None, embeddings: Optional[np.ndarray] = None,
+                 threshold: float = DEFAULT_MATCH_THRESHOLD, normalized: bool = False,
+                 backend: Optional[str] = None):
+        """
+        Args:
+            ids: ID mahasiswa untuk setiap baris embedding
+            embeddings: Matriks embedding (n x dim)
+            threshold: Skor kemiripan minimal agar wajah dianggap dikenali
+            normalized: True jika embeddings sudah dinormalisasi L2
+            backend: Backend embedding (FaceEmbedder.backend) asal galeri, None jika tidak diketahui
+        """
+        self.threshold = threshold
+        self.backend = backend
+        if embeddings is None or len(embeddings) == 0:
+            self.ids = np.zeros(0, dtype=np.int64)
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+            return
+
+        self.ids = np.asarray(list(ids) if not isinstance(ids, np.ndarray) else ids, dtype=np.int64)
+        self.matrix = (np.ascontiguousarray(embeddings, dtype=np.float32) if normalized
+                       else normalize_rows(embeddings))
+        if len(self.ids) != len(self.matrix):
+            raise ValueError(f"Jumlah id ({len(self.ids)}) tidak sama dengan jumlah embedding ({len(self.matrix)})")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        """Dimensi embedding galeri (0 jika galeri kosong)."""
+        return self.matrix.shape[1]
+
+    def add(self, ids: Iterable[int], embeddings: np.ndarray) -> None:
+        """
+        Menambahkan embedding ke galeri.
+
+        Args:
+            ids: ID mahasiswa untuk setiap embedding baru
+            embeddings: Matriks embedding baru (n x dim)
+        """
+        addition = FaceGallery(ids, embeddings, self.threshold, backend=self.backend)
+        if len(self) == 0:
+            self.ids, self.matrix = addition.ids, addition.matrix
+            return
+        self.ids = np.concatenate([self.ids, addition.ids])
+        self.matrix = np.ascontiguousarray(np.vstack([self.matrix, addition.matrix]))
+
+    def restrict(self, allowed_ids: Iterable[int]) -> "FaceGallery":
+        """
+        Membuat galeri baru yang hanya berisi mahasiswa tertentu, misalnya
+        mahasiswa dari kodeKelas yang sedang aktif.
+
+        Args:
+            allowed_ids: ID mahasiswa yang boleh dicocokkan
+
+        Returns:
+            FaceGallery baru dengan salinan baris yang terpilih
+        """
+        mask = np.isin(self.ids, np.fromiter(allowed_ids, dtype=np.int64))
+        return FaceGallery(self.ids[mask], self.matrix[mask], self.threshold, normalized=True,
+                           backend=self.backend)
+
+    def search(self, probes: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mencari k embedding galeri yang paling mirip untuk setiap probe.
+
+        Args:
+            probes: Matriks embedding probe (m x dim), sudah dinormalisasi L2
+            k: Jumlah kandidat per probe
+
+        Returns:
+            Tuple (ids, scores), masing-masing berukuran (m x k) dan terurut dari skor tertinggi
+
+        Raises:
+            ValueError: Jika dimensi probe berbeda dengan dimensi galeri
+        """
+        probes = np.atleast_2d(np.ascontiguousarray(probes, dtype=np.float32))
+        if len(self) and probes.shape[-1] != self.dim:
+            raise ValueError(f"Dimensi embedding probe {probes.shape[-1]} tidak sama dengan galeri ({self.dim}), "
+                             f"periksa backend embedding")
+        k = min(k, len(self))
+        if k == 0:
+            empty = np.zeros((len(probes), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        # Satu perkalian matriks untuk seluruh batch: skor kosinus (m x n)
+        scores = probes @ self.matrix.T
+
+        if k < len(self):
+            # argpartition O(n), lalu urutkan hanya k kandidat teratas
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(len(self)), (len(probes), len(self)))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return self.ids[top], np.take_along_axis(top_scores, order, axis=1)
+
+    def identify(self, embeddings: np.ndarray) -> List[Tuple[Optional[int], float]]:
+        """
+        Mencari mahasiswa yang paling mirip untuk setiap embedding. Antarmuka
+        sama dengan SimpleMatcher sehingga bisa dipakai RecognitionPipeline.
+
+        Args:
+            embeddings: Matriks embedding probe (m x dim)
+
+        Returns:
+            List (mahasiswa_id atau None jika di bawah threshold, skor kemiripan)
+        """
+        if len(self) == 0:
+            return [(None, 0.0) for _ in range(len(embeddings))]
+        ids, scores = self.search(embeddings, k=1)
+        return [(int(i) if s >= self.threshold else None, float(s))
+                for i, s in zip(ids[:, 0], scores[:, 0])]
+
+
+def random_gallery(size: int, dim: int = 128, seed: int = 0) -> FaceGallery:
+    """
+    Membuat galeri acak untuk pengujian.
+
+    Args:
+        size: Jumlah identitas
+        dim: Dimensi embedding
+        seed: Seed generator acak
+
+    Returns:
+        FaceGallery berisi satu embedding per identitas
+    """
+    rng = np.random.default_rng(seed)
+    return FaceGallery(np.arange(1, size + 1), rng.standard_normal((size, dim), dtype=np.float32))
+
+
+def benchmark_gallery(sizes: Iterable[int] = BENCHMARK_SIZES, dim: int = 128, batch: int = 8,
+                      k: int = 5, repeats: int = 20, loop_limit: int = 10000) -> List[Dict[str, Any]]:
+    """
+    Membandingkan pencocokan matriks FaceGallery dengan pencocokan satu per satu
+    (SimpleMatcher) untuk beberapa ukuran galeri.
+
+    Args:
+        sizes: Ukuran galeri yang diuji
+        dim: Dimensi embedding
+        batch: Jumlah wajah probe per frame
+        k: Jumlah kandidat top-k
+        repeats: Jumlah pengulangan pencarian per ukuran
+        loop_limit: Ukuran galeri maksimal untuk pengukuran SimpleMatcher
+
+    Returns:
+        List hasil per ukuran galeri
+    """
+    rng = np.random.default_rng(1)
+    results = []
+
+    for size in sizes:
+        gallery = random_gallery(size, dim)
+        # Probe = embedding galeri ditambah noise, jadi jawaban benar diketahui
+        truth = rng.integers(0, size, batch)
+        probes = normalize_rows(gallery.matrix[truth] + 0.05 * rng.standard_normal((batch, dim), dtype=np.float32))
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            ids, _ = gallery.search(probes, k)
+        matrix_ms = (time.perf_counter() - started) / repeats * 1000
+        correct = int(np.sum(ids[:, 0] == gallery.ids[truth]))
+
+        loop_ms = None
+        if size <= loop_limit:
+            matcher = SimpleMatcher()
+            for mahasiswa_id, embedding in zip(gallery.ids, gallery.matrix):
+                matcher.add(int(mahasiswa_id), embedding)
+            started = time.perf_counter()
+            matcher.identify(probes)
+            loop_ms = (time.perf_counter() - started) * 1000
+
+        result = {
+            "size": size,
+            "batch": batch,
+            "matrix_ms": round(matrix_ms, 3),
+            "loop_ms": round(loop_ms, 3) if loop_ms is not None else None,
+            "speedup": round(loop_ms / matrix_ms, 1) if loop_ms else None,
+            "correct": correct,
+            "gallery_mb": round(gallery.matrix.nbytes / (1024 * 1024), 1),
+        }
+        logger.info(f"Benchmark galeri {size}: {result}")
+        results.append(result)
+
+    return results
+
+
+def main():
+    """Menjalankan benchmark galeri dari command line."""
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Benchmark pencocokan galeri embedding wajah")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BENCHMARK_SIZES), help="Ukuran galeri")
+    parser.add_argument("--dim", type=int, default=128, help="Dimensi embedding")
+    parser.add_argument("--batch", type=int, default=8, help="Jumlah wajah probe per frame")
+    parser.add_argument("--k", type=int, default=5, help="Jumlah kandidat top-k")
+    args = parser.parse_args()
+
+    print(f"\n=== Benchmark galeri (dim {args.dim}, {args.batch} wajah per frame, top-{args.k}) ===")
+    print(f"{'Identitas':>10} | {'Matriks':>10} | {'Satu-satu':>10} | {'Speedup':>8} | {'Benar':>5} | {'Memori':>8}")
+    print("-" * 68)
+    for result in benchmark_gallery(args.sizes, args.dim, args.batch, args.k):
+        loop_ms = f"{result['loop_ms']:.2f} ms" if result["loop_ms"] is not None else "-"
+        speedup = f"{result['speedup']}x" if result["speedup"] else "-"
+        print(f"{result['size']:>10} | {result['matrix_ms']:>7.2f} ms | {loop_ms:>10} | {speedup:>8} | "
+              f"{result['correct']:>2}/{result['batch']:<2} | {result['gallery_mb']:>5} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,975 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Pipeline pengenalan wajah untuk layar absensi.
+Alur: capture -> detect -> embed -> match -> catat absensi.
+Modul ini tidak bergantung pada Qt sehingga bisa dijalankan tanpa layar
+(headless), misalnya dengan sumber berupa file video atau folder gambar.
+"""
+
+import os
+import time
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+logger = logging.getLogger('face-pipeline')
+
+# Folder model ONNX opsional (YuNet untuk deteksi, SFace untuk embedding)
+MODEL_DIR = os.environ.get("ABSENSI_MODEL_DIR", "models")
+YUNET_MODEL = "face_detection_yunet_2023mar.onnx"
+SFACE_MODEL = "face_recognition_sface_2021dec.onnx"
+
+# Sumber kamera bawaan: indeks webcam, path file video, atau folder gambar.
+# Beberapa kamera dipisah koma, contoh "0,1" atau "depan.mp4,belakang.mp4"
+DEFAULT_CAMERA_SOURCE = os.environ.get("ABSENSI_CAMERA", "0")
+
+# Target FPS bawaan loop pengenalan
+DEFAULT_TARGET_FPS = 10.0
+
+# Skor kemiripan kosinus minimal agar wajah dianggap dikenali
+DEFAULT_MATCH_THRESHOLD = 0.6
+
+# Deteksi hanya dijalankan setiap sekian frame, di antaranya wajah diikuti tracker
+DEFAULT_DETECT_INTERVAL = 5
+
+# IoU minimal agar kotak deteksi baru dianggap wajah (track) yang sama
+TRACK_IOU_THRESHOLD = 0.3
+
+# Track dihapus setelah sekian deteksi berturut-turut tidak menemukan wajahnya
+TRACK_MAX_MISSES = 2
+
+# Ekstensi file yang dibaca oleh ImageDirectorySource
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    """Sumber frame untuk pipeline. Subclass mengimplementasikan _read_frame."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def open(self) -> None:
+        """Membuka sumber frame."""
+
+    def read(self) -> Optional[np.ndarray]:
+        """
+        Membaca frame berikutnya.
+
+        Returns:
+            Frame BGR (uint8, HxWx3) atau None jika sumber sudah habis
+        """
+        return self._read_frame()
+
+    def _read_frame(self) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Menutup sumber frame."""
+
+
+class CaptureSource(FrameSource):
+    """Sumber frame dari cv2.VideoCapture (webcam atau file video)."""
+
+    def __init__(self, name: str, target: Any, loop: bool = False):
+        super().__init__(name)
+        self.target = target
+        self.loop = loop
+        self.capture = None
+
+    def open(self) -> None:
+        self.capture = cv2.VideoCapture(self.target)
+        if not self.capture.isOpened():
+            raise IOError(f"Tidak dapat membuka sumber video {self.target}")
+
+    def _read_frame(self) -> Optional[np.ndarray]:
+        if self.capture is None:
+            return None
+        ok, frame = self.capture.read()
+        if not ok and self.loop:
+            # Ulangi file video dari awal
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.capture.read()
+        return frame if ok else None
+
+    def close(self) -> None:
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+
+class WebcamSource(CaptureSource):
+    """Sumber frame dari webcam berdasarkan indeks perangkat."""
+
+    def __init__(self, index: int = 0):
+        super().__init__(f"webcam:{index}", index)
+
+
+class VideoFileSource(CaptureSource):
+    """Sumber frame dari file video, bisa diulang terus untuk pengujian."""
+
+    def __init__(self, path: str, loop: bool = False):
+        super().__init__(f"video:{os.path.basename(path)}", path, loop)
+
+
+class ImageDirectorySource(FrameSource):
+    """Sumber frame dari folder berisi gambar, dibaca urut berdasarkan nama file."""
+
+    def __init__(self, path: str, loop: bool = False):
+        super().__init__(f"images:{os.path.basename(os.path.normpath(path))}")
+        self.path = path
+        self.loop = loop
+        self.files = []
+        self.index = 0
+
+    def open(self) -> None:
+        self.files = sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.files:
+            raise IOError(f"Tidak ada gambar di folder {self.path}")
+        self.index = 0
+
+    def _read_frame(self) -> Optional[np.ndarray]:
+        while self.index < len(self.files):
+            frame = cv2.imread(self.files[self.index])
+            self.index += 1
+            if self.loop and self.index >= len(self.files):
+                self.index = 0
+            if frame is not None:
+                return frame
+            logger.warning(f"Gagal membaca gambar {self.files[self.index - 1]}")
+        return None
+
+
+def open_frame_source(spec: str, loop: bool = False) -> FrameSource:
+    """
+    Membuat FrameSource dari string konfigurasi.
+
+    Args:
+        spec: Angka untuk indeks webcam, path folder untuk gambar, atau path file video
+        loop: Ulangi file video/folder gambar dari awal setelah habis
+
+    Returns:
+        FrameSource yang belum dibuka
+    """
+    spec = str(spec).strip()
+    if spec.isdigit():
+        return WebcamSource(int(spec))
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, loop)
+    return VideoFileSource(spec, loop)
+
+
+def parse_camera_sources(spec: str = DEFAULT_CAMERA_SOURCE) -> List[str]:
+    """
+    Memecah konfigurasi kamera menjadi daftar sumber.
+
+    Args:
+        spec: Satu atau beberapa sumber dipisah koma
+
+    Returns:
+        List spec sumber (minimal satu)
+    """
+    sources = [part.strip() for part in str(spec).split(",") if part.strip()]
+    return sources or ["0"]
+
+
+class StageTimer:
+    """Mencatat durasi setiap tahap pipeline (terakhir dan rata-rata bergerak)."""
+
+    def __init__(self, smoothing: float = 0.1):
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Context manager untuk mengukur satu tahap."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - started) * 1000)
+
+    def record(self, stage: str, elapsed_ms: float) -> None:
+        """Mencatat durasi satu tahap dalam milidetik."""
+        with self._lock:
+            stats = self._stats.get(stage)
+            if stats is None:
+                self._stats[stage] = {"last_ms": elapsed_ms, "avg_ms": elapsed_ms, "count": 1}
+            else:
+                stats["last_ms"] = elapsed_ms
+                stats["avg_ms"] += self.smoothing * (elapsed_ms - stats["avg_ms"])
+                stats["count"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Salinan statistik semua tahap."""
+        with self._lock:
+            return {stage: dict(stats) for stage, stats in self._stats.items()}
+
+
+def face_box(face: Any) -> Tuple[int, int, int, int]:
+    """
+    Mengambil kotak wajah dari satu hasil deteksi.
+
+    Args:
+        face: Kotak (x, y, w, h) atau baris YuNet (kotak, 5 landmark, skor)
+
+    Returns:
+        Kotak wajah (x, y, w, h) dalam piksel
+    """
+    return tuple(int(v) for v in face[:4])
+
+
+class FaceDetector:
+    """
+    Detektor wajah. Memakai YuNet (cv2.FaceDetectorYN) jika model ada di MODEL_DIR,
+    selain itu memakai Haar cascade bawaan OpenCV.
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR, min_size: int = 60):
+        self.min_size = min_size
+        yunet_path = os.path.join(model_dir, YUNET_MODEL)
+        self.yunet = None
+        self.cascade = None
+        if os.path.exists(yunet_path) and hasattr(cv2, "FaceDetectorYN"):
+            self.yunet = cv2.FaceDetectorYN.create(yunet_path, "", (320, 320))
+            self.backend = "yunet"
+        elif hasattr(cv2, "CascadeClassifier"):
+            self.cascade = cv2.CascadeClassifier(
+                os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+            )
+            self.backend = "haar"
+        else:
+            # OpenCV 5 tidak lagi menyertakan Haar cascade di paket utama
+            raise RuntimeError(f"Haar cascade tidak tersedia di OpenCV {cv2.__version__}, "
+                               f"letakkan model {YUNET_MODEL} di folder {model_dir}")
+
+    def detect_faces(self, frame: np.ndarray) -> List[np.ndarray]:
+        """
+        Mendeteksi wajah pada frame beserta landmark-nya jika ada.
+
+        Args:
+            frame: Frame BGR
+
+        Returns:
+            List baris float32: baris YuNet lengkap (kotak, 5 landmark, skor) yang
+            dipakai FaceEmbedder untuk alignment, atau kotak (x, y, w, h) untuk Haar
+        """
+        if self.yunet is not None:
+            height, width = frame.shape[:2]
+            self.yunet.setInputSize((width, height))
+            _, faces = self.yunet.detect(frame)
+            if faces is None:
+                return []
+            return [face for face in faces if face[2] >= self.min_size and face[3] >= self.min_size]
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5,
+                                              minSize=(self.min_size, self.min_size))
+        return [np.asarray(face, dtype=np.float32) for face in faces]
+
+    def detect(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """
+        Mendeteksi wajah pada frame.
+
+        Args:
+            frame: Frame BGR
+
+        Returns:
+            List kotak wajah (x, y, w, h)
+        """
+        return [face_box(face) for face in self.detect_faces(frame)]
+
+
+class FaceEmbedder:
+    """
+    Pembuat embedding wajah. Memakai SFace (cv2.FaceRecognizerSF) jika model ada
+    di MODEL_DIR. Wajah dari YuNet di-align dengan landmark-nya lewat
+    FaceRecognizerSF.alignCrop seperti yang diharapkan SFace. Tanpa model, memakai
+    embedding piksel sederhana: wajah abu-abu 16x16 yang di-equalize, dikurangi
+    rata-rata dan dinormalisasi L2.
+    """
+
+    # Panjang baris YuNet: kotak (4), 5 landmark (10) dan skor
+    YUNET_ROW_LENGTH = 15
+
+    PIXEL_SIZE = 16
+
+    def __init__(self, model_dir: str = MODEL_DIR):
+        sface_path = os.path.join(model_dir, SFACE_MODEL)
+        self.sface = None
+        if os.path.exists(sface_path) and hasattr(cv2, "FaceRecognizerSF"):
+            self.sface = cv2.FaceRecognizerSF.create(sface_path, "")
+            self.backend = "sface"
+            self.dim = 128
+        else:
+            self.backend = "pixel"
+            self.dim = self.PIXEL_SIZE * self.PIXEL_SIZE
+
+    def embed(self, frame: np.ndarray, faces: List[Any]) -> np.ndarray:
+        """
+        Membuat embedding untuk setiap wajah.
+
+        Args:
+            frame: Frame BGR
+            faces: List baris YuNet dari FaceDetector.detect_faces (di-align dengan
+                landmark) atau kotak wajah (x, y, w, h)
+
+        Returns:
+            Matriks float32 (jumlah wajah x dim) yang sudah dinormalisasi L2
+        """
+        embeddings = np.zeros((len(faces), self.dim), dtype=np.float32)
+        for i, face_row in enumerate(faces):
+            x, y, w, h = face_box(face_row)
+            face = frame[max(0, y):y + h, max(0, x):x + w]
+            if face.size == 0:
+                continue
+            if self.sface is not None:
+                if len(face_row) >= self.YUNET_ROW_LENGTH:
+                    aligned = self.sface.alignCrop(frame, np.asarray(face_row, dtype=np.float32))
+                else:
+                    # Tanpa landmark (Haar): kotak wajah diubah ukurannya saja
+                    aligned = cv2.resize(face, (112, 112))
+                vector = self.sface.feature(aligned).reshape(-1)
+            else:
+                gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+                gray = cv2.equalizeHist(cv2.resize(gray, (self.PIXEL_SIZE, self.PIXEL_SIZE),
+                                                   interpolation=cv2.INTER_AREA))
+                vector = gray.astype(np.float32).reshape(-1)
+                vector -= vector.mean()
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                embeddings[i] = vector / norm
+        return embeddings
+
+
+# Pasangan detektor dan embedder yang sudah dimuat, per folder model. Satu pasangan
+# hanya dipakai satu pipeline pada satu waktu karena objek OpenCV-nya tidak thread-safe.
+_model_pool: Dict[str, List[Tuple[FaceDetector, FaceEmbedder]]] = {}
+_model_pool_lock = threading.Lock()
+
+
+def acquire_models(model_dir: str = MODEL_DIR) -> Tuple[FaceDetector, FaceEmbedder]:
+    """
+    Mengambil pasangan detektor dan embedder dari pool, atau memuat yang baru
+    jika semua pasangan sedang dipakai kamera lain.
+
+    Args:
+        model_dir: Folder model ONNX
+
+    Returns:
+        Tuple (detektor, embedder) yang dipakai eksklusif sampai release_models
+    """
+    with _model_pool_lock:
+        pool = _model_pool.get(model_dir)
+        if pool:
+            return pool.pop()
+    return FaceDetector(model_dir), FaceEmbedder(model_dir)
+
+
+def release_models(detector: FaceDetector, embedder: FaceEmbedder,
+                   model_dir: str = MODEL_DIR) -> None:
+    """Mengembalikan pasangan dari acquire_models ke pool agar dipakai pipeline berikutnya."""
+    with _model_pool_lock:
+        _model_pool.setdefault(model_dir, []).append((detector, embedder))
+
+
+class SimpleMatcher:
+    """Pencocokan embedding dengan membandingkan satu per satu ke semua wajah terdaftar."""
+
+    def __init__(self, threshold: float = DEFAULT_MATCH_THRESHOLD):
+        self.threshold = threshold
+        self.entries = []
+
+    def add(self, mahasiswa_id: int, embedding: np.ndarray) -> None:
+        """Mendaftarkan embedding milik seorang mahasiswa."""
+        self.entries.append((mahasiswa_id, embedding.astype(np.float32)))
+
+    def identify(self, embeddings: np.ndarray) -> List[Tuple[Optional[int], float]]:
+        """
+        Mencari mahasiswa yang paling mirip untuk setiap embedding.
+
+        Args:
+            embeddings: Matriks embedding probe (n x dim)
+
+        Returns:
+            List (mahasiswa_id atau None jika di bawah threshold, skor kemiripan)
+        """
+        results = []
+        for probe in embeddings:
+            best_id, best_score = None, -1.0
+            for mahasiswa_id, embedding in self.entries:
+                score = float(np.dot(probe, embedding))
+                if score > best_score:
+                    best_id, best_score = mahasiswa_id, score
+            results.append((best_id if best_score >= self.threshold else None, best_score))
+        return results
+
+
+class FrameRingBuffer:
+    """
+    Ring buffer frame preview dengan buffer yang dialokasikan sekali.
+    Writer (thread pipeline) menulis ke slot yang tidak sedang dibaca dan
+    bukan frame terbaru; reader (thread GUI) selalu mengambil frame terbaru.
+    Frame yang belum sempat dibaca sebelum frame berikutnya terbit dibuang
+    dan dihitung sebagai dropped, bukan diantrikan.
+    """
+
+    def __init__(self, slots: int = 3):
+        # Minimal 3 slot: satu dibaca, satu frame terbaru, satu ditulis
+        self.slots = max(3, slots)
+        self.buffers = []
+        self.shape = None
+        self.published = 0
+        self.dropped = 0
+        self.read_count = 0
+        self._lock = threading.Lock()
+        self._latest = None
+        self._latest_seq = 0
+        self._latest_read = True
+        self._reading = None
+        self._writing = None
+
+    def begin_write(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Mengambil slot kosong untuk ditulis. Buffer dialokasikan ulang hanya
+        jika ukuran frame berubah.
+
+        Args:
+            shape: Ukuran frame (tinggi, lebar, 3)
+
+        Returns:
+            Array uint8 milik slot yang harus diisi sebelum end_write()
+        """
+        with self._lock:
+            if shape != self.shape:
+                self.buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.slots)]
+                self.shape = shape
+                self._latest, self._reading = None, None
+            self._writing = next(i for i in range(self.slots) if i not in (self._latest, self._reading))
+            return self.buffers[self._writing]
+
+    def end_write(self) -> None:
+        """Menerbitkan slot yang baru ditulis sebagai frame terbaru."""
+        with self._lock:
+            if not self._latest_read:
+                self.dropped += 1
+            self._latest, self._writing = self._writing, None
+            self._latest_seq += 1
+            self._latest_read = False
+            self.published += 1
+
+    def acquire_read(self, last_seq: int = 0) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Mengambil frame terbaru untuk dibaca tanpa menyalin. Slot dikunci dari
+        writer sampai release_read() dipanggil.
+
+        Args:
+            last_seq: Nomor frame terakhir yang sudah dibaca pemanggil
+
+        Returns:
+            Tuple (nomor frame, array frame) atau (last_seq, None) jika belum ada frame baru
+        """
+        with self._lock:
+            if self._latest is None or self._latest_seq == last_seq:
+                return last_seq, None
+            self._reading = self._latest
+            self._latest_read = True
+            self.read_count += 1
+            return self._latest_seq, self.buffers[self._reading]
+
+    def release_read(self) -> None:
+        """Melepas slot yang sedang dibaca."""
+        with self._lock:
+            self._reading = None
+
+    def stats(self) -> Dict[str, int]:
+        """Jumlah frame yang diterbitkan, dibaca dan dibuang."""
+        with self._lock:
+            return {"published": self.published, "read": self.read_count, "dropped": self.dropped}
+
+
+def box_iou(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    """Intersection over union dua kotak (x, y, w, h)."""
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    intersection = max(0, x1 - x0) * max(0, y1 - y0)
+    union = a[2] * a[3] + b[2] * b[3] - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class Track:
+    """Satu wajah yang diikuti antar frame beserta identitasnya."""
+
+    def __init__(self, track_id: int, box: Tuple[int, int, int, int]):
+        self.track_id = track_id
+        self.box = box
+        self.mahasiswa_id = None
+        self.score = 0.0
+        self.misses = 0
+        self.embed_calls = 0
+
+    @property
+    def identified(self) -> bool:
+        """True jika identitas track sudah dikenali dengan yakin."""
+        return self.mahasiswa_id is not None
+
+
+class IoUTracker:
+    """
+    Tracker sederhana berbasis IoU. Kotak deteksi baru dipasangkan secara greedy
+    dengan track yang kotaknya paling tumpang tindih; sisanya menjadi track baru.
+    """
+
+    def __init__(self, iou_threshold: float = TRACK_IOU_THRESHOLD, max_misses: int = TRACK_MAX_MISSES):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, boxes: List[Tuple[int, int, int, int]]) -> List[Track]:
+        """
+        Memperbarui track dengan hasil deteksi terbaru.
+
+        Args:
+            boxes: Kotak wajah hasil deteksi
+
+        Returns:
+            List track yang masih aktif
+        """
+        pairs = sorted(
+            ((box_iou(track.box, box), t, b) for t, track in enumerate(self.tracks) for b, box in enumerate(boxes)),
+            reverse=True
+        )
+        matched_tracks, matched_boxes = set(), set()
+        for iou, t, b in pairs:
+            if iou < self.iou_threshold:
+                break
+            if t in matched_tracks or b in matched_boxes:
+                continue
+            self.tracks[t].box = boxes[b]
+            self.tracks[t].misses = 0
+            matched_tracks.add(t)
+            matched_boxes.add(b)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+
+        for b, box in enumerate(boxes):
+            if b not in matched_boxes:
+                self.tracks.append(Track(self._next_id, box))
+                self._next_id += 1
+        return self.tracks
+
+
+class RecognitionPipeline:
+    """
+    Menjalankan alur capture -> detect -> embed -> match pada satu sumber frame.
+    Hasil pengenalan dikirim lewat callback on_recognized dan frame preview
+    yang sudah diberi anotasi dikirim lewat callback on_preview.
+    """
+
+    def __init__(self, source: FrameSource, matcher: Any,
+                 detector: Optional[FaceDetector] = None,
+                 embedder: Optional[FaceEmbedder] = None,
+                 target_fps: float = DEFAULT_TARGET_FPS,
+                 detect_interval: int = DEFAULT_DETECT_INTERVAL,
+                 on_recognized: Optional[Callable[[int, float], None]] = None,
+                 on_preview: Optional[Callable[[np.ndarray], None]] = None,
+                 preview_buffer: Optional[FrameRingBuffer] = None):
+        """
+        Args:
+            source: Sumber frame
+            matcher: Objek dengan method identify(embeddings)
+            detector: Detektor wajah; jika detector dan embedder tidak diisi,
+                pasangan yang sudah dimuat diambil dari pool (acquire_models)
+            embedder: Pembuat embedding
+            target_fps: Jumlah frame maksimal yang diproses per detik
+            detect_interval: Deteksi dijalankan setiap sekian frame (1 = setiap frame)
+            on_recognized: Dipanggil dengan (mahasiswa_id, skor) sekali per track yang dikenali
+            on_preview: Dipanggil dengan frame RGB yang sudah diberi anotasi
+            preview_buffer: Ring buffer tujuan frame preview RGB; jika diisi,
+                frame ditulis langsung ke buffer tanpa alokasi per frame
+        """
+        self.source = source
+        self.matcher = matcher
+        # Model dari pool dikembalikan oleh close(), model dari pemanggil tetap milik pemanggil
+        self._pooled_models = detector is None and embedder is None
+        if self._pooled_models:
+            detector, embedder = acquire_models()
+        self._models_acquired = self._pooled_models
+        self.detector = detector or FaceDetector()
+        self.embedder = embedder or FaceEmbedder()
+        # Embedding dari backend lain (mis. piksel 256-d vs SFace 128-d) tidak bisa dicocokkan
+        matcher_backend = getattr(matcher, "backend", None)
+        if matcher_backend and matcher_backend != self.embedder.backend:
+            self.close()
+            raise ValueError(f"Galeri wajah dibuat dengan backend {matcher_backend}, pipeline memakai "
+                             f"{self.embedder.backend}; jalankan ulang enrollment")
+        self.target_fps = target_fps
+        self.detect_interval = max(1, detect_interval)
+        self.on_recognized = on_recognized
+        self.on_preview = on_preview
+        self.preview_buffer = preview_buffer
+        self.timer = StageTimer()
+        self.tracker = IoUTracker()
+        self.frames_processed = 0
+        self.detect_calls = 0
+        self.embed_calls = 0
+        self.cpu_seconds = 0.0
+        self.started_at = None
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        """Meminta loop berhenti setelah frame yang sedang diproses."""
+        self._stop_event.set()
+
+    def close(self) -> None:
+        """Mengembalikan detektor dan embedder dari pool; dipanggil otomatis di akhir run()."""
+        if self._models_acquired:
+            self._models_acquired = False
+            release_models(self.detector, self.embedder)
+
+    def process_frame(self, frame: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Memproses satu frame. Deteksi hanya dijalankan setiap detect_interval
+        frame; di antaranya kotak track terakhir dipakai. Embedding hanya dibuat
+        untuk track yang belum dikenali, identitas track yang sudah dikenali
+        dipertahankan selama track masih hidup.
+
+        Args:
+            frame: Frame BGR
+
+        Returns:
+            List hasil per track berisi track_id, box, mahasiswa_id dan score
+        """
+        if self.frames_processed % self.detect_interval == 0:
+            with self.timer.measure("detect"):
+                faces = self.detector.detect_faces(frame)
+            self.detect_calls += 1
+            boxes = [face_box(face) for face in faces]
+            # Baris deteksi lengkap (dengan landmark) per kotak, untuk alignment saat embedding
+            face_rows = dict(zip(boxes, faces))
+            tracks = self.tracker.update(boxes)
+
+            pending = [track for track in tracks if not track.identified and track.misses == 0]
+            if pending:
+                with self.timer.measure("embed"):
+                    embeddings = self.embedder.embed(frame, [face_rows.get(track.box, track.box)
+                                                             for track in pending])
+                self.embed_calls += len(pending)
+
+                with self.timer.measure("match"):
+                    matches = self.matcher.identify(embeddings)
+
+                for track, (mahasiswa_id, score) in zip(pending, matches):
+                    track.embed_calls += 1
+                    track.score = score
+                    if mahasiswa_id is not None:
+                        track.mahasiswa_id = mahasiswa_id
+                        if self.on_recognized:
+                            with self.timer.measure("record"):
+                                self.on_recognized(mahasiswa_id, score)
+        else:
+            tracks = self.tracker.tracks
+
+        return [{"track_id": track.track_id, "box": track.box,
+                 "mahasiswa_id": track.mahasiswa_id, "score": track.score}
+                for track in tracks if track.misses == 0]
+
+    def annotate(self, frame: np.ndarray, results: List[Dict[str, Any]],
+                 out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Menggambar kotak dan label pada frame, lalu mengubahnya ke RGB untuk preview.
+
+        Args:
+            frame: Frame BGR (diubah di tempat)
+            results: Hasil process_frame
+            out: Buffer tujuan RGB yang sudah dialokasikan (opsional)
+
+        Returns:
+            Frame RGB yang siap ditampilkan
+        """
+        for result in results:
+            x, y, w, h = result["box"]
+            known = result["mahasiswa_id"] is not None
+            color = (46, 204, 113) if known else (60, 76, 231)
+            label = f"{result['mahasiswa_id']} ({result['score']:.2f})" if known else "Tidak dikenal"
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+            cv2.putText(frame, label, (x, max(15, y - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=out)
+
+    def run(self, max_frames: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Menjalankan loop pengenalan sampai sumber habis, stop() dipanggil
+        atau max_frames tercapai. Dipanggil dari thread worker, bukan thread GUI.
+        stop() yang dipanggil sebelum run() membuat loop langsung selesai.
+
+        Args:
+            max_frames: Batas jumlah frame yang diproses (None = tanpa batas)
+
+        Returns:
+            Statistik akhir (jumlah frame, fps rata-rata, durasi per tahap)
+        """
+        if self._pooled_models and not self._models_acquired:
+            # run() dipanggil lagi setelah close(): ambil pasangan model dari pool lagi
+            self.detector, self.embedder = acquire_models()
+            self._models_acquired = True
+        frame_interval = 1.0 / self.target_fps if self.target_fps > 0 else 0.0
+        started = self.started_at = time.perf_counter()
+        cpu_started = time.thread_time()
+
+        try:
+            self.source.open()
+        except Exception:
+            self.close()
+            raise
+        try:
+            while not self._stop_event.is_set():
+                frame_started = time.perf_counter()
+
+                with self.timer.measure("capture"):
+                    frame = self.source.read()
+                if frame is None:
+                    break
+
+                results = self.process_frame(frame)
+
+                if self.preview_buffer is not None:
+                    with self.timer.measure("annotate"):
+                        self.annotate(frame, results, self.preview_buffer.begin_write(frame.shape))
+                        self.preview_buffer.end_write()
+                elif self.on_preview:
+                    with self.timer.measure("annotate"):
+                        preview = self.annotate(frame, results)
+                    self.on_preview(preview)
+
+                # Latensi satu frame dari capture sampai preview siap
+                self.timer.record("frame", (time.perf_counter() - frame_started) * 1000)
+                self.frames_processed += 1
+                if max_frames is not None and self.frames_processed >= max_frames:
+                    break
+
+                # Tunggu sisa waktu agar sesuai target FPS
+                remaining = frame_interval - (time.perf_counter() - frame_started)
+                if remaining > 0:
+                    self._stop_event.wait(remaining)
+        finally:
+            self.source.close()
+            self.close()
+            # Permintaan berhenti sudah dipenuhi; run() berikutnya berjalan normal
+            self._stop_event.clear()
+            # Waktu CPU thread ini saja, sehingga tiap kamera bisa diukur terpisah
+            self.cpu_seconds += time.thread_time() - cpu_started
+
+        return self.stats(time.perf_counter() - started)
+
+    def stats(self, elapsed: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Statistik pipeline saat ini.
+
+        Args:
+            elapsed: Lama loop berjalan (detik) untuk menghitung fps, default sejak run() dimulai
+
+        Returns:
+            Dictionary berisi sumber, jumlah frame, fps, panggilan deteksi/embedding dan durasi per tahap
+        """
+        if elapsed is None and self.started_at is not None:
+            elapsed = time.perf_counter() - self.started_at
+        result = {
+            "source": self.source.name,
+            "frames": self.frames_processed,
+            "detect_calls": self.detect_calls,
+            "embed_calls": self.embed_calls,
+            "tracks": len(self.tracker.tracks),
+            "stages": self.timer.snapshot(),
+        }
+        if "frame" in result["stages"]:
+            result["latency_ms"] = round(result["stages"]["frame"]["avg_ms"], 2)
+        if elapsed:
+            result["fps"] = round(self.frames_processed / elapsed, 2)
+            result["detect_per_second"] = round(self.detect_calls / elapsed, 2)
+            result["embed_per_second"] = round(self.embed_calls / elapsed, 2)
+            if self.cpu_seconds:
+                result["cpu_percent"] = round(self.cpu_seconds / elapsed * 100, 1)
+        return result
+
+
+def run_concurrent(pipelines: List[RecognitionPipeline],
+                   max_frames: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Menjalankan beberapa pipeline (satu per kamera) bersamaan, masing-masing di
+    thread sendiri. OpenCV dan NumPy melepas GIL saat deteksi dan embedding,
+    sehingga kamera-kamera berjalan paralel di core yang berbeda.
+
+    Args:
+        pipelines: Pipeline per kamera; matcher dan on_recognized boleh dipakai bersama
+        max_frames: Batas jumlah frame per kamera
+
+    Returns:
+        Tuple (statistik per kamera, ringkasan gabungan berisi total fps dan durasi).
+        Kamera yang gagal (misalnya sumber tidak bisa dibuka) mendapat statistik
+        berisi "error" dan tidak dihitung dalam ringkasan.
+    """
+    results = [None] * len(pipelines)
+
+    def worker(index):
+        pipeline = pipelines[index]
+        try:
+            results[index] = pipeline.run(max_frames)
+        except Exception as e:
+            logger.error(f"Kamera {pipeline.source.name} gagal: {e}")
+            results[index] = {"source": pipeline.source.name, "error": str(e), "frames": 0}
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), name=f"camera-{i}")
+               for i in range(len(pipelines))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    succeeded = [stats for stats in results if "error" not in stats]
+    total_frames = sum(stats["frames"] for stats in succeeded)
+    summary = {
+        "cameras": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "frames": total_frames,
+        "elapsed_seconds": round(elapsed, 2),
+        "fps": round(total_frames / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    return results, summary
+
+
+def benchmark_cameras(specs: List[str], max_frames: int = 200,
+                      detect_interval: int = DEFAULT_DETECT_INTERVAL) -> Dict[str, Any]:
+    """
+    Mengukur skala pipeline multi-kamera: satu kamera sendirian dibandingkan
+    semua kamera bersamaan, tanpa batas FPS.
+
+    Args:
+        specs: Sumber kamera, misalnya beberapa file video
+        max_frames: Jumlah frame per kamera (sumber diulang jika habis)
+        detect_interval: Deteksi setiap sekian frame
+
+    Returns:
+        Dictionary berisi fps satu kamera, fps gabungan, speedup dan efisiensi
+    """
+    matcher = SimpleMatcher()
+
+    def build(spec):
+        return RecognitionPipeline(open_frame_source(spec, loop=True), matcher, target_fps=0,
+                                   detect_interval=detect_interval)
+
+    per_camera, summary = run_concurrent([build(spec) for spec in specs], max_frames)
+    # Pembanding satu kamera memakai sumber pertama yang berhasil dibuka
+    working = [spec for spec, stats in zip(specs, per_camera) if "error" not in stats]
+    single = run_concurrent([build(working[0])], max_frames)[0][0] if working else {}
+
+    cameras = summary["cameras"]
+    speedup = summary["fps"] / single["fps"] if single.get("fps") else 0.0
+    result = {
+        "cameras": cameras,
+        "failed": summary["failed"],
+        "single_fps": single.get("fps", 0.0),
+        "concurrent_fps": summary["fps"],
+        "speedup": round(speedup, 2),
+        "efficiency": round(speedup / cameras, 2) if cameras else 0.0,
+        "per_camera": per_camera,
+    }
+    logger.info(f"Benchmark multi-kamera: {cameras} kamera ({summary['failed']} gagal), "
+                f"speedup {result['speedup']}x")
+    return result
+
+
+def warm_up(model_dir: str = MODEL_DIR) -> Dict[str, str]:
+    """
+    Memuat detektor dan embedder lalu menjalankannya sekali pada frame kosong.
+    Pasangan yang sudah dipanaskan disimpan di pool, sehingga pipeline kamera
+    pertama memakainya tanpa memuat model lagi.
+
+    Args:
+        model_dir: Folder model ONNX
+
+    Returns:
+        Dictionary berisi backend detektor dan embedding
+    """
+    detector, embedder = acquire_models(model_dir)
+    try:
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        detector.detect(frame)
+        embedder.embed(frame, [(0, 0, 112, 112)])
+    finally:
+        release_models(detector, embedder, model_dir)
+    return {"detector": detector.backend, "embedder": embedder.backend}
+
+
+def print_stats(stats: Dict[str, Any]) -> None:
+    """Mencetak statistik satu pipeline."""
+    if "error" in stats:
+        print(f"\n=== {stats['source']}: gagal ({stats['error']}) ===")
+        return
+    print(f"\n=== {stats['source']}: {stats['frames']} frame, {stats.get('fps', 0)} fps, "
+          f"latensi {stats.get('latency_ms', 0)} ms, CPU {stats.get('cpu_percent', 0)}% ===")
+    print(f"Deteksi: {stats['detect_calls']} ({stats.get('detect_per_second', 0)}/detik), "
+          f"embedding: {stats['embed_calls']} ({stats.get('embed_per_second', 0)}/detik)")
+    for stage, values in stats["stages"].items():
+        print(f"{stage:<10} | rata-rata {values['avg_ms']:>8.2f} ms | {values['count']} kali")
+
+
+def main():
+    """Menjalankan pipeline tanpa GUI untuk pengujian dan pengukuran."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Pipeline pengenalan wajah tanpa GUI")
+    parser.add_argument("sources", nargs="*", default=parse_camera_sources(DEFAULT_CAMERA_SOURCE),
+                        help="Satu atau beberapa sumber: indeks webcam, file video, atau folder gambar")
+    parser.add_argument("--fps", type=float, default=0, help="Target FPS per kamera (0 = secepatnya)")
+    parser.add_argument("--max-frames", type=int, default=None, help="Batas jumlah frame per kamera")
+    parser.add_argument("--detect-interval", type=int, default=DEFAULT_DETECT_INTERVAL,
+                        help="Deteksi setiap sekian frame (1 = setiap frame)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Bandingkan satu kamera dengan semua kamera bersamaan")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = benchmark_cameras(args.sources, args.max_frames or 200, args.detect_interval)
+        for stats in result["per_camera"]:
+            print_stats(stats)
+        print(f"\n=== Skala multi-kamera ({result['cameras']} kamera, {os.cpu_count()} core) ===")
+        if result["failed"]:
+            print(f"Gagal dibuka  : {result['failed']} kamera")
+        print(f"Satu kamera   : {result['single_fps']} fps")
+        print(f"Bersamaan     : {result['concurrent_fps']} fps total")
+        print(f"Speedup       : {result['speedup']}x (efisiensi {result['efficiency'] * 100:.0f}%)")
+        return
+
+    # Matcher dipakai bersama semua kamera, detektor dan embedder dibuat per kamera
+    matcher = SimpleMatcher()
+    pipelines = [RecognitionPipeline(open_frame_source(spec), matcher, target_fps=args.fps,
+                                     detect_interval=args.detect_interval)
+                 for spec in args.sources]
+    print(f"Detektor: {pipelines[0].detector.backend}, embedding: {pipelines[0].embedder.backend}")
+
+    per_camera, summary = run_concurrent(pipelines, args.max_frames)
+    for stats in per_camera:
+        print_stats(stats)
+    if len(per_camera) > 1:
+        print(f"\nTotal {summary['cameras']} kamera ({summary['failed']} gagal): "
+              f"{summary['frames']} frame, {summary['fps']} fps")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,91 @@
+import importlib
+import time
+
 from PyQt5.QtWidgets import QWidget, QLabel, QProgressBar, QVBoxLayout
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+
+
+class StartupWorker(QThread):
+    """
+    Worker yang menjalankan tahap-tahap startup di luar thread GUI:
+    membuka dan migrasi database, memuat data dosen/kelas, memetakan
+    store embedding wajah, memanaskan model pengenalan wajah dan mengimpor
+    modul screen. Modul berat (NumPy, OpenCV, requests) diimpor di tahap
+    yang memakainya, bukan saat splash screen dibuat.
+    """
+    # Signal ketika satu tahap dimulai: indeks tahap, teks status
+    stage_started = pyqtSignal(int, str)
+    # Signal ketika satu tahap selesai: indeks tahap, nama tahap, durasi (ms)
+    stage_finished = pyqtSignal(int, str, float)
+    # Signal ketika semua tahap selesai, berisi durasi per tahap
+    startup_finished = pyqtSignal(dict)
+    
+    # Nama tahap dan teks status yang ditampilkan di splash screen
+    STAGES = [
+        ("database", "Membuka database..."),
+        ("dosen_kelas", "Memuat data dosen dan kelas..."),
+        ("embedding", "Memetakan data wajah..."),
+        ("model", "Menyiapkan model pengenalan wajah..."),
+        ("screens", "Menyiapkan tampilan..."),
+    ]
+    
+    def run(self):
+        """Menjalankan semua tahap berurutan dengan koneksi database milik thread ini"""
+        from db_manager import DatabaseManager, connection_provider
+        self.db_manager = DatabaseManager()
+        timings = {}
+        try:
+            for index, (name, label) in enumerate(self.STAGES):
+                self.stage_started.emit(index, label)
+                started = time.perf_counter()
+                try:
+                    getattr(self, f"_stage_{name}")()
+                except Exception as e:
+                    # Tahap yang gagal tidak menahan aplikasi; error muncul lagi saat fiturnya dipakai
+                    print(f"Startup {name} gagal: {e}")
+                elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+                timings[name] = elapsed_ms
+                print(f"Startup {name}: {elapsed_ms} ms")
+                self.stage_finished.emit(index, name, elapsed_ms)
+        finally:
+            self.db_manager.close()
+            # Koneksi milik thread worker ini tidak dipakai lagi
+            connection_provider.close_thread_connections()
+        
+        timings["total"] = round(sum(timings.values()), 2)
+        print(f"Startup selesai dalam {timings['total']} ms")
+        self.startup_finished.emit(timings)
+    
+    def _stage_database(self):
+        """Membuka local.db dan menjalankan migrasi skema"""
+        self.db_manager.connect()
+        self.db_manager.create_tables_if_not_exist()
+    
+    def _stage_dosen_kelas(self):
+        """Membaca tabel dosen dan kelas untuk login dan pemilihan kelas"""
+        counts = self.db_manager.preload_master_data()
+        print(f"Startup: {counts['dosen']} dosen, {counts['kelas']} kelas")
+    
+    def _stage_embedding(self):
+        """Memetakan store embedding dan membaca seluruh halamannya sekali"""
+        from embedding_store import EmbeddingStore
+        store = EmbeddingStore()
+        if store.exists():
+            # Menyentuh semua halaman agar preload kelas pertama tidak menunggu disk
+            store.embeddings.sum()
+        store.close()
+    
+    def _stage_model(self):
+        """Memuat detektor dan embedder wajah, menjalankannya sekali dan menyimpannya di pool model"""
+        from face_pipeline import warm_up
+        backends = warm_up()
+        print(f"Startup: detektor {backends['detector']}, embedding {backends['embedder']}")
+    
+    def _stage_screens(self):
+        """Mengimpor modul screen agar navigasi pertama tidak menunggu impor"""
+        importlib.import_module("dashboard_screen")
+        importlib.import_module("absensi_screen")
+
 
 class SplashScreen(QWidget):
     """
@@ -22,10 +108,11 @@ class SplashScreen(QWidget):
         # Membuat dan mengatur UI
         self._init_ui()
         
-        # Timer untuk simulasi loading
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self._update_progress)
-        self.counter = 0
+        # Worker tahap-tahap startup, progress bar mengikuti tahap yang selesai
+        self.startup_worker = StartupWorker(self)
+        self.startup_worker.stage_started.connect(self._on_stage_started)
+        self.startup_worker.stage_finished.connect(self._update_progress)
+        self.startup_worker.startup_finished.connect(self._on_startup_finished)
         
     def _init_ui(self):
         """Inisialisasi komponen UI splash screen"""
@@ -87,25 +174,38 @@ class SplashScreen(QWidget):
         """)
     
     def start_splash(self):
-        """Memulai splash screen dan timer"""
+        """Memulai splash screen dan worker startup"""
         self.show()
-        self.timer.start(30)  # Update setiap 30ms
+        self.startup_worker.start()
     
-    def _update_progress(self):
-        """Update progress bar dan teks loading"""
-        self.counter += 1
-        self.progress_bar.setValue(self.counter)
-        
-        # Update teks loading berdasarkan progress
-        if self.counter <= 33:
-            self.lbl_loading.setText("Memuat komponen...")
-        elif self.counter <= 66:
-            self.lbl_loading.setText("Menginisialisasi data...")
-        else:
-            self.lbl_loading.setText("Hampir selesai...")
-        
-        # Jika progress mencapai 100%, hentikan timer dan pindah ke main window
-        if self.counter >= 100:
-            self.timer.stop()
-            self.finished.emit()  # Emit signal bahwa splash screen sudah selesai
-            self.close()
\ No newline at end of file
+    def _on_stage_started(self, index, label):
+        """
+        Menampilkan tahap startup yang sedang berjalan
+        
+        Args:
+            index (int): Indeks tahap
+            label (str): Teks status tahap
+        """
+        self.lbl_loading.setText(label)
+    
+    def _update_progress(self, index, name, elapsed_ms):
+        """
+        Update progress bar setelah satu tahap selesai
+        
+        Args:
+            index (int): Indeks tahap yang selesai
+            name (str): Nama tahap
+            elapsed_ms (float): Durasi tahap dalam milidetik
+        """
+        self.progress_bar.setValue(int((index + 1) * 100 / len(StartupWorker.STAGES)))
+    
+    def _on_startup_finished(self, timings):
+        """
+        Pindah ke main window segera setelah semua tahap selesai
+        
+        Args:
+            timings (dict): Durasi per tahap dalam milidetik
+        """
+        self.startup_worker.wait()
+        self.finished.emit()  # Emit signal bahwa splash screen sudah selesai
+        self.close()
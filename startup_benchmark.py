@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark startup aplikasi.
+Mengukur waktu impor modul main (dari output `python -X importtime`) dan waktu
+sejak proses dimulai sampai splash screen pertama kali digambar (first paint)
+dan sampai main window siap. Keluar dengan kode 1 jika salah satu melebihi
+budget, sehingga bisa dipakai sebagai pemeriksaan sebelum rilis.
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import threading
+from typing import Dict, List, Any, Tuple
+
+from main import STARTUP_BENCHMARK_ENV
+
+
+# Budget bawaan dalam milidetik
+DEFAULT_IMPORT_BUDGET_MS = 400.0
+DEFAULT_FIRST_PAINT_BUDGET_MS = 1500.0
+DEFAULT_READY_BUDGET_MS = 5000.0
+
+# Penanda yang dicetak main.report_startup()
+STARTUP_MARKER = "STARTUP "
+
+# Folder aplikasi; benchmark startup tetap dijalankan dari folder kerja saat ini
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, float, float]]:
+    """
+    Mem-parse output stderr `python -X importtime`.
+
+    Args:
+        output: Teks stderr
+
+    Returns:
+        List (nama modul, kedalaman impor, self ms, kumulatif ms) sesuai urutan output
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            # Baris judul kolom
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(parts[0]) / 1000, int(parts[1]) / 1000))
+    return entries
+
+
+def measure_imports(module: str = "main", top: int = 10) -> Dict[str, Any]:
+    """
+    Mengukur waktu impor satu modul di proses baru.
+
+    Args:
+        module: Nama modul yang diimpor
+        top: Jumlah modul termahal (waktu kumulatif) yang dilaporkan
+
+    Returns:
+        Dictionary berisi total ms impor modul dan daftar modul termahal
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True, check=True, cwd=APP_DIR)
+    entries = parse_importtime(completed.stderr)
+    index = next((i for i, (name, depth, _, _) in enumerate(entries) if name == module and depth == 0), None)
+    if index is None:
+        raise RuntimeError(f"Modul {module} tidak ditemukan di output importtime")
+    total = entries[index][3]
+
+    # Impor anak dicetak sebelum induknya: kumpulkan impor langsung modul utama
+    # mundur sampai entri tingkat atas sebelumnya
+    direct = []
+    for name, depth, _, cumulative in reversed(entries[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            direct.append((name, cumulative))
+    direct.sort(key=lambda entry: entry[1], reverse=True)
+    loaded = {name for name, _, _, _ in entries}
+    return {
+        "total_ms": round(total, 2),
+        "top": [(name, round(ms, 2)) for name, ms in direct[:top]],
+        "heavy_loaded": sorted(loaded & {"numpy", "cv2", "requests"}),
+    }
+
+
+def measure_startup(timeout: float = 60.0) -> Dict[str, float]:
+    """
+    Menjalankan aplikasi dalam mode benchmark dan mengukur waktu sampai
+    setiap penanda startup dicetak.
+
+    Args:
+        timeout: Batas waktu menunggu aplikasi (detik)
+
+    Returns:
+        Dictionary ms sejak proses dimulai sampai first_paint dan ready
+    """
+    env = dict(os.environ, **{STARTUP_BENCHMARK_ENV: "1"})
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(APP_DIR, "main.py")], stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True, env=env)
+    timings = {}
+
+    def read_markers():
+        for line in process.stdout:
+            if line.startswith(STARTUP_MARKER):
+                timings[line[len(STARTUP_MARKER):].strip()] = round((time.perf_counter() - started) * 1000, 2)
+
+    # stdout dibaca di thread terpisah agar timeout tetap berlaku walau aplikasi tidak mencetak apa pun
+    reader = threading.Thread(target=read_markers, daemon=True)
+    reader.start()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    reader.join()
+    return timings
+
+
+def benchmark_startup(runs: int = 3) -> Dict[str, Any]:
+    """
+    Mengulang pengukuran impor dan startup, lalu mengambil median.
+
+    Args:
+        runs: Jumlah pengulangan
+
+    Returns:
+        Dictionary berisi median import_ms, first_paint_ms, ready_ms dan detail impor terakhir
+    """
+    imports = [measure_imports() for _ in range(runs)]
+    startups = [measure_startup() for _ in range(runs)]
+
+    def median(values):
+        values = [value for value in values if value is not None]
+        return round(statistics.median(values), 2) if values else None
+
+    return {
+        "runs": runs,
+        "import_ms": median([result["total_ms"] for result in imports]),
+        "first_paint_ms": median([result.get("first_paint") for result in startups]),
+        "ready_ms": median([result.get("ready") for result in startups]),
+        "imports": imports[-1],
+    }
+
+
+def main():
+    """Menjalankan benchmark startup dari command line."""
+    parser = argparse.ArgumentParser(description="Benchmark waktu impor dan first paint aplikasi")
+    parser.add_argument("--runs", type=int, default=3, help="Jumlah pengulangan (median)")
+    parser.add_argument("--import-budget", type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                        help="Budget waktu impor main dalam ms")
+    parser.add_argument("--paint-budget", type=float, default=DEFAULT_FIRST_PAINT_BUDGET_MS,
+                        help="Budget waktu sampai splash screen tergambar dalam ms")
+    parser.add_argument("--ready-budget", type=float, default=DEFAULT_READY_BUDGET_MS,
+                        help="Budget waktu sampai main window siap dalam ms")
+    args = parser.parse_args()
+
+    result = benchmark_startup(args.runs)
+
+    print(f"\n=== Benchmark Startup (median {result['runs']} kali) ===")
+    print("Impor termahal di main:")
+    for name, ms in result["imports"]["top"]:
+        print(f"  {name:<30} {ms:>8.2f} ms")
+    heavy = ", ".join(result["imports"]["heavy_loaded"]) or "-"
+    print(f"Modul berat yang ikut diimpor: {heavy}")
+
+    checks = [
+        ("Impor main", result["import_ms"], args.import_budget),
+        ("First paint", result["first_paint_ms"], args.paint_budget),
+        ("Siap", result["ready_ms"], args.ready_budget),
+    ]
+    failed = False
+    for label, value, budget in checks:
+        ok = value is not None and value <= budget
+        failed = failed or not ok
+        shown = f"{value:.2f} ms" if value is not None else "tidak tercatat"
+        print(f"{label:<12} | {shown:>14} | budget {budget:.0f} ms | {'OK' if ok else 'GAGAL'}")
+
+    if failed:
+        print("\nStartup melebihi budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()